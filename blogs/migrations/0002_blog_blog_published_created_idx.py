@@ -0,0 +1,19 @@
+# Generated by Django 5.2.15 on 2026-10-17 22:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['is_published', '-created_at', 'id'], name='blog_published_created_idx'),
+        ),
+    ]
@@ -0,0 +1,201 @@
+# Generated by Django 5.2.15 on 2026-10-17 22:45
+
+import math
+import re
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# Frozen copy of codewithsathya.richtext.render_rich_text as it was when this
+# migration was written, inlined so later changes there don't alter this migration
+
+# Tags whose boundaries separate words even without surrounding whitespace
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure',
+    'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'ol', 'p', 'pre', 'section',
+    'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul',
+}
+SKIPPED_TAGS = {'script', 'style', 'template', 'noscript', 'iframe', 'object', 'embed'}
+VOID_TAGS = {'br', 'col', 'hr', 'img'}
+WHITESPACE_RE = re.compile(r'\s+')
+
+# What CKEditor 5 produces with the "extends" toolbar; anything else is dropped
+ALLOWED_TAGS = BLOCK_TAGS | {
+    'a', 'b', 'code', 'em', 'i', 'img', 'kbd', 'mark', 's', 'small', 'span', 'strong', 'sub', 'sup', 'u',
+    'caption', 'col', 'colgroup',
+}
+ALLOWED_ATTRIBUTES = {
+    '*': {'class'},
+    'a': {'href', 'title', 'target', 'rel'},
+    'img': {'src', 'alt', 'title', 'width', 'height', 'srcset', 'sizes'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'ol': {'start', 'reversed'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_SCHEMES = {'', 'http', 'https', 'mailto'}
+TOC_LEVELS = {'h2': 2, 'h3': 3, 'h4': 4}
+WORDS_PER_MINUTE = 200
+
+
+def is_safe_url(value):
+    try:
+        return urlsplit(value.strip()).scheme.lower() in ALLOWED_SCHEMES
+    except ValueError:
+        return False
+
+
+class ContentRenderer(HTMLParser):
+    """
+    Single pass over a CKEditor HTML fragment that produces allow-listed
+    HTML, its visible text and an outline of its h2-h4 headings (which get
+    `id` anchors in the cleaned HTML).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.toc = []
+        self.open_tags = []
+        self.skipping = 0
+        self.heading = None
+        self.anchors = set()
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+            return
+        if self.skipping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in ALLOWED_TAGS:
+            return
+
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        rendered = ''.join(
+            f' {name}="{escape(value or "", quote=True)}"'
+            for name, value in attrs
+            if name in allowed and (name not in URL_ATTRIBUTES or is_safe_url(value or ''))
+        )
+        if tag in TOC_LEVELS and self.heading is None:
+            # The anchor needs the heading's text, so the tag is completed at its end tag
+            self.heading = {'tag': tag, 'attrs': rendered, 'position': len(self.html), 'text': []}
+            self.html.append(None)
+        else:
+            self.html.append(f'<{tag}{rendered}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skipping = max(self.skipping - 1, 0)
+            return
+        if self.skipping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in self.open_tags:
+            return
+
+        # Close anything left open inside this element
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.html.append(f'</{open_tag}>')
+            if self.heading is not None and open_tag == self.heading['tag']:
+                self.finish_heading()
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.skipping:
+            return
+        self.html.append(escape(data, quote=False))
+        self.text.append(data)
+        if self.heading is not None:
+            self.heading['text'].append(data)
+
+    def finish_heading(self):
+        heading, self.heading = self.heading, None
+        title = WHITESPACE_RE.sub(' ', ''.join(heading['text'])).strip()
+        anchor = base = slugify(title) or 'section'
+        number = 1
+        while anchor in self.anchors:
+            anchor = f'{base}-{number}'
+            number += 1
+        self.anchors.add(anchor)
+
+        self.html[heading['position']] = f'<{heading["tag"]}{heading["attrs"]} id="{anchor}">'
+        if title:
+            self.toc.append({'level': TOC_LEVELS[heading['tag']], 'title': title, 'anchor': anchor})
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.handle_endtag(self.open_tags[-1])
+
+
+def render_rich_text(html):
+    """
+    Return the derived forms of a rich-text fragment: cleaned HTML, plain
+    text, heading outline, word count and reading time in minutes.
+    """
+    renderer = ContentRenderer()
+    renderer.feed(html or '')
+    renderer.close()
+
+    text = WHITESPACE_RE.sub(' ', ''.join(renderer.text)).strip()
+    word_count = len(text.split())
+    return {
+        'rendered_html': ''.join(renderer.html),
+        'plain_text': text,
+        'toc': renderer.toc,
+        'word_count': word_count,
+        'reading_time': math.ceil(word_count / WORDS_PER_MINUTE),
+    }
+
+
+def render_existing_content(apps, schema_editor):
+    Blog = apps.get_model('blogs', 'Blog')
+    for obj in Blog.objects.only('id', 'content').iterator():
+        Blog.objects.filter(pk=obj.pk).update(**render_rich_text(obj.content))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0002_blog_blog_published_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='plain_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Estimated reading time in minutes'),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='rendered_html',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Sanitized HTML with heading anchors'),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='h2-h4 headings as {level, title, anchor}'),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(render_existing_content, migrations.RunPython.noop),
+    ]
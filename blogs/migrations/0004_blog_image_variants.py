@@ -0,0 +1,18 @@
+# Generated by Django 5.2.15 on 2026-10-17 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0003_blog_plain_text_blog_reading_time_blog_rendered_html_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
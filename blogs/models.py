@@ -1,9 +1,12 @@
 from django.db import models
 from django.conf import settings
-from django.utils.text import slugify
 from django_ckeditor_5.fields import CKEditor5Field
 
-class Blog(models.Model):
+from codewithsathya.images import ImageVariantsMixin
+from codewithsathya.richtext import RenderedContentMixin
+from codewithsathya.slugs import UniqueSlugMixin
+
+class Blog(UniqueSlugMixin, RenderedContentMixin, ImageVariantsMixin, models.Model):
     title = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
     description = models.TextField(blank=True, default='', help_text="Short description or summary of the blog")
@@ -22,17 +25,9 @@ class Blog(models.Model):
 
     class Meta:
         ordering = ['-created_at']
-
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            num = 1
-            while Blog.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{num}"
-                num += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+        indexes = [
+            models.Index(fields=['is_published', '-created_at', 'id'], name='blog_published_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -1,18 +1,27 @@
 from rest_framework import serializers
 from blogs.models import Blog
+from codewithsathya.images import SrcsetField
 from users.serializers import UserSerializer
 
 class BlogListSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
+    image_srcset = SrcsetField()
 
     class Meta:
         model = Blog
-        fields = ('id', 'title', 'slug', 'description', 'author', 'image', 'is_published', 'created_at', 'updated_at')
+        fields = (
+            'id', 'title', 'slug', 'description', 'author', 'image', 'image_srcset', 'is_published',
+            'word_count', 'reading_time', 'created_at', 'updated_at'
+        )
 
 
 class BlogDetailSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
+    image_srcset = SrcsetField()
 
     class Meta:
         model = Blog
-        fields = ('id', 'title', 'slug', 'description', 'content', 'author', 'image', 'is_published', 'created_at', 'updated_at')
+        fields = (
+            'id', 'title', 'slug', 'description', 'content', 'rendered_html', 'plain_text', 'toc',
+            'word_count', 'reading_time', 'author', 'image', 'image_srcset', 'is_published', 'created_at', 'updated_at'
+        )
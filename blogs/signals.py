@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from blogs.models import Blog
+from codewithsathya.images import image_variants_built
+from codewithsathya.response_cache import invalidate_tags
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_delete, sender=Blog)
+def blog_responses_changed(sender, instance, **kwargs):
+    invalidate_tags('blogs', f'blog:{instance.pk}')
+
+
+@receiver(image_variants_built, sender=Blog)
+def blog_image_variants_built(sender, pk, **kwargs):
+    invalidate_tags('blogs', f'blog:{pk}')
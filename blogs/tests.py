@@ -1,14 +1,23 @@
+import gzip
+import json
+
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from blogs.models import Blog
+from codewithsathya.response_cache import get_response_cache
+from codewithsathya.testing import LOCAL_CACHES
 
 User = get_user_model()
 
+
+@override_settings(CACHES=LOCAL_CACHES)
 class BlogTests(APITestCase):
 
     def setUp(self):
+        get_response_cache().clear()
         self.user = User.objects.create_user(
             username='author@example.com',
             email='author@example.com',
@@ -47,9 +56,9 @@ class BlogTests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Should only list published blogs (blog1), draft (blog2) should be excluded
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['title'], self.blog1.title)
-        self.assertNotIn('content', response.data[0]) # list serializer shouldn't have content
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['title'], self.blog1.title)
+        self.assertNotIn('content', response.data['results'][0]) # list serializer shouldn't have content
 
     def test_get_blog_by_slug_api(self):
         url = reverse('blogs:blog-detail', kwargs={'slug': self.blog1.slug})
@@ -59,8 +68,129 @@ class BlogTests(APITestCase):
         self.assertEqual(response.data['content'], self.blog1.content)
         self.assertEqual(response.data['author']['email'], self.user.email)
 
+    def test_blog_detail_not_modified_since(self):
+        url = reverse('blogs:blog-detail', kwargs={'slug': self.blog1.slug})
+        response = self.client.get(url)
+        last_modified = response['Last-Modified']
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_publishing_purges_cached_blog_list(self):
+        url = reverse('blogs:blog-list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get(url).data['results']), 1)
+
+        self.blog2.is_published = True
+        self.blog2.save()
+        self.assertEqual(len(self.client.get(url).data['results']), 2)
+
+    def test_derived_content_is_computed_on_save(self):
+        blog = Blog.objects.create(
+            title='Rich post',
+            content=(
+                '<h2>Setup</h2><p onclick="x()">Install <a href="javascript:alert(1)">it</a>'
+                ' <a href="https://example.com">here</a>.</p><script>alert(1)</script>'
+                '<h3>Setup</h3><p>' + 'word ' * 400 + '</p>'
+            ),
+            author=self.user,
+        )
+        self.assertEqual(blog.toc, [
+            {'level': 2, 'title': 'Setup', 'anchor': 'setup'},
+            {'level': 3, 'title': 'Setup', 'anchor': 'setup-1'},
+        ])
+        self.assertTrue(blog.rendered_html.startswith('<h2 id="setup">Setup</h2><p>Install <a>it</a> <a href="https://example.com">here</a>.</p><h3'))
+        self.assertNotIn('alert', blog.rendered_html)
+        self.assertEqual((blog.word_count, blog.reading_time), (405, 3))
+
+        blog.content = '<p>Short now.</p>'
+        blog.save(update_fields=['content'])
+        blog.refresh_from_db()
+        self.assertEqual((blog.plain_text, blog.word_count, blog.toc), ('Short now.', 2, []))
+
+        response = self.client.get(reverse('blogs:blog-detail', kwargs={'slug': blog.slug}))
+        self.assertEqual(response.data['rendered_html'], '<p>Short now.</p>')
+        self.assertEqual(response.data['reading_time'], 1)
+        response = self.client.get(reverse('blogs:blog-list'))
+        self.assertEqual(response.data['results'][0]['word_count'], 2)
+
+    def test_editor_output_survives_sanitizing(self):
+        blog = Blog.objects.create(
+            title='Editor features',
+            content=(
+                '<h1>Intro</h1>'
+                '<p><span style="color:hsl(0, 75%, 60%);background:url(x);width:expression(alert(1))">Red</span></p>'
+                '<figure class="table" style="width:50%"><table><tr><td style="padding:4px">a</td></tr></table></figure>'
+                '<figure class="media"><oembed url="https://www.youtube.com/watch?v=x"></oembed></figure>'
+                '<figure class="media"><oembed url="javascript:alert(1)"></oembed></figure>'
+                '<ul class="todo-list"><li><label><input type="checkbox" checked="checked"><span>Done</span></label></li></ul>'
+                '<input type="text" value="x">'
+            ),
+            author=self.user,
+        )
+        self.assertEqual(blog.toc, [{'level': 1, 'title': 'Intro', 'anchor': 'intro'}])
+        self.assertIn('<span style="color:hsl(0, 75%, 60%)">Red</span>', blog.rendered_html)
+        self.assertIn('<figure class="table" style="width:50%">', blog.rendered_html)
+        self.assertIn('<td style="padding:4px">', blog.rendered_html)
+        self.assertIn('<oembed url="https://www.youtube.com/watch?v=x"></oembed>', blog.rendered_html)
+        self.assertIn('<oembed></oembed>', blog.rendered_html)
+        self.assertIn('<input type="checkbox" checked="checked" disabled="disabled">', blog.rendered_html)
+        self.assertNotIn('url(', blog.rendered_html)
+        self.assertNotIn('expression', blog.rendered_html)
+        self.assertNotIn('type="text"', blog.rendered_html)
+
+    def test_cached_blog_detail_keeps_codings_apart(self):
+        self.blog1.content = '<p>' + 'Serializers render nested data. ' * 100 + '</p>'
+        self.blog1.save()
+        url = reverse('blogs:blog-detail', kwargs={'slug': self.blog1.slug})
+        self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            plain = self.client.get(url)
+        self.assertEqual(compressed['X-Cache'], 'HIT')
+        self.assertEqual(json.loads(gzip.decompress(compressed.content))['slug'], self.blog1.slug)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(plain.data['slug'], self.blog1.slug)
+
     def test_get_draft_blog_by_slug_api(self):
         # Retrieve should fail/not found for drafts since queryset restricts to is_published=True
         url = reverse('blogs:blog-detail', kwargs={'slug': self.blog2.slug})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_blog_list_cursor_pagination(self):
+        for i in range(4):
+            Blog.objects.create(title=f'Paged post {i}', content='<p>Body</p>', author=self.user)
+        expected = list(
+            Blog.objects.filter(is_published=True).order_by('-created_at', 'id').values_list('slug', flat=True)
+        )
+
+        url = reverse('blogs:blog-list') + '?page_size=2'
+        seen = []
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(item['slug'] for item in response.data['results'])
+            pages.append(response.data)
+            url = response.data['next']
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+
+        # Walking back from the last page returns the middle page
+        response = self.client.get(pages[-1]['previous'])
+        self.assertEqual(
+            [item['slug'] for item in response.data['results']],
+            [item['slug'] for item in pages[1]['results']]
+        )
+
+    def test_blog_list_invalid_cursor(self):
+        response = self.client.get(reverse('blogs:blog-list') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,14 +1,29 @@
 from rest_framework import viewsets
 from rest_framework.permissions import AllowAny
 from blogs.models import Blog
+from codewithsathya.compression import PrecompressedMixin
+from codewithsathya.conditional import ConditionalGetMixin
+from codewithsathya.response_cache import ResponseCacheMixin
 from blogs.serializers import BlogListSerializer, BlogDetailSerializer
 
-class BlogViewSet(viewsets.ReadOnlyModelViewSet):
+class BlogViewSet(PrecompressedMixin, ResponseCacheMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Blog.objects.filter(is_published=True)
     lookup_field = 'slug'
+    ordering = ('-created_at', 'id')
     permission_classes = [AllowAny]
+    list_cache_tags = ('blogs',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # List entries carry no article body
+            queryset = queryset.defer('content', 'rendered_html', 'plain_text', 'toc')
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return BlogDetailSerializer
         return BlogListSerializer
+
+    def get_object_cache_tags(self, blog):
+        return (f'blog:{blog.pk}',)
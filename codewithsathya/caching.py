@@ -0,0 +1,21 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+# Backends whose incr()/decr() are a single server-side operation (or, for
+# locmem, run under its lock). The database and file backends read the value
+# and write it back, so concurrent increments overwrite each other.
+ATOMIC_COUNTER_BACKENDS = (RedisCache, BaseMemcachedCache, LocMemCache)
+
+
+def is_process_local(alias):
+    """True if entries in the cache `alias` are invisible to other processes."""
+    return isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
+
+
+def has_atomic_counters(alias):
+    """True if concurrent incr()/decr() calls on the cache `alias` never lose updates."""
+    return isinstance(caches[alias], ATOMIC_COUNTER_BACKENDS)
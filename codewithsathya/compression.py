@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import brotli
+except ImportError:  # optional; gzip alone is always available
+    brotli = None
+
+COMPRESSED_KEY = 'compressed:{}'
+
+
+def available_encodings():
+    """Supported content codings, most preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content)
+    # mtime=0 keeps the output identical for identical content
+    return gzip.compress(content, mtime=0)
+
+
+def negotiate_encoding(request):
+    """Pick the preferred coding the client accepts (q > 0), or None."""
+    accepted = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def get_compressed_cache():
+    return caches[getattr(settings, 'PRECOMPRESSED_CACHE_ALIAS', 'default')]
+
+
+class PrecompressedMixin:
+    """
+    Serves `retrieve` bodies as gzip (and brotli, when installed) that were
+    compressed once per content version. Variants are cached under the
+    response's ETag, so a lookup needs no serializer run and no
+    recompression until the content changes or PRECOMPRESSED_TIMEOUT passes.
+    Only JSON bodies of at least PRECOMPRESSED_MIN_SIZE bytes are compressed.
+    """
+
+    def response_cache_variant(self, request):
+        # Keeps response-cache entries of different codings apart
+        if self.action == 'retrieve':
+            return negotiate_encoding(request) or ''
+        return super().response_cache_variant(request)
+
+    def compressed_keys(self, request, etag):
+        # The ETag covers the content, not the scheme and host of its absolute links
+        source = '|'.join((type(self).__name__, request.accepted_media_type, request.scheme, request.get_host(), etag))
+        digest = hashlib.md5(source.encode('utf-8')).hexdigest()
+        return {encoding: COMPRESSED_KEY.format(f'{digest}:{encoding}') for encoding in available_encodings()}
+
+    def render_detail(self, request, instance, etag):
+        encoding = negotiate_encoding(request)
+        if encoding is None or not etag or not isinstance(request.accepted_renderer, JSONRenderer):
+            return super().render_detail(request, instance, etag)
+
+        cache = get_compressed_cache()
+        keys = self.compressed_keys(request, etag)
+        body = cache.get(keys[encoding])
+        if body is None:
+            response = super().render_detail(request, instance, etag)
+            content = request.accepted_renderer.render(
+                response.data, request.accepted_media_type, self.get_renderer_context()
+            )
+            if len(content) < getattr(settings, 'PRECOMPRESSED_MIN_SIZE', 1024):
+                return response
+
+            variants = {key: compress(content, variant) for variant, key in keys.items()}
+            cache.set_many(variants, timeout=getattr(settings, 'PRECOMPRESSED_TIMEOUT', 300))
+            body = variants[keys[encoding]]
+
+        response = HttpResponse(body, content_type=request.accepted_renderer.media_type)
+        response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
@@ -0,0 +1,108 @@
+import hashlib
+from datetime import datetime
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    source = '|'.join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(source.encode('utf-8')).hexdigest())
+
+
+def latest(*timestamps):
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return max(timestamps) if timestamps else None
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET (ETag / Last-Modified / 304) for read-only viewsets.
+
+    Validators are derived from version stamps on the rows -- never from
+    the serialized body -- so a 304 is answered before any serializer
+    runs. Detail views override `get_object_validators()`; list views are
+    validated by the keys and `list_version_fields` of the rows on the
+    requested page, plus its next/previous links, which change when rows
+    around the page come or go. No query beyond the page's own is made.
+    """
+    list_version_fields = ('updated_at',)
+
+    def get_object_validators(self, obj):
+        """Return `(etag, last_modified)` for a single object."""
+        updated_at = getattr(obj, 'updated_at', None)
+        return self.etag_for(obj.pk, updated_at), updated_at
+
+    @staticmethod
+    def row_version(row, field):
+        # Follows `a__b` paths through related objects loaded with the row
+        value = row
+        for name in field.split('__'):
+            value = getattr(value, name, None)
+            if value is None:
+                break
+        return value
+
+    def get_list_validators(self, rows, links=()):
+        versions = [
+            value for row in rows
+            for value in (row.pk, *(self.row_version(row, field) for field in self.list_version_fields))
+        ]
+        last_modified = latest(*(value for value in versions if isinstance(value, datetime)))
+        etag = self.etag_for(self.request.get_full_path(), *links, *versions)
+        return etag, last_modified
+
+    def etag_for(self, *parts):
+        # The same row renders differently per media type (JSON vs browsable API)
+        return make_etag(type(self).__name__, self.request.accepted_media_type, *parts)
+
+    def not_modified(self, request, etag, last_modified):
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if response is not None:
+            return self.with_validators(response, etag, last_modified)
+        return None
+
+    @staticmethod
+    def with_validators(response, etag, last_modified):
+        if etag:
+            # Content-coded variants of a representation share a weak validator
+            response['ETag'] = f'W/{etag}' if response.has_header('Content-Encoding') else etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        validators = self.get_object_validators(instance)
+        not_modified = self.not_modified(request, *validators)
+        if not_modified is not None:
+            return not_modified
+
+        return self.with_validators(self.render_detail(request, instance, validators[0]), *validators)
+
+    def render_detail(self, request, instance, etag):
+        """Build the 200 response for `retrieve`; `etag` identifies its content version."""
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            rows, links = list(queryset), ()
+        else:
+            rows, links = page, (self.paginator.get_next_link(), self.paginator.get_previous_link())
+
+        validators = self.get_list_validators(rows, links)
+        not_modified = self.not_modified(request, *validators)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = self.get_serializer(rows, many=True)
+        response = Response(serializer.data) if page is None else self.get_paginated_response(serializer.data)
+        return self.with_validators(response, *validators)
@@ -0,0 +1,176 @@
+import logging
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+from jobs.queue import enqueue
+from jobs.registry import task
+
+logger = logging.getLogger(__name__)
+
+# Pillow format name and save options per variant file type
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Sent with `pk` once a row's variants are recorded (the row is updated
+# without post_save, so caches keyed on it need this to refresh)
+image_variants_built = Signal()
+
+
+def variant_widths():
+    return tuple(getattr(settings, 'IMAGE_VARIANT_WIDTHS', (320, 640, 1024)))
+
+
+def variant_name(name, width, extension):
+    stem, _ = os.path.splitext(name)
+    return f'{stem}_w{width}.{extension}'
+
+
+def render_variants(field_file):
+    """
+    Write resized copies of `field_file` next to it and return
+    `{extension: {width: storage name}}`. Only widths smaller than the
+    original are produced.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    formats = {}
+    for width in variant_widths():
+        if width >= image.width:
+            continue
+        height = max(round(image.height * width / image.width), 1)
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for extension, (pillow_format, options) in VARIANT_FORMATS.items():
+            converted = resized
+            if pillow_format == 'JPEG' and resized.mode != 'RGB':
+                converted = resized.convert('RGB')
+            elif resized.mode not in ('RGB', 'RGBA'):
+                converted = resized.convert('RGBA')
+            buffer = BytesIO()
+            converted.save(buffer, pillow_format, **options)
+
+            name = variant_name(field_file.name, width, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            formats.setdefault(extension, {})[str(width)] = storage.save(name, ContentFile(buffer.getvalue()))
+    return formats
+
+
+def delete_variants(storage, variants):
+    for names in variants.get('formats', {}).values():
+        for name in names.values():
+            storage.delete(name)
+
+
+def build_image_variants(model, pk):
+    """
+    Generate the variants of `model` row `pk`'s image and record them. The
+    row is only updated if its image is still the one that was resized.
+    Unreadable images are recorded with no variants, so they are not retried.
+    """
+    obj = model._default_manager.filter(pk=pk).first()
+    if obj is None:
+        return None
+
+    field_file = getattr(obj, obj.image_field)
+    if not field_file:
+        return None
+
+    try:
+        formats = render_variants(field_file)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError, ValueError) as exc:
+        logger.warning("Could not generate variants for %s %s (%s): %s", model.__name__, pk, field_file.name, exc)
+        formats = {}
+
+    variants = {'source': field_file.name, 'formats': formats}
+    changes = {'image_variants': variants}
+    try:
+        model._meta.get_field('updated_at')
+        changes['updated_at'] = timezone.now()
+    except FieldDoesNotExist:
+        pass
+
+    updated = model._default_manager.filter(pk=pk, **{obj.image_field: field_file.name}).update(**changes)
+    if updated:
+        if obj.image_variants.get('source') != field_file.name:
+            delete_variants(field_file.storage, obj.image_variants)
+        image_variants_built.send(sender=model, pk=pk)
+    return variants
+
+
+@task('images.build_variants')
+def build_image_variants_task(model, pk):
+    build_image_variants(apps.get_model(model), pk)
+
+
+def build_image_variants_in_background(model, pk):
+    enqueue(build_image_variants_task, model=model._meta.label, pk=pk)
+
+
+class ImageVariantsMixin(models.Model):
+    """
+    Keeps resized WebP/JPEG copies of `image_field` at IMAGE_VARIANT_WIDTHS.
+    They are generated by a queued job and listed in `image_variants`.
+    """
+    image_field = 'image'
+
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        field_file = getattr(self, self.image_field)
+        name = field_file.name if field_file else ''
+        if name == self.image_variants.get('source', ''):
+            return
+        if not name:
+            delete_variants(field_file.storage, self.image_variants)
+            self.image_variants = {}
+            type(self)._default_manager.filter(pk=self.pk).update(image_variants={})
+            return
+        build_image_variants_in_background(type(self), self.pk)
+
+
+class SrcsetField(serializers.ReadOnlyField):
+    """
+    Renders `image_variants` as `{extension: "url 320w, url 640w, ..."}`,
+    ready for <source srcset="...">.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'image_variants')
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        self.storage = getattr(instance, instance.image_field).storage
+        return super().get_attribute(instance)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        srcset = {}
+        for extension, names in (value or {}).get('formats', {}).items():
+            entries = []
+            for width, name in sorted(names.items(), key=lambda item: int(item[0])):
+                url = self.storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                entries.append(f'{url} {width}w')
+            srcset[extension] = ', '.join(entries)
+        return srcset
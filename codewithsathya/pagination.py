@@ -0,0 +1,150 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite, unique ordering.
+
+    Views declare the ordering as `ordering = ('-created_at', 'id')`. The
+    cursor carries the ordering values of the last (or first) row of the
+    current page, so every page is fetched with a `WHERE (a, b) > (x, y)`
+    style filter on an index instead of an OFFSET.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+        self.model = queryset.model
+
+        reverse, position = self.decode_cursor(request)
+        ordering = self.invert(self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = self.position_of(rows[-1]) if has_next and rows else None
+        self.previous_position = self.position_of(rows[0]) if has_previous and rows else None
+        return rows
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                value = int(request.query_params[self.page_size_query_param])
+                if value > 0:
+                    return min(value, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, view):
+        ordering = tuple(getattr(view, 'ordering', None) or self.ordering)
+        # The last column has to be unique for the cursor to be stable.
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering += ('id',)
+        return ordering
+
+    @staticmethod
+    def invert(ordering):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+    @staticmethod
+    def after(ordering, position):
+        """
+        Build `(f1 > v1) OR (f1 = v1 AND f2 > v2) OR ...`, flipping the
+        comparison for descending columns.
+        """
+        condition = Q()
+        equal_prefix = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal_prefix & Q(**{f'{name}__{lookup}': value})
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+    def position_of(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.ordering]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            raw_position = payload['p']
+            if len(raw_position) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, raw_position)
+            ]
+            return bool(payload.get('r')), position
+        except (TypeError, ValueError, KeyError, binascii.Error, FieldDoesNotExist, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
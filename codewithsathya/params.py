@@ -0,0 +1,11 @@
+def bounded_int(value, default, minimum=None, maximum=None):
+    """Parse a query parameter as an int, falling back to `default` and clamping to the bounds."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    if minimum is not None:
+        value = max(value, minimum)
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
@@ -0,0 +1,137 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+from codewithsathya.conditional import make_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    Return the `(start, end)` byte positions (inclusive) asked for by a
+    single-range `Range` header, None if the header should be ignored, or
+    False if the range cannot be satisfied. Multi-range requests are
+    answered with the whole file, which RFC 9110 allows.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return False
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+def read_chunks(handle, start, length, chunk_size):
+    try:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
+
+
+def sendfile_location(storage, name):
+    """
+    Where the fronting server should read the file from: a URL under
+    MEDIA_SENDFILE_PREFIX (nginx internal location) when one is set,
+    otherwise the absolute path on disk (mod_xsendfile and friends).
+    """
+    prefix = getattr(settings, 'MEDIA_SENDFILE_PREFIX', None)
+    if prefix:
+        return prefix.rstrip('/') + '/' + quote(name)
+    return storage.path(name)
+
+
+def serve_file(request, storage, name, as_attachment=False, filename=None, etag=None, sendfile=True):
+    """
+    Answer GET/HEAD for a stored file with conditional and byte-range
+    support. Bodies are streamed in MEDIA_STREAM_CHUNK_SIZE pieces, or left
+    to the fronting server through MEDIA_SENDFILE_HEADER when that is set
+    and `sendfile` is true (MEDIA_SENDFILE_PREFIX must then map `storage`).
+    """
+    size = storage.size(name)
+    try:
+        modified = int(storage.get_modified_time(name).timestamp())
+    except NotImplementedError:
+        modified = None
+    etag = etag or make_etag(name, size, modified)
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'ETag': etag,
+        'Content-Disposition': content_disposition_header(as_attachment, filename or os.path.basename(name)),
+    }
+    if modified is not None:
+        headers['Last-Modified'] = http_date(modified)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=modified)
+    if not_modified is not None:
+        for header in ('ETag', 'Last-Modified'):
+            if header in headers:
+                not_modified[header] = headers[header]
+        return not_modified
+
+    sendfile_header = getattr(settings, 'MEDIA_SENDFILE_HEADER', None) if sendfile else None
+    if sendfile_header:
+        try:
+            location = sendfile_location(storage, name)
+        except NotImplementedError:
+            # Remote storage: nothing on disk for the fronting server to read
+            pass
+        else:
+            # The fronting server answers Range itself
+            response = HttpResponse(content_type=content_type, headers=headers)
+            response[sendfile_header] = location
+            return response
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range in (etag, headers.get('Last-Modified'))):
+        byte_range = parse_range(range_header, size)
+    if byte_range is False:
+        response = HttpResponse(status=416, content_type=content_type, headers=headers)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    status = 200
+    start, end = 0, size - 1
+    if byte_range:
+        status = 206
+        start, end = byte_range
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    length = end - start + 1 if size else 0
+    headers['Content-Length'] = str(length)
+
+    if request.method == 'HEAD':
+        return HttpResponse(status=status, content_type=content_type, headers=headers)
+
+    chunk_size = getattr(settings, 'MEDIA_STREAM_CHUNK_SIZE', 64 * 1024)
+    chunks = read_chunks(storage.open(name, 'rb'), start, length, chunk_size)
+    return StreamingHttpResponse(chunks, status=status, content_type=content_type, headers=headers)
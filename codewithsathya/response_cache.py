@@ -0,0 +1,263 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.http import HttpResponse
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+RESPONSE_KEY = 'response:{}'
+TAG_KEY = 'response-tag:{}'
+LOCK_KEY = 'response-lock:{}'
+METRIC_KEY = 'response-metric:{}'
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Content-Encoding', 'Vary')
+METRICS = ('hit', 'miss', 'stale', 'coalesced')
+POLL_INTERVAL = 0.02
+
+
+def get_response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def response_cache_key(view_name, action, media_type, url, variant=''):
+    # `url` is absolute: bodies embed links built for the request's scheme and host
+    source = '|'.join((view_name, action, media_type, url, variant))
+    return RESPONSE_KEY.format(hashlib.md5(source.encode('utf-8')).hexdigest())
+
+
+class MetricTally:
+    """
+    This process's response-cache outcomes not yet added to the shared
+    counters. Counting one touches only local memory; the tally is added to
+    the counters in the response cache at most every
+    RESPONSE_CACHE_METRICS_INTERVAL seconds, so cache hits write nothing
+    shared.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, name, cache=None):
+        with self.lock:
+            self.counts[name] += 1
+            if time.monotonic() - self.flushed_at < getattr(settings, 'RESPONSE_CACHE_METRICS_INTERVAL', 60):
+                return
+            counts, self.counts = self.counts, Counter()
+            self.flushed_at = time.monotonic()
+        add_to_metrics(counts, cache)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+
+def add_to_metrics(counts, cache=None):
+    cache = cache or get_response_cache()
+    for name, count in counts.items():
+        key = METRIC_KEY.format(name)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            if not cache.add(key, count, timeout=None):
+                cache.incr(key, count)
+
+
+metric_tally = MetricTally()
+
+
+def record_metric(name, cache=None):
+    metric_tally.record(name, cache)
+
+
+def response_cache_metrics():
+    """
+    Return the hit / miss / stale / coalesced counters of the response
+    cache: every process's flushed tallies plus this process's pending one.
+    """
+    keys = {name: METRIC_KEY.format(name) for name in METRICS}
+    found = get_response_cache().get_many(keys.values())
+    pending = metric_tally.snapshot()
+    return {name: found.get(key, 0) + pending.get(name, 0) for name, key in keys.items()}
+
+
+def tag_versions(tags, cache=None):
+    """
+    Return the current version token of each tag. A tag that has no token
+    yet (or was evicted) gets a fresh one, which invalidates every entry
+    stored under its previous token.
+    """
+    cache = cache or get_response_cache()
+    keys = {tag: TAG_KEY.format(tag) for tag in tags}
+    found = cache.get_many(keys.values())
+
+    versions = {}
+    for tag, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        versions[tag] = version
+    return versions
+
+
+def invalidate_tags(*tags):
+    """
+    Purge every cached response that depends on any of `tags` by moving
+    the tags to new version tokens. Works on any cache backend, since no
+    keys have to be enumerated.
+    """
+    tags = {tag for tag in tags if tag}
+    if not tags:
+        return
+
+    def purge():
+        get_response_cache().set_many({TAG_KEY.format(tag): uuid.uuid4().hex for tag in tags}, timeout=None)
+
+    purge()
+    # Purge again once the write is committed: a read that raced the write
+    # could otherwise re-cache the old rows under the new tokens.
+    transaction.on_commit(purge)
+
+
+class ResponseCacheMixin:
+    """
+    Serves anonymous `list` and `retrieve` responses from the response
+    cache. Each entry records the tags it depends on -- `list_cache_tags`
+    for lists, `get_object_cache_tags()` for the looked-up object -- and is
+    discarded as soon as one of them is invalidated.
+
+    Rebuilds are single-flight: the worker that takes the entry's lock
+    recomputes it, while concurrent requests get the stale entry (for up
+    to RESPONSE_CACHE_STALE_TTL seconds past its expiry) or, when there is
+    nothing to serve, wait for the rebuilt one. Responses carry an
+    `X-Cache` header and the outcome is counted in `response_cache_metrics()`.
+    """
+    list_cache_tags = ()
+    cached_actions = ('list', 'retrieve')
+    _cache_versions = None
+
+    def get_object_cache_tags(self, obj):
+        return ()
+
+    def get_object(self):
+        obj = super().get_object()
+        if self._cache_versions is not None:
+            # Read the tag versions before serializing, so a concurrent
+            # write can only make the stored entry look stale, never fresh.
+            self._cache_versions.update(tag_versions(self.get_object_cache_tags(obj)))
+        return obj
+
+    def response_cache_timeout(self):
+        return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+    def should_cache_response(self, request):
+        return (
+            self.action in self.cached_actions
+            and request.method == 'GET'
+            and not request.user.is_authenticated
+            and bool(self.response_cache_timeout())
+        )
+
+    def get_response_cache_key(self, request):
+        return response_cache_key(
+            type(self).__name__, self.action, request.accepted_media_type, request.build_absolute_uri(),
+            self.response_cache_variant(request),
+        )
+
+    def response_cache_variant(self, request):
+        """Extra request-dependent part of the key, for views whose bodies vary further."""
+        return ''
+
+    @staticmethod
+    def is_fresh(entry, cache):
+        return (
+            entry is not None
+            and entry['expires_at'] > time.time()
+            and tag_versions(entry['tags'], cache) == entry['tags']
+        )
+
+    def cached_response(self, request, build):
+        if not self.should_cache_response(request):
+            return build()
+
+        cache = get_response_cache()
+        key = self.get_response_cache_key(request)
+        entry = cache.get(key)
+        if self.is_fresh(entry, cache):
+            return self.response_from_entry(request, entry, 'hit', cache)
+
+        lock_key = LOCK_KEY.format(key)
+        lock_timeout = getattr(settings, 'RESPONSE_CACHE_LOCK_TIMEOUT', 10)
+        if cache.add(lock_key, True, timeout=lock_timeout):
+            try:
+                return self.rebuild_response(key, build, cache)
+            finally:
+                cache.delete(lock_key)
+
+        # Another worker is already rebuilding this entry
+        if entry is not None:
+            return self.response_from_entry(request, entry, 'stale', cache)
+
+        deadline = time.monotonic() + getattr(settings, 'RESPONSE_CACHE_LOCK_WAIT', 2.0)
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            entry = cache.get(key)
+            if self.is_fresh(entry, cache):
+                return self.response_from_entry(request, entry, 'coalesced', cache)
+            if cache.get(lock_key) is None:
+                break
+        # The rebuild failed, was not cacheable or is taking too long
+        return self.rebuild_response(key, build, cache)
+
+    def rebuild_response(self, key, build, cache):
+        self._cache_versions = tag_versions(self.list_cache_tags, cache) if self.action == 'list' else {}
+        response = build()
+        if response.status_code == 200 and self._cache_versions:
+            timeout = self.response_cache_timeout()
+            entry = {
+                'tags': self._cache_versions,
+                'headers': {header: response[header] for header in CACHED_HEADERS if header in response},
+                'expires_at': time.time() + timeout,
+            }
+            if isinstance(response, Response):
+                entry['data'] = response.data
+            else:
+                # Already rendered, e.g. a precompressed body
+                entry['content'] = response.content
+                entry['content_type'] = response['Content-Type']
+            cache.set(key, entry, timeout=timeout + getattr(settings, 'RESPONSE_CACHE_STALE_TTL', 30))
+        record_metric('miss', cache)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def response_from_entry(self, request, entry, outcome, cache):
+        headers = entry['headers']
+        response = get_conditional_response(
+            request,
+            etag=headers.get('ETag'),
+            last_modified=parse_http_date_safe(headers['Last-Modified']) if 'Last-Modified' in headers else None,
+        )
+        if response is None and 'content' in entry:
+            response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        elif response is None:
+            response = Response(entry['data'])
+        for header, value in headers.items():
+            response[header] = value
+        record_metric(outcome, cache)
+        response['X-Cache'] = outcome.upper()
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(ResponseCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(ResponseCacheMixin, self).retrieve(request, *args, **kwargs))
@@ -49,6 +49,10 @@ INSTALLED_APPS = [
     'users',
     'tutorials',
     'blogs',
+    'search',
+    'uploads',
+    'outbox',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -107,6 +111,26 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Web workers and the run_jobs worker share view counters, throttle buckets,
+# response-cache tags and metrics through these caches, so they must be
+# shared between processes and increment atomically: redis. Keep them out of
+# the database cache, which would turn every read into a write and loses
+# concurrent increments (see codewithsathya.caching).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/0',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -216,6 +240,12 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'EXCEPTION_HANDLER': 'users.exceptions.custom_exception_handler',
+    'DEFAULT_PAGINATION_CLASS': 'codewithsathya.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+    # Client IPs for throttling come from REMOTE_ADDR. Behind reverse proxies,
+    # set this to their number so the address they append to X-Forwarded-For
+    # is used; a client-supplied header is never trusted beyond that.
+    'NUM_PROXIES': 0,
 }
 
 # SimpleJWT Settings
@@ -250,3 +280,128 @@ DEFAULT_FROM_EMAIL = 'noreply@codewithsathya.com'
 # Media Files Settings (for uploads like lesson videos/images)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Lesson view counts are buffered in this cache and written to the database
+# in batches every LESSON_VIEW_FLUSH_INTERVAL seconds by a periodic job (see
+# JOB_SCHEDULE and the flush_lesson_views management command). With a
+# process-local cache (locmem) the job is not scheduled, since it could not see
+# the web workers' counters, and each process flushes its own from requests.
+# A cache without atomic increments (database, files) buffers nothing; each
+# view is then written straight to the lesson row.
+LESSON_VIEW_COUNTER_CACHE = 'default'
+LESSON_VIEW_FLUSH_INTERVAL = 60
+
+# Anonymous reads of the public catalog (courses, blogs, banners) are cached
+# in this cache for RESPONSE_CACHE_TIMEOUT seconds and purged by model signals.
+# Set RESPONSE_CACHE_TIMEOUT to 0 to disable the response cache.
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = 300
+# While one worker rebuilds an expired or purged entry, others are served the
+# stale copy for up to RESPONSE_CACHE_STALE_TTL seconds past its expiry, or
+# wait up to RESPONSE_CACHE_LOCK_WAIT seconds for the rebuilt one.
+RESPONSE_CACHE_STALE_TTL = 30
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+RESPONSE_CACHE_LOCK_WAIT = 2.0
+# Hit / miss counts are tallied per process and added to the shared counters
+# in the response cache at most every RESPONSE_CACHE_METRICS_INTERVAL seconds.
+RESPONSE_CACHE_METRICS_INTERVAL = 60
+
+# Lesson and blog detail bodies are gzip (and brotli, if the brotli package is
+# installed) compressed once per content version and kept in this cache.
+# Lesson view counts inside a cached body refresh after PRECOMPRESSED_TIMEOUT.
+PRECOMPRESSED_CACHE_ALIAS = 'responses'
+PRECOMPRESSED_TIMEOUT = 300
+PRECOMPRESSED_MIN_SIZE = 1024
+
+# Each worker keeps the search autocomplete index in memory. Edits are applied
+# in place and announced through the default cache; popularity (lesson views)
+# is refreshed by a full reload at most every AUTOCOMPLETE_MAX_AGE seconds.
+AUTOCOMPLETE_MAX_AGE = 300
+
+# Course, banner, badge and blog images get resized WebP and JPEG copies at
+# these widths (narrower than the original only), generated by a queued job
+# after the upload is saved.
+IMAGE_VARIANT_WIDTHS = (320, 640, 1024)
+
+# Lesson media is served with byte-range support, streamed in chunks of
+# MEDIA_STREAM_CHUNK_SIZE bytes. Behind nginx set MEDIA_SENDFILE_HEADER to
+# 'X-Accel-Redirect' and MEDIA_SENDFILE_PREFIX to an internal location aliased
+# to MEDIA_ROOT; behind Apache/lighttpd use 'X-Sendfile' without a prefix.
+MEDIA_STREAM_CHUNK_SIZE = 64 * 1024
+MEDIA_SENDFILE_HEADER = None
+MEDIA_SENDFILE_PREFIX = None
+
+# A lesson's attachments can be downloaded as one ZIP, built while it is sent.
+# When set, finished archives are kept in this directory, keyed by the
+# attachments they contain, and reused until an attachment changes.
+ATTACHMENT_BUNDLE_CACHE_DIR = None
+
+# Large lesson media and attachments can be uploaded in resumable chunks of
+# UPLOAD_CHUNK_SIZE bytes. Parts are assembled under UPLOAD_TEMP_DIR (the
+# system temp directory when unset); unfinished uploads idle for longer than
+# UPLOAD_SESSION_TTL seconds are removed by `purge_stale_uploads`.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_SIZE = 10 * 1024 ** 3
+UPLOAD_TEMP_DIR = None
+UPLOAD_SESSION_TTL = 24 * 60 * 60
+
+# Lesson media files and attachments are stored once per distinct content
+# under MEDIA_ROOT/blobs/ and reference-counted. A blob whose last reference
+# goes away is deleted, unless it was uploaded within BLOB_RECLAIM_GRACE
+# seconds; `reconcile_blobs` recounts references and collects those later.
+BLOB_RECLAIM_GRACE = 300
+
+# Emails are queued in the database and sent by the `outbox.drain` job (or
+# `manage.py drain_outbox --loop`) in batches of OUTBOX_BATCH_SIZE over one connection. Failures are retried
+# after OUTBOX_RETRY_BASE * 2^(attempt - 1) seconds (at most OUTBOX_RETRY_MAX)
+# and parked as dead after OUTBOX_MAX_ATTEMPTS. A claimed batch is leased for
+# OUTBOX_LEASE seconds, renewed before each message is sent, after which a
+# crashed worker's messages are retried. Sent messages are deleted by the
+# `outbox.purge_sent` job after OUTBOX_KEEP_SENT seconds.
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE = 30
+OUTBOX_RETRY_MAX = 60 * 60
+OUTBOX_LEASE = 5 * 60
+OUTBOX_KEEP_SENT = 7 * 24 * 60 * 60
+
+# Deferred work runs in `manage.py run_jobs`, a worker with JOBS_WORKER_THREADS
+# threads that claims due jobs from the database with SKIP LOCKED. Failed jobs
+# are retried after JOBS_RETRY_BASE * 2^(attempt - 1) seconds (at most
+# JOBS_RETRY_MAX) up to JOBS_MAX_ATTEMPTS times; jobs running for longer than
+# JOBS_LOCK_TIMEOUT are assumed orphaned and run again. JOB_SCHEDULE maps
+# periodic task names to their interval in seconds.
+JOBS_WORKER_THREADS = 4
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_BASE = 10
+JOBS_RETRY_MAX = 60 * 60
+JOBS_LOCK_TIMEOUT = 15 * 60
+JOBS_KEEP_FINISHED = 7 * 24 * 60 * 60
+JOB_SCHEDULE = {
+    'tutorials.flush_lesson_views': LESSON_VIEW_FLUSH_INTERVAL,
+    'outbox.drain': 30,
+    'outbox.purge_sent': 24 * 60 * 60,
+    'uploads.purge_stale_uploads': 60 * 60,
+    'uploads.reconcile_blobs': 24 * 60 * 60,
+    'jobs.purge_finished': 24 * 60 * 60,
+    'users.sweep_otps': 15 * 60,
+}
+
+# Password-reset OTPs are stored hashed and valid for OTP_TTL seconds. Expired
+# and used codes are deleted by the users.sweep_otps job, OTP_SWEEP_BATCH_SIZE
+# rows per statement.
+OTP_TTL = 10 * 60
+OTP_SWEEP_BATCH_SIZE = 500
+
+# Token buckets for the auth endpoints, per client IP and per submitted email
+# (see codewithsathya.throttling). '10/min' allows a burst of 10 and refills
+# one token every 6 seconds. The buckets live in THROTTLE_CACHE_ALIAS, which
+# must be a cache shared by all workers (see CACHES) for the limits to hold
+# across them.
+THROTTLE_CACHE_ALIAS = 'default'
+THROTTLE_BUCKETS = {
+    'login': {'ip': '30/min', 'email': '10/hour'},
+    'register': {'ip': '10/hour'},
+    'forgot_password': {'ip': '10/hour', 'email': '3/hour'},
+    'reset_password': {'ip': '30/hour', 'email': '10/hour'},
+}
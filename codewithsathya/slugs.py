@@ -0,0 +1,103 @@
+import re
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Room left after the base slug for "-<number>"
+SUFFIX_RESERVE = 11
+
+
+def slug_base(model, source, field='slug'):
+    max_length = model._meta.get_field(field).max_length
+    base = slugify(source or '')
+    if len(base) > max_length - SUFFIX_RESERVE:
+        base = base[:max_length - SUFFIX_RESERVE].rstrip('-')
+    return base or model._meta.model_name
+
+
+def with_suffix(base, number):
+    return base if number == 0 else f"{base}-{number}"
+
+
+def next_free_suffix(model, base, field='slug'):
+    """
+    Return the first suffix number above every slug already taken for
+    `base` ("base", "base-1", "base-2", ...), using a single query.
+    """
+    pattern = re.compile(rf'^{re.escape(base)}(?:-(\d+))?$')
+    taken = model._default_manager.filter(
+        Q(**{field: base}) | Q(**{f'{field}__startswith': f'{base}-'})
+    ).values_list(field, flat=True)
+
+    highest = -1
+    for slug in taken:
+        match = pattern.match(slug)
+        if match:
+            highest = max(highest, int(match.group(1) or 0))
+    return highest + 1
+
+
+def allocate_slugs(model, sources, field='slug'):
+    """
+    Allocate unique slugs for a batch of source strings, issuing one query
+    per distinct base rather than one per collision.
+    """
+    next_suffix = {}
+    slugs = []
+    for source in sources:
+        base = slug_base(model, source, field)
+        if base not in next_suffix:
+            next_suffix[base] = next_free_suffix(model, base, field)
+        slugs.append(with_suffix(base, next_suffix[base]))
+        next_suffix[base] += 1
+    return slugs
+
+
+class UniqueSlugQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self.model.assign_slugs(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class UniqueSlugMixin(models.Model):
+    """
+    Fills a blank `slug` from `slug_source_field` on save and on
+    bulk_create. A concurrent insert that wins the same slug makes save()
+    move on to the next suffix instead of failing.
+    """
+    slug_source_field = 'title'
+    slug_max_attempts = 5
+
+    objects = UniqueSlugQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def assign_slugs(cls, objs):
+        pending = [obj for obj in objs if not obj.slug]
+        slugs = allocate_slugs(cls, [getattr(obj, cls.slug_source_field) for obj in pending])
+        for obj, slug in zip(pending, slugs):
+            obj.slug = slug
+        return objs
+
+    def save(self, *args, **kwargs):
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        base = slug_base(type(self), getattr(self, self.slug_source_field))
+        number = next_free_suffix(type(self), base)
+        for attempt in range(self.slug_max_attempts):
+            self.slug = with_suffix(base, number + attempt)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Most likely a concurrent save took this slug; try the next
+                # suffix without re-querying, since the transaction's snapshot
+                # may not show the competing row yet.
+                if attempt + 1 == self.slug_max_attempts:
+                    self.slug = ''
+                    raise
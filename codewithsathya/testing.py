@@ -0,0 +1,9 @@
+"""Settings shared by the apps' test modules."""
+
+# In-memory stand-ins for the redis caches of CACHES, so tests need no cache
+# server and query counts measure the app's own queries only. A method-level
+# override applies after setUp, so such tests clear these caches themselves.
+LOCAL_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'test-{alias}'}
+    for alias in ('default', 'responses')
+}
@@ -0,0 +1,151 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'5/min' -> (5, 60): a bucket of 5 tokens refilled over 60 seconds."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def get_throttle_cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+
+def normalize_email(value):
+    return value.strip().lower() if isinstance(value, str) else ''
+
+
+# Spends a token from every bucket in KEYS, or from none if any is empty, in
+# one atomic step. ARGV holds the current time, then each bucket's refill
+# interval and period. Returns the seconds to wait, "0" once spent.
+SPEND_SCRIPT = """
+local now = tonumber(ARGV[1])
+local wait = 0
+local spent_until = {}
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[i * 2])
+    local period = tonumber(ARGV[i * 2 + 1])
+    local full_at = tonumber(redis.call('GET', key)) or now
+    spent_until[i] = math.max(full_at, now) + interval
+    if spent_until[i] - now > period then
+        wait = math.max(wait, spent_until[i] - now - period)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, tostring(spent_until[i]), 'PX', math.ceil((spent_until[i] - now) * 1000) + 1000)
+end
+return "0"
+"""
+
+# Serializes spending within this process, for caches without the script
+spend_lock = threading.Lock()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token buckets per client IP and per submitted email, with rates taken
+    from THROTTLE_BUCKETS[view.throttle_scope], e.g.
+    `{'login': {'ip': '20/min', 'email': '5/min'}}`. A request spends one
+    token from each of its buckets and is refused if any is empty, before
+    the view parses a serializer, touches the database or hashes a password.
+
+    A bucket is stored in the cache as the time at which it will be full
+    again (GCRA), so the state is one number per key and every worker
+    sharing the cache sees the same buckets. On redis the buckets are read
+    and spent by one server-side script, so concurrent requests can never
+    spend the same token. Other backends get no atomic read-and-write: a
+    lock serializes the requests of one process, which is exact for the
+    in-memory cache, but concurrent requests in different processes can
+    each spend the same token, raising the rate by up to the number of
+    processes.
+    """
+    cache_format = 'throttle:%(scope)s:%(bucket)s:%(ident)s'
+
+    def get_cache_key(self, scope, bucket, ident):
+        # Hashed: submitted emails may hold spaces or be longer than memcached keys allow
+        digest = hashlib.sha256((ident or '').encode('utf-8')).hexdigest()
+        return self.cache_format % {'scope': scope, 'bucket': bucket, 'ident': digest}
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_idents(self, request):
+        # X-Forwarded-For is only trusted as far as REST_FRAMEWORK['NUM_PROXIES'] allows
+        idents = {'ip': self.get_ident(request)}
+        email = ''
+        if hasattr(request.data, 'get'):
+            # The login view also accepts the email as 'username'
+            email = normalize_email(request.data.get('email') or request.data.get('username'))
+        if email:
+            idents['email'] = email
+        return idents
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        policy = getattr(settings, 'THROTTLE_BUCKETS', {}).get(scope)
+        if not policy:
+            return True
+
+        idents = self.get_idents(request)
+        rates = {
+            self.get_cache_key(scope, bucket, idents[bucket]): parse_rate(rate)
+            for bucket, rate in policy.items()
+            if bucket in idents
+        }
+        cache = get_throttle_cache()
+        if isinstance(cache, RedisCache):
+            wait = self.spend_with_script(cache, rates, time.time())
+        else:
+            with spend_lock:
+                wait = self.spend(cache, rates, time.time())
+
+        if wait:
+            self.wait_seconds = wait
+            return False
+        return True
+
+    @staticmethod
+    def spend_with_script(cache, rates, now):
+        keys = [cache.make_and_validate_key(key) for key in rates]
+        args = [now]
+        for count, period in rates.values():
+            args += [period / count, period]
+        client = cache._cache.get_client(keys[0], write=True)
+        return float(client.eval(SPEND_SCRIPT, len(keys), *keys, *args))
+
+    @staticmethod
+    def spend(cache, rates, now):
+        """Spend a token from each bucket, or none if any is empty; returns the seconds to wait."""
+        full_at = cache.get_many(list(rates))
+        updates = {}
+        wait = 0
+        for key, (count, period) in rates.items():
+            interval = period / count
+            spent_until = max(full_at.get(key, now), now) + interval
+            if spent_until - now > period:
+                wait = max(wait, spent_until - now - period)
+            else:
+                updates[key] = spent_until
+
+        if wait:
+            return wait
+        if updates:
+            cache.set_many(updates, timeout=int(max(updates.values()) - now) + 1)
+        return 0
+
+    def wait(self):
+        # Rounded up: a client retrying after the advertised delay must find a token
+        return math.ceil(self.wait_seconds) if self.wait_seconds else None
@@ -24,6 +24,8 @@ urlpatterns = [
     path('api/users/', include('users.urls')),
     path('api/tutorials/', include('tutorials.urls')),
     path('api/blogs/', include('blogs.urls')),
+    path('api/search/', include('search.urls')),
+    path('api/uploads/', include('uploads.urls')),
     path('ckeditor5/', include('django_ckeditor_5.urls')),
 ]
 
@@ -0,0 +1,65 @@
+import os
+import zipfile
+
+
+class ChunkBuffer:
+    """Write-only, unseekable sink that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def unique_arcname(name, used):
+    arcname = name
+    stem, extension = os.path.splitext(name)
+    number = 2
+    while arcname in used:
+        arcname = f'{stem} ({number}){extension}'
+        number += 1
+    used.add(arcname)
+    return arcname
+
+
+def stream_zip(entries, chunk_size=64 * 1024):
+    """
+    Yield a ZIP archive of `entries` -- `(arcname, date_time, open_file)`
+    tuples, where `open_file()` returns a binary file object -- piece by
+    piece. Members are read `chunk_size` bytes at a time and sizes go in
+    data descriptors, so neither the archive nor any member is held in
+    memory or spooled to disk.
+    """
+    buffer = ChunkBuffer()
+    used = set()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for arcname, date_time, open_file in entries:
+            info = zipfile.ZipInfo(unique_arcname(arcname, used), date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with open_file() as source, archive.open(info, mode='w', force_zip64=True) as member:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    member.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            yield buffer.drain()
+    # Central directory
+    yield buffer.drain()
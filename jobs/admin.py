@@ -0,0 +1,18 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'priority', 'run_at', 'attempts', 'locked_by', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'unique_key')
+    readonly_fields = ('attempts', 'locked_at', 'locked_by', 'last_error', 'created_at', 'finished_at')
+    actions = ['retry']
+
+    @admin.action(description="Run selected jobs again now")
+    def retry(self, request, queryset):
+        updated = queryset.exclude(status='running').update(status='queued', attempts=0, run_at=timezone.now())
+        self.message_user(request, f"{updated} job(s) queued.")
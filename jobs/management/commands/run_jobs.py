@@ -0,0 +1,34 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.queue import run_pending, schedule_periodic_jobs
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued and periodic jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=None, help="Number of worker threads (JOBS_WORKER_THREADS).")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds an idle thread waits before polling again.")
+        parser.add_argument('--once', action='store_true', help="Run the jobs that are due now in this thread, then exit.")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            schedule_periodic_jobs()
+            ran = run_pending()
+            self.stdout.write(f"Ran {ran} job(s).")
+            return
+
+        worker = Worker(
+            threads=options['threads'] or getattr(settings, 'JOBS_WORKER_THREADS', 4),
+            poll_interval=options['poll_interval'],
+        )
+        signal.signal(signal.SIGTERM, lambda *args: worker.stop())
+        self.stdout.write(f"Worker {worker.name} running {worker.threads} thread(s).")
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            worker.stop()
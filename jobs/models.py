@@ -0,0 +1,39 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A unit of deferred work: the registered task `name` called with
+    `kwargs`. Workers claim due jobs highest priority first. Jobs with a
+    `unique_key` are never queued twice; periodic jobs (keys starting with
+    "periodic:") are one row each that is re-queued after every run.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100, help_text="Registered task name")
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    run_at = models.DateTimeField(default=timezone.now, help_text="Earliest time the job may run")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    unique_key = models.CharField(max_length=150, unique=True, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'priority', 'run_at'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
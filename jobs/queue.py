@@ -0,0 +1,146 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import get_task, is_enabled
+
+logger = logging.getLogger(__name__)
+
+PERIODIC_PREFIX = 'periodic:'
+
+
+def enqueue(task, *, priority=0, run_at=None, delay=None, max_attempts=None, unique_key=None, **kwargs):
+    """
+    Queue `task` (a registered function or its name) to be called with
+    `kwargs`. The row is written in the caller's transaction. With a
+    `unique_key`, a job that is still queued or running is left as it is
+    and a finished one is queued again, so repeated calls coalesce.
+    """
+    now = timezone.now()
+    if run_at is None:
+        run_at = now + delay if delay else now
+    fields = {
+        'name': getattr(task, 'task_name', task),
+        'kwargs': kwargs,
+        'priority': priority,
+        'run_at': run_at,
+        'max_attempts': max_attempts or getattr(settings, 'JOBS_MAX_ATTEMPTS', 3),
+    }
+    if unique_key is None:
+        return Job.objects.create(**fields)
+
+    try:
+        job, created = Job.objects.get_or_create(unique_key=unique_key, defaults=fields)
+    except IntegrityError:
+        return Job.objects.get(unique_key=unique_key)
+    if not created and job.status in ('done', 'failed'):
+        Job.objects.filter(pk=job.pk, status=job.status).update(
+            status='queued', attempts=0, last_error='', finished_at=None, **fields
+        )
+    return job
+
+
+def schedule_periodic_jobs():
+    """
+    Make sure every entry of JOB_SCHEDULE (`{task name: interval in
+    seconds}`) has its periodic job, and drop those no longer listed or
+    whose task is disabled.
+    """
+    schedule = getattr(settings, 'JOB_SCHEDULE', {})
+    keys = {f'{PERIODIC_PREFIX}{name}': name for name in schedule if is_enabled(name)}
+    Job.objects.filter(unique_key__startswith=PERIODIC_PREFIX).exclude(unique_key__in=keys).exclude(status='running').delete()
+    existing = set(Job.objects.filter(unique_key__in=keys).values_list('unique_key', flat=True))
+    for key, name in keys.items():
+        if key not in existing:
+            enqueue(name, unique_key=key)
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'JOBS_RETRY_BASE', 10)
+    ceiling = getattr(settings, 'JOBS_RETRY_MAX', 60 * 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), ceiling))
+
+
+def claim_job(worker_id):
+    """
+    Lock the most urgent due job for `worker_id`, skipping rows other
+    workers hold. Jobs left running longer than JOBS_LOCK_TIMEOUT (their
+    worker died) are due again.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'JOBS_LOCK_TIMEOUT', 15 * 60))
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='queued', run_at__lte=now) | Q(status='running', locked_at__lt=stale))
+            .order_by('-priority', 'run_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.locked_at = now
+        job.locked_by = worker_id
+        job.attempts += 1
+        job.save(update_fields=['status', 'locked_at', 'locked_by', 'attempts'])
+    return job
+
+
+def finish(job, error=''):
+    now = timezone.now()
+    job.locked_at = None
+    job.locked_by = ''
+    job.last_error = error
+
+    interval = None
+    if job.unique_key and job.unique_key.startswith(PERIODIC_PREFIX):
+        interval = getattr(settings, 'JOB_SCHEDULE', {}).get(job.name)
+
+    if error and job.attempts < job.max_attempts:
+        job.status = 'queued'
+        job.run_at = now + retry_delay(job.attempts)
+    elif interval:
+        # Periodic jobs never die; a run that keeps failing waits for the next slot
+        job.status = 'queued'
+        job.attempts = 0
+        job.run_at = now + timedelta(seconds=interval)
+    else:
+        job.status = 'failed' if error else 'done'
+        job.finished_at = now
+    job.save(update_fields=['status', 'run_at', 'attempts', 'locked_at', 'locked_by', 'last_error', 'finished_at'])
+
+
+def run_job(job):
+    try:
+        func = get_task(job.name)
+    except KeyError:
+        job.attempts = job.max_attempts
+        finish(job, f"Unknown task '{job.name}'.")
+        return False
+
+    try:
+        func(**job.kwargs)
+    except Exception:
+        logger.exception("Job %s (%s) failed on attempt %s", job.pk, job.name, job.attempts)
+        finish(job, traceback.format_exc())
+        return False
+    finish(job)
+    return True
+
+
+def run_pending(worker_id='inline', limit=None):
+    """Run due jobs in this thread until none are left (or `limit` ran); returns how many ran."""
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim_job(worker_id)
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
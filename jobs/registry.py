@@ -0,0 +1,26 @@
+tasks = {}
+
+
+def task(name, enabled=None):
+    """
+    Register the decorated function as the task `name`. `enabled`, if
+    given, is called before the task is scheduled as a periodic job and
+    returns False when the job must not run in this deployment.
+    """
+    def register(func):
+        if name in tasks and tasks[name] is not func:
+            raise ValueError(f"A task named '{name}' is already registered.")
+        tasks[name] = func
+        func.task_name = name
+        func.task_enabled = enabled
+        return func
+    return register
+
+
+def get_task(name):
+    return tasks[name]
+
+
+def is_enabled(name):
+    enabled = getattr(tasks.get(name), 'task_enabled', None)
+    return enabled is None or enabled()
@@ -0,0 +1,14 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import task
+
+
+@task('jobs.purge_finished')
+def purge_finished_jobs():
+    """Delete finished one-off jobs older than JOBS_KEEP_FINISHED seconds."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOBS_KEEP_FINISHED', 7 * 24 * 60 * 60))
+    return Job.objects.filter(status__in=('done', 'failed'), finished_at__lt=cutoff).delete()[0]
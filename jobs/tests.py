@@ -0,0 +1,117 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim_job, enqueue, run_pending, schedule_periodic_jobs
+from jobs.registry import task
+from outbox.mail import enqueue_email
+
+calls = []
+
+
+@task('jobs.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('jobs.tests.explode')
+def explode():
+    raise RuntimeError("boom")
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=3, JOBS_RETRY_BASE=10, JOB_SCHEDULE={})
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_due_jobs_run_by_priority(self):
+        enqueue(record, value='low')
+        enqueue(record, value='high', priority=5)
+        enqueue('jobs.tests.record', value='later', delay=timedelta(minutes=5))
+
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertEqual(Job.objects.filter(status='done').count(), 2)
+        self.assertEqual(Job.objects.get(status='queued').kwargs, {'value': 'later'})
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        job = enqueue(explode)
+        with self.assertLogs('jobs.queue', level='ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn("RuntimeError: boom", job.last_error)
+        self.assertAlmostEqual((job.run_at - timezone.now()).total_seconds(), 10, delta=2)
+
+        for expected in ('queued', 'failed'):
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            with self.assertLogs('jobs.queue', level='ERROR'):
+                run_pending()
+            job.refresh_from_db()
+            self.assertEqual(job.status, expected)
+        self.assertEqual(job.attempts, 3)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_unknown_task_fails_at_once(self):
+        job = enqueue('jobs.tests.missing')
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.last_error, "Unknown task 'jobs.tests.missing'.")
+
+    def test_unique_jobs_coalesce(self):
+        first = enqueue(record, value=1, unique_key='once')
+        second = enqueue(record, value=2, unique_key='once')
+        self.assertEqual(first.pk, second.pk)
+        run_pending()
+        self.assertEqual(calls, [1])
+
+        # A finished job is queued again with the new arguments
+        enqueue(record, value=3, unique_key='once')
+        run_pending()
+        self.assertEqual(calls, [1, 3])
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_orphaned_running_job_is_reclaimed(self):
+        job = enqueue(record, value='again')
+        self.assertEqual(claim_job('dead-worker').pk, job.pk)
+        self.assertIsNone(claim_job('other-worker'))
+
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(run_pending('other-worker'), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('done', 2))
+
+    def test_periodic_jobs_are_rescheduled(self):
+        with self.settings(JOB_SCHEDULE={'jobs.tests.record': 60, 'jobs.tests.explode': 30}):
+            schedule_periodic_jobs()
+            schedule_periodic_jobs()
+            self.assertEqual(Job.objects.count(), 2)
+
+            Job.objects.filter(name='jobs.tests.record').update(kwargs={'value': 'tick'})
+            with self.assertLogs('jobs.queue', level='ERROR'):
+                run_pending()
+            self.assertEqual(calls, ['tick'])
+            ticker = Job.objects.get(name='jobs.tests.record')
+            self.assertEqual(ticker.status, 'queued')
+            self.assertAlmostEqual((ticker.run_at - timezone.now()).total_seconds(), 60, delta=2)
+
+        with self.settings(JOB_SCHEDULE={'jobs.tests.record': 60}):
+            schedule_periodic_jobs()
+            self.assertEqual(list(Job.objects.values_list('name', flat=True)), ['jobs.tests.record'])
+
+    def test_outbox_email_is_sent_by_worker(self):
+        enqueue_email("Welcome", "Body", ["a@example.com"])
+        enqueue_email("Receipt", "Body", ["a@example.com"])
+        self.assertEqual(Job.objects.filter(name='outbox.drain').count(), 1)
+
+        out = StringIO()
+        call_command('run_jobs', '--once', stdout=out)
+        self.assertIn("Ran 1 job(s).", out.getvalue())
+        self.assertEqual([message.subject for message in mail.outbox], ["Welcome", "Receipt"])
@@ -0,0 +1,60 @@
+import logging
+import os
+import socket
+import threading
+
+from django.db import close_old_connections
+
+from jobs.queue import claim_job, run_job, schedule_periodic_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Runs jobs on `threads` threads, each with its own database connection.
+    Idle threads poll every `poll_interval` seconds; periodic jobs are
+    re-checked every `schedule_interval` seconds.
+    """
+
+    def __init__(self, threads=4, poll_interval=1.0, schedule_interval=60.0):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.schedule_interval = schedule_interval
+        self.stopping = threading.Event()
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+
+    def work(self, worker_id):
+        while not self.stopping.is_set():
+            close_old_connections()
+            try:
+                job = claim_job(worker_id)
+                if job is not None:
+                    run_job(job)
+            except Exception:
+                logger.exception("Worker %s could not claim or finish a job", worker_id)
+                job = None
+            finally:
+                close_old_connections()
+            if job is None:
+                self.stopping.wait(self.poll_interval)
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self.work, args=(f'{self.name}:{index}',), name=f'job-worker-{index}', daemon=True)
+            for index in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while not self.stopping.is_set():
+                schedule_periodic_jobs()
+                close_old_connections()
+                self.stopping.wait(self.schedule_interval)
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join()
+
+    def stop(self):
+        self.stopping.set()
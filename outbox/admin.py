@@ -0,0 +1,25 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from outbox.models import OutgoingEmail
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'expires_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'to')
+    readonly_fields = ('attempts', 'last_error', 'created_at', 'sent_at')
+    actions = ['retry']
+
+    def recipients(self, obj):
+        return ', '.join(obj.to)
+
+    @admin.action(description="Retry selected emails now")
+    def retry(self, request, queryset):
+        now = timezone.now()
+        # Expired messages (such as one-time codes) are never resent
+        updated = queryset.exclude(status='sent').exclude(expires_at__lte=now).update(
+            status='pending', attempts=0, next_attempt_at=now
+        )
+        self.message_user(request, f"{updated} email(s) queued for another attempt.")
@@ -0,0 +1,168 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from jobs.queue import enqueue
+from outbox.models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(subject, body, to, from_email=None, expires_at=None, redact=False):
+    """
+    Queue an email and wake the outbox drain job. Both rows are written in
+    the caller's transaction, so a rolled-back request sends nothing. A
+    message still unsent at `expires_at` is dropped; with `redact` its body
+    is cleared once sent.
+    """
+    message = OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        expires_at=expires_at,
+        redact_after_send=redact,
+    )
+    enqueue('outbox.drain', unique_key='outbox.drain', priority=10)
+    return message
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'OUTBOX_RETRY_BASE', 30)
+    ceiling = getattr(settings, 'OUTBOX_RETRY_MAX', 60 * 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), ceiling))
+
+
+def lease_duration():
+    return timedelta(seconds=getattr(settings, 'OUTBOX_LEASE', 5 * 60))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to `batch_size` due messages to this worker by pushing their
+    next attempt OUTBOX_LEASE seconds out. Rows locked by another worker are
+    skipped; a worker that dies mid-batch leaves its rows to be retried when
+    the lease runs out.
+    """
+    now = timezone.now()
+    leased_until = now + lease_duration()
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            OutgoingEmail.objects.filter(pk__in=[message.pk for message in batch]).update(next_attempt_at=leased_until)
+    for message in batch:
+        message.next_attempt_at = leased_until
+    return batch
+
+
+def renew_lease(message):
+    """
+    Push the message's lease OUTBOX_LEASE seconds out from now, just before
+    it is sent, so a batch over a slow server never outlives its lease.
+    Returns False if the lease was lost: the row is no longer pending under
+    this worker's lease, because it ran out and another worker claimed the
+    message, or because the message was deleted.
+    """
+    leased_until = timezone.now() + lease_duration()
+    renewed = OutgoingEmail.objects.filter(
+        pk=message.pk, status='pending', next_attempt_at=message.next_attempt_at,
+    ).update(next_attempt_at=leased_until)
+    message.next_attempt_at = leased_until
+    return bool(renewed)
+
+
+def discard_expired_emails():
+    """Delete unsent messages past their expiry; returns how many."""
+    return OutgoingEmail.objects.exclude(status='sent').filter(expires_at__lte=timezone.now()).delete()[0]
+
+
+def update_message(message, **fields):
+    # update() rather than save(): the row may have been deleted mid-send,
+    # e.g. the one-time code it carried was used or replaced
+    OutgoingEmail.objects.filter(pk=message.pk).update(**fields)
+
+
+def record_failure(message, error):
+    message.attempts += 1
+    message.last_error = error
+    if message.attempts >= getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5):
+        message.status = 'dead'
+        logger.error("Giving up on outgoing email %s after %s attempts: %s", message.pk, message.attempts, error)
+    else:
+        message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+    update_message(
+        message, attempts=message.attempts, last_error=error, status=message.status,
+        next_attempt_at=message.next_attempt_at,
+    )
+
+
+def drain_outbox(batch_size=None, connection=None):
+    """
+    Send one batch of due messages over a single mail connection and
+    return `(sent, failed)`.
+    """
+    batch = claim_batch(batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 50))
+    if not batch:
+        return 0, 0
+
+    connection = connection or get_connection()
+    sent = failed = 0
+    try:
+        connection.open()
+    except Exception as exc:
+        # Nothing in the batch can go out; each message counts an attempt
+        for message in batch:
+            record_failure(message, f"Could not connect: {exc}")
+        return 0, len(batch)
+
+    try:
+        for message in batch:
+            if not renew_lease(message):
+                continue
+            email = EmailMessage(message.subject, message.body, message.from_email, message.to, connection=connection)
+            try:
+                email.send()
+            except Exception as exc:
+                record_failure(message, str(exc))
+                failed += 1
+                # The connection may be the problem; start the next message on a fresh one
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    pass
+                continue
+            message.status = 'sent'
+            message.attempts += 1
+            message.sent_at = timezone.now()
+            message.last_error = ''
+            fields = {'status': 'sent', 'attempts': message.attempts, 'sent_at': message.sent_at, 'last_error': ''}
+            if message.redact_after_send:
+                message.body = fields['body'] = ''
+            update_message(message, **fields)
+            sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def drain_all(batch_size=None, connection=None):
+    """Drop expired messages, then drain batches until nothing is due; returns the totals."""
+    discard_expired_emails()
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = drain_outbox(batch_size, connection)
+        total_sent += sent
+        total_failed += failed
+        if not sent and not failed:
+            return total_sent, total_failed
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from outbox.mail import drain_all
+
+
+class Command(BaseCommand):
+    help = "Send queued emails in batches over one mail connection per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--loop', action='store_true', help="Keep polling the outbox instead of exiting when it is empty.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to wait between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = drain_all(options['batch_size'])
+            if sent or failed or not options['loop']:
+                self.stdout.write(f"Sent {sent} email(s), {failed} failed.")
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
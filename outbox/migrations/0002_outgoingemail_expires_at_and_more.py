@@ -0,0 +1,23 @@
+# Generated by Django 5.2.15 on 2026-10-17 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, help_text='Never sent after this time, e.g. for one-time codes', null=True),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='redact_after_send',
+            field=models.BooleanField(default=False, help_text='Clear the body once sent; set for bodies carrying secrets'),
+        ),
+    ]
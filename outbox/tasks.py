@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.registry import task
+from outbox.mail import drain_all
+from outbox.models import OutgoingEmail
+
+
+@task('outbox.drain')
+def drain_outbox_task():
+    return drain_all()
+
+
+@task('outbox.purge_sent')
+def purge_sent_emails():
+    """Delete messages sent more than OUTBOX_KEEP_SENT seconds ago."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'OUTBOX_KEEP_SENT', 7 * 24 * 60 * 60))
+    return OutgoingEmail.objects.filter(status='sent', sent_at__lt=cutoff).delete()[0]
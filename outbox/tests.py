@@ -0,0 +1,166 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPServerDisconnected
+from unittest import mock
+
+from django.contrib.admin import AdminSite
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from outbox.admin import OutgoingEmailAdmin
+from outbox.mail import drain_all, drain_outbox, enqueue_email
+from outbox.models import OutgoingEmail
+from outbox.tasks import purge_sent_emails
+
+
+class FlakyBackend(EmailBackend):
+    """Locmem backend that refuses the listed recipients and counts connections."""
+    opened = 0
+
+    def __init__(self, *args, refuse=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.refuse = set(refuse)
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.refuse & set(message.to):
+                raise SMTPServerDisconnected("Connection unexpectedly closed")
+        return super().send_messages(messages)
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_BASE=10, OUTBOX_RETRY_MAX=15)
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        FlakyBackend.opened = 0
+
+    def test_enqueue_does_not_send(self):
+        message = enqueue_email("Hello", "Body", ["a@example.com"])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(message.status, 'pending')
+        self.assertEqual(message.from_email, 'noreply@codewithsathya.com')
+
+    def test_batch_shares_one_connection(self):
+        for index in range(5):
+            enqueue_email(f"Message {index}", "Body", [f"user{index}@example.com"])
+
+        self.assertEqual(drain_outbox(batch_size=3, connection=FlakyBackend()), (3, 0))
+        self.assertEqual(FlakyBackend.opened, 1)
+        self.assertEqual(drain_all(connection=FlakyBackend()), (2, 0))
+        self.assertEqual([message.subject for message in mail.outbox], [f"Message {index}" for index in range(5)])
+        self.assertFalse(OutgoingEmail.objects.exclude(status='sent').exists())
+
+    def test_failures_back_off_then_dead_letter(self):
+        good = enqueue_email("Good", "Body", ["ok@example.com"])
+        bad = enqueue_email("Bad", "Body", ["bounce@example.com"])
+
+        self.assertEqual(drain_outbox(connection=FlakyBackend(refuse=["bounce@example.com"])), (1, 1))
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), ('pending', 1))
+        self.assertIn("Connection unexpectedly closed", bad.last_error)
+        self.assertAlmostEqual((bad.next_attempt_at - timezone.now()).total_seconds(), 10, delta=2)
+        # Not due yet
+        self.assertEqual(drain_outbox(connection=FlakyBackend(refuse=["bounce@example.com"])), (0, 0))
+
+        OutgoingEmail.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+        drain_outbox(connection=FlakyBackend(refuse=["bounce@example.com"]))
+        bad.refresh_from_db()
+        # 10 * 2 capped at OUTBOX_RETRY_MAX
+        self.assertAlmostEqual((bad.next_attempt_at - timezone.now()).total_seconds(), 15, delta=2)
+
+        OutgoingEmail.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+        with self.assertLogs('outbox.mail', level='ERROR'):
+            drain_outbox(connection=FlakyBackend(refuse=["bounce@example.com"]))
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), ('dead', 3))
+
+        good.refresh_from_db()
+        self.assertEqual((good.status, good.attempts), ('sent', 1))
+        self.assertIsNotNone(good.sent_at)
+
+    def test_expired_messages_are_dropped_unsent(self):
+        message = enqueue_email("Code", "123456", ["a@example.com"], expires_at=timezone.now() + timedelta(minutes=5))
+        OutgoingEmail.objects.filter(pk=message.pk).update(status='dead', expires_at=timezone.now())
+
+        # Retrying from the admin leaves expired messages alone
+        admin = OutgoingEmailAdmin(OutgoingEmail, AdminSite())
+        with mock.patch.object(admin, 'message_user'):
+            admin.retry(None, OutgoingEmail.objects.all())
+        self.assertEqual(OutgoingEmail.objects.get(pk=message.pk).status, 'dead')
+
+        self.assertEqual(drain_all(connection=FlakyBackend()), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_redacted_body_is_cleared_once_sent(self):
+        message = enqueue_email("Code", "Your code is 123456", ["a@example.com"], redact=True)
+        drain_outbox(connection=FlakyBackend())
+        self.assertEqual(mail.outbox[0].body, "Your code is 123456")
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.body), ('sent', ''))
+
+    def test_connection_failure_counts_an_attempt(self):
+        message = enqueue_email("Hello", "Body", ["a@example.com"])
+        connection = FlakyBackend()
+        with mock.patch.object(connection, 'open', side_effect=ConnectionRefusedError("refused")):
+            self.assertEqual(drain_outbox(connection=connection), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 1)
+        self.assertIn("Could not connect", message.last_error)
+
+    def test_claimed_batch_is_leased(self):
+        message = enqueue_email("Hello", "Body", ["a@example.com"])
+        with mock.patch('outbox.mail.EmailMessage.send', side_effect=KeyboardInterrupt):
+            # The worker dies mid-batch
+            with self.assertRaises(KeyboardInterrupt):
+                drain_outbox(connection=FlakyBackend())
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 0)
+        self.assertGreater(message.next_attempt_at, timezone.now() + timedelta(minutes=4))
+        self.assertEqual(drain_outbox(connection=FlakyBackend()), (0, 0))
+
+        # Once the lease runs out another worker picks it up
+        OutgoingEmail.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+        out = StringIO()
+        call_command('drain_outbox', stdout=out)
+        self.assertIn("Sent 1 email(s), 0 failed.", out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_lease_is_renewed_before_each_message(self):
+        first = enqueue_email("First", "Body", ["a@example.com"])
+        second = enqueue_email("Second", "Body", ["b@example.com"])
+        taken_over_until = timezone.now() + timedelta(minutes=5)
+        leases = []
+
+        class SlowBackend(FlakyBackend):
+            def send_messages(self, messages):
+                leases.append(OutgoingEmail.objects.get(pk=first.pk).next_attempt_at)
+                # The first send outlives the batch's lease and another worker
+                # claims the second message
+                OutgoingEmail.objects.filter(pk=second.pk).update(next_attempt_at=taken_over_until)
+                return super().send_messages(messages)
+
+        with override_settings(OUTBOX_LEASE=60):
+            self.assertEqual(drain_outbox(connection=SlowBackend()), (1, 0))
+        self.assertAlmostEqual((leases[0] - timezone.now()).total_seconds(), 60, delta=5)
+        self.assertEqual([message.subject for message in mail.outbox], ["First"])
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.attempts, second.next_attempt_at), ('pending', 0, taken_over_until))
+
+    def test_old_sent_messages_are_purged(self):
+        old = enqueue_email("Old", "Body", ["a@example.com"])
+        recent = enqueue_email("Recent", "Body", ["b@example.com"])
+        unsent = enqueue_email("Unsent", "Body", ["c@example.com"])
+        OutgoingEmail.objects.filter(pk=old.pk).update(status='sent', sent_at=timezone.now() - timedelta(days=8))
+        OutgoingEmail.objects.filter(pk=recent.pk).update(status='sent', sent_at=timezone.now() - timedelta(days=1))
+        OutgoingEmail.objects.filter(pk=unsent.pk).update(created_at=timezone.now() - timedelta(days=30))
+
+        self.assertEqual(purge_sent_emails(), 1)
+        self.assertEqual(set(OutgoingEmail.objects.values_list('subject', flat=True)), {"Recent", "Unsent"})
@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from search.models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ('title', 'kind', 'object_id', 'length', 'indexed_at')
+    list_filter = ('kind',)
+    search_fields = ('title',)
+    readonly_fields = ('kind', 'object_id', 'title', 'slug', 'body', 'length', 'checksum', 'indexed_at')
@@ -0,0 +1,38 @@
+import re
+import unicodedata
+from collections import Counter
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERM_LENGTH = 64
+# Matches in the title count this many times as much as matches in the body
+TITLE_WEIGHT = 3
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have how i in into is it its of on or that the their
+this to was what when where which who why will with you your
+""".split())
+
+
+def fold(text):
+    """
+    Case- and accent-fold `text` ('Café' -> 'cafe', 'Straße' -> 'strasse'),
+    so terms the database collation treats as equal are equal here too.
+    """
+    decomposed = unicodedata.normalize('NFKD', (text or '').casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    """Split text into folded terms, dropping stop words."""
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(fold(text))
+        if token not in STOP_WORDS
+    ]
+
+
+def term_frequencies(title, body):
+    frequencies = Counter(tokenize(body))
+    for term in tokenize(title):
+        frequencies[term] += TITLE_WEIGHT
+    return frequencies
@@ -0,0 +1,188 @@
+import bisect
+import re
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from blogs.models import Blog
+from search.analysis import fold
+from tutorials.models import Course, Lesson
+
+VERSION_KEY = 'autocomplete:version'
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+# One rating counts as much as this many lesson views
+RATING_WEIGHT = 10
+
+
+def normalize(text):
+    # Folded like search terms, so "cafe" finds "Café"
+    return ' '.join(fold(text).split())
+
+
+class Suggestion:
+    __slots__ = ('kind', 'id', 'slug', 'title', 'popularity', 'normalized', 'keys')
+
+    def __init__(self, kind, id, slug, title, popularity=0):
+        self.kind = kind
+        self.id = id
+        self.slug = slug
+        self.title = title
+        self.popularity = popularity
+        # Every word of the title starts a key, so "jwt" finds "Implementing JWT"
+        self.normalized = normalize(title)
+        self.keys = [self.normalized[match.start():] for match in WORD_RE.finditer(self.normalized)]
+
+    def as_dict(self):
+        return {'type': self.kind, 'id': self.id, 'slug': self.slug, 'title': self.title}
+
+
+def load_suggestions():
+    """Read every title with its popularity in three queries."""
+    for pk, slug, title, ratings in Course.objects.values_list('id', 'slug', 'title', 'rating_summary__rating_count'):
+        yield Suggestion('course', pk, slug, title, (ratings or 0) * RATING_WEIGHT)
+    for pk, slug, title, views, ratings in Lesson.objects.values_list(
+        'id', 'slug', 'title', 'views', 'rating_summary__rating_count'
+    ):
+        yield Suggestion('lesson', pk, slug, title, views + (ratings or 0) * RATING_WEIGHT)
+    for pk, slug, title in Blog.objects.filter(is_published=True).values_list('id', 'slug', 'title'):
+        yield Suggestion('blog', pk, slug, title)
+
+
+def rating_count(obj):
+    summary = getattr(obj, 'rating_summary', None)
+    return summary.rating_count if summary else 0
+
+
+def suggestion_for(obj):
+    """Build the suggestion for a saved object, or None if it should not be listed."""
+    if isinstance(obj, Course):
+        return Suggestion('course', obj.pk, obj.slug, obj.title, rating_count(obj) * RATING_WEIGHT)
+    if isinstance(obj, Lesson):
+        return Suggestion('lesson', obj.pk, obj.slug, obj.title, obj.views + rating_count(obj) * RATING_WEIGHT)
+    if isinstance(obj, Blog) and obj.is_published:
+        return Suggestion('blog', obj.pk, obj.slug, obj.title)
+    return None
+
+
+class AutocompleteIndex:
+    """
+    Process-local prefix index: a sorted array of `(key, kind, id)` tuples
+    searched with bisect. Saves in this process patch the array in place;
+    other processes notice the shared version stamp has moved and reload.
+    Popularity (lesson views in particular) is refreshed by a full reload
+    at most every AUTOCOMPLETE_MAX_AGE seconds.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.suggestions = {}
+        self.version = None
+        self.built_at = 0.0
+        self.lock = threading.RLock()
+
+    def reload(self):
+        with self.lock:
+            version = self.current_version()
+            self.suggestions = {(s.kind, s.id): s for s in load_suggestions()}
+            self.entries = sorted(
+                (key, s.kind, s.id) for s in self.suggestions.values() for key in s.keys
+            )
+            self.version = version
+            self.built_at = time.monotonic()
+
+    @staticmethod
+    def current_version():
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(VERSION_KEY, version, timeout=None):
+                version = cache.get(VERSION_KEY, version)
+        return version
+
+    def ensure_current(self):
+        max_age = getattr(settings, 'AUTOCOMPLETE_MAX_AGE', 300)
+        if self.version != self.current_version() or time.monotonic() - self.built_at > max_age:
+            self.reload()
+
+    def lookup(self, prefix, limit=10, kind=None):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self.ensure_current()
+
+        matches = {}
+        with self.lock:
+            index = bisect.bisect_left(self.entries, (prefix,))
+            while index < len(self.entries) and self.entries[index][0].startswith(prefix):
+                _, entry_kind, pk = self.entries[index]
+                if kind is None or entry_kind == kind:
+                    suggestion = self.suggestions[(entry_kind, pk)]
+                    matches[(entry_kind, pk)] = suggestion
+                index += 1
+
+        # Titles that start with the prefix first, then the most popular
+        ranked = sorted(matches.values(), key=lambda s: (
+            not s.normalized.startswith(prefix), -s.popularity, s.normalized,
+        ))
+        return ranked[:limit]
+
+    def remove(self, kind, pk):
+        with self.lock:
+            suggestion = self.suggestions.pop((kind, pk), None)
+            if suggestion is None:
+                return
+            for key in suggestion.keys:
+                index = bisect.bisect_left(self.entries, (key, kind, pk))
+                if index < len(self.entries) and self.entries[index] == (key, kind, pk):
+                    del self.entries[index]
+
+    def add(self, suggestion):
+        with self.lock:
+            self.remove(suggestion.kind, suggestion.id)
+            self.suggestions[(suggestion.kind, suggestion.id)] = suggestion
+            for key in suggestion.keys:
+                bisect.insort(self.entries, (key, suggestion.kind, suggestion.id))
+
+    def publish_change(self, apply):
+        """
+        Move the shared version stamp so other processes reload, and apply
+        the change to this process's copy -- unless it is already behind,
+        in which case its next lookup reloads anyway.
+        """
+        with self.lock:
+            in_step = self.version is not None and self.version == self.current_version()
+            version = uuid.uuid4().hex
+            cache.set(VERSION_KEY, version, timeout=None)
+            if in_step:
+                apply()
+                self.version = version
+
+
+index = AutocompleteIndex()
+
+
+def object_saved(obj):
+    kind, pk, suggestion = obj._meta.model_name, obj.pk, suggestion_for(obj)
+
+    def apply():
+        if suggestion is None:
+            index.remove(kind, pk)
+        else:
+            index.add(suggestion)
+
+    # Published once the save is committed; a rolled-back save must not
+    # leave other processes reloading, or this one suggesting, a phantom title
+    transaction.on_commit(lambda: index.publish_change(apply))
+
+
+def object_deleted(obj):
+    kind, pk = obj._meta.model_name, obj.pk
+    transaction.on_commit(lambda: index.publish_change(lambda: index.remove(kind, pk)))
+
+
+def autocomplete(prefix, limit=10, kind=None):
+    return [suggestion.as_dict() for suggestion in index.lookup(prefix, limit=limit, kind=kind)]
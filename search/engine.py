@@ -0,0 +1,72 @@
+import math
+
+from django.db.models import Avg, Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+
+from search.analysis import tokenize
+from search.models import Posting, SearchDocument
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+SNIPPET_WORDS = 30
+
+
+def search(query, kind=None, limit=20, offset=0):
+    """
+    Rank documents against `query` with BM25 over the posting lists of
+    its terms. Returns `(total_matches, [(document, score), ...])` for the
+    requested window. Scores are summed in the database, so only the
+    window's documents are loaded; four queries whatever the corpus size.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return 0, []
+
+    documents = SearchDocument.objects.all()
+    postings = Posting.objects.filter(term__in=terms)
+    if kind:
+        documents = documents.filter(kind=kind)
+        postings = postings.filter(document__kind=kind)
+
+    stats = documents.aggregate(count=Count('id'), average_length=Avg('length'))
+    if not stats['count']:
+        return 0, []
+    average_length = stats['average_length'] or 1
+
+    idf = {
+        term: math.log(1 + (stats['count'] - matches + 0.5) / (matches + 0.5))
+        for term, matches in postings.values_list('term').annotate(matches=Count('id')).order_by()
+    }
+    if not idf:
+        return 0, []
+
+    frequency = Cast('postings__frequency', FloatField())
+    term_idf = Case(*[When(postings__term=term, then=Value(weight)) for term, weight in idf.items()], output_field=FloatField())
+    norm = Value(K1 * (1 - B)) + Cast(F('length'), FloatField()) * Value(K1 * B / average_length)
+    matching = documents.filter(postings__term__in=terms)
+
+    # Ties go to the older document so pages are stable
+    ranked = (
+        matching.annotate(score=Sum(term_idf * frequency * Value(K1 + 1) / (frequency + norm)))
+        .order_by('-score', 'id')[offset:offset + limit]
+    )
+    return matching.values('id').distinct().count(), [(document, document.score) for document in ranked]
+
+
+def snippet(body, query, words=SNIPPET_WORDS):
+    """Cut a window of `words` words from `body` around the first query term."""
+    tokens = body.split()
+    terms = set(tokenize(query))
+    start = 0
+    for index, token in enumerate(tokens):
+        if terms.intersection(tokenize(token)):
+            start = max(index - words // 4, 0)
+            break
+
+    text = ' '.join(tokens[start:start + words])
+    if start > 0:
+        text = '… ' + text
+    if start + words < len(tokens):
+        text += ' …'
+    return text
@@ -0,0 +1,81 @@
+import hashlib
+
+from django.db import transaction
+
+from blogs.models import Blog
+from search.analysis import term_frequencies
+from search.models import Posting, SearchDocument
+from tutorials.models import Course, Lesson
+
+
+def course_text(course):
+    return course.description
+
+
+def lesson_text(lesson):
+    return lesson.plain_text
+
+
+def blog_text(blog):
+    return ' '.join(part for part in (blog.description, blog.plain_text) if part)
+
+
+# kind -> (model, queryset of indexable rows, plain-text extractor)
+SOURCES = {
+    'course': (Course, Course.objects.all, course_text),
+    'lesson': (Lesson, Lesson.objects.all, lesson_text),
+    'blog': (Blog, lambda: Blog.objects.filter(is_published=True), blog_text),
+}
+KIND_BY_MODEL = {model: kind for kind, (model, _, _) in SOURCES.items()}
+
+
+def is_indexable(obj):
+    return getattr(obj, 'is_published', True)
+
+
+def index_object(obj):
+    """
+    Add or refresh `obj` in the index. Saves that leave the indexed text
+    unchanged do not rewrite the postings.
+    """
+    kind = KIND_BY_MODEL[type(obj)]
+    if not is_indexable(obj):
+        remove_object(obj)
+        return None
+
+    body = SOURCES[kind][2](obj)
+    checksum = hashlib.md5('\0'.join((obj.title, obj.slug, body)).encode('utf-8')).hexdigest()
+    document = SearchDocument.objects.filter(kind=kind, object_id=obj.pk).first()
+    if document is not None and document.checksum == checksum:
+        return document
+
+    frequencies = term_frequencies(obj.title, body)
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.update_or_create(kind=kind, object_id=obj.pk, defaults={
+            'title': obj.title,
+            'slug': obj.slug,
+            'body': body,
+            'length': sum(frequencies.values()),
+            'checksum': checksum,
+        })
+        document.postings.all().delete()
+        Posting.objects.bulk_create(
+            [Posting(document=document, term=term, frequency=frequency) for term, frequency in frequencies.items()],
+            batch_size=500,
+        )
+    return document
+
+
+def remove_object(obj):
+    SearchDocument.objects.filter(kind=KIND_BY_MODEL[type(obj)], object_id=obj.pk).delete()
+
+
+def rebuild_index():
+    """Re-index every course, lesson and published blog post from scratch."""
+    SearchDocument.objects.all().delete()
+    indexed = 0
+    for model, queryset, _ in SOURCES.values():
+        for obj in queryset().iterator():
+            index_object(obj)
+            indexed += 1
+    return indexed
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from search.indexing import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for courses, lessons and blogs."
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index()
+        self.stdout.write(f"Indexed {indexed} document(s).")
@@ -0,0 +1,150 @@
+# Generated by Django 5.2.15 on 2026-10-17 22:40
+
+import re
+import unicodedata
+from collections import Counter
+from html.parser import HTMLParser
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of codewithsathya.richtext.html_to_text and the search.analysis
+# tokenizer, inlined so later changes there don't alter this migration. Terms
+# are accent-folded as in 0002_fold_posting_terms: without folding, "café" and
+# "cafe" collide on Posting's unique (term, document) under MySQL's
+# accent-insensitive collation.
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure',
+    'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'ol', 'p', 'pre', 'section',
+    'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul',
+}
+SKIPPED_TAGS = {'script', 'style', 'template', 'noscript'}
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+class TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skipping = max(self.skipping - 1, 0)
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def html_to_text(html):
+    if not html:
+        return ''
+    parser = TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return WHITESPACE_RE.sub(' ', ''.join(parser.parts)).strip()
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERM_LENGTH = 64
+TITLE_WEIGHT = 3
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have how i in into is it its of on or that the their
+this to was what when where which who why will with you your
+""".split())
+
+
+def fold(text):
+    decomposed = unicodedata.normalize('NFKD', (text or '').casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(fold(text))
+        if token not in STOP_WORDS
+    ]
+
+
+def term_frequencies(title, body):
+    frequencies = Counter(tokenize(body))
+    for term in tokenize(title):
+        frequencies[term] += TITLE_WEIGHT
+    return frequencies
+
+
+def build_index(apps, schema_editor):
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    Posting = apps.get_model('search', 'Posting')
+    sources = [
+        ('course', apps.get_model('tutorials', 'Course').objects.all(), lambda obj: obj.description),
+        ('lesson', apps.get_model('tutorials', 'Lesson').objects.all(), lambda obj: html_to_text(obj.description)),
+        ('blog', apps.get_model('blogs', 'Blog').objects.filter(is_published=True),
+         lambda obj: ' '.join(part for part in (obj.description, html_to_text(obj.content)) if part)),
+    ]
+    for kind, queryset, text in sources:
+        for obj in queryset.iterator():
+            body = text(obj)
+            frequencies = term_frequencies(obj.title, body)
+            # A blank checksum makes the next save of the object re-index it
+            document = SearchDocument.objects.create(
+                kind=kind, object_id=obj.pk, title=obj.title, slug=obj.slug, body=body,
+                length=sum(frequencies.values()), checksum='',
+            )
+            Posting.objects.bulk_create([
+                Posting(document=document, term=term, frequency=frequency)
+                for term, frequency in frequencies.items()
+            ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('blogs', '0002_blog_blog_published_created_idx'),
+        ('tutorials', '0017_courseratingsummary_updated_at_lesson_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('course', 'Course'), ('lesson', 'Lesson'), ('blog', 'Blog')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('slug', models.SlugField(max_length=255)),
+                ('body', models.TextField(blank=True, default='', help_text='Plain text the snippets are cut from')),
+                ('length', models.PositiveIntegerField(default=0, help_text='Weighted number of indexed terms')),
+                ('checksum', models.CharField(help_text='Hash of the indexed text, to skip unchanged saves', max_length=32)),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Posting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.PositiveIntegerField(help_text='Weighted number of occurrences of the term in the document')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='search.searchdocument')),
+            ],
+            options={
+                'unique_together': {('term', 'document')},
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
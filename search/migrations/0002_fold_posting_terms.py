@@ -0,0 +1,62 @@
+# Generated by Django 5.2.15 on 2026-10-18 10:30
+
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import migrations
+
+# Frozen copy of the search.analysis tokenizer as it was when this migration
+# was written, inlined so later changes there don't alter this migration
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERM_LENGTH = 64
+TITLE_WEIGHT = 3
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have how i in into is it its of on or that the their
+this to was what when where which who why will with you your
+""".split())
+
+
+def fold(text):
+    decomposed = unicodedata.normalize('NFKD', (text or '').casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(fold(text))
+        if token not in STOP_WORDS
+    ]
+
+
+def term_frequencies(title, body):
+    frequencies = Counter(tokenize(body))
+    for term in tokenize(title):
+        frequencies[term] += TITLE_WEIGHT
+    return frequencies
+
+
+def refold_postings(apps, schema_editor):
+    # Terms are now accent-folded; re-derive every document's postings from its stored text
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    Posting = apps.get_model('search', 'Posting')
+    for document in SearchDocument.objects.only('id', 'title', 'body').iterator():
+        frequencies = term_frequencies(document.title, document.body)
+        Posting.objects.filter(document_id=document.pk).delete()
+        Posting.objects.bulk_create([
+            Posting(document_id=document.pk, term=term, frequency=frequency)
+            for term, frequency in frequencies.items()
+        ], batch_size=500)
+        SearchDocument.objects.filter(pk=document.pk).update(length=sum(frequencies.values()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(refold_postings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    One searchable course, lesson or blog post, flattened to plain text.
+    Its terms are stored as `Posting` rows (the inverted index).
+    """
+    KIND_CHOICES = [
+        ('course', 'Course'),
+        ('lesson', 'Lesson'),
+        ('blog', 'Blog'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=255)
+    body = models.TextField(blank=True, default='', help_text="Plain text the snippets are cut from")
+    length = models.PositiveIntegerField(default=0, help_text="Weighted number of indexed terms")
+    checksum = models.CharField(max_length=32, help_text="Hash of the indexed text, to skip unchanged saves")
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f"{self.kind}: {self.title}"
+
+
+class Posting(models.Model):
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    term = models.CharField(max_length=64)
+    frequency = models.PositiveIntegerField(help_text="Weighted number of occurrences of the term in the document")
+
+    class Meta:
+        unique_together = ('term', 'document')
+
+    def __str__(self):
+        return f"{self.term} in {self.document_id} ({self.frequency})"
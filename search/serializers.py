@@ -0,0 +1,17 @@
+from rest_framework import serializers
+
+
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    slug = serializers.SlugField()
+    title = serializers.CharField()
+    snippet = serializers.CharField()
+    score = serializers.FloatField()
+
+
+class SuggestionSerializer(serializers.Serializer):
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    slug = serializers.SlugField()
+    title = serializers.CharField()
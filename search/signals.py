@@ -0,0 +1,34 @@
+import logging
+
+from django.db import IntegrityError
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from blogs.models import Blog
+from search.autocomplete import object_deleted, object_saved
+from search.indexing import index_object, remove_object
+from tutorials.models import Course, Lesson
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Blog)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        try:
+            index_object(instance)
+        except IntegrityError:
+            # Two terms the collation still considers equal; the save itself
+            # must not fail over the index, which keeps its previous postings
+            logger.exception("Could not index %s %s", sender.__name__, instance.pk)
+        object_saved(instance)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Blog)
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_object(instance)
+    object_deleted(instance)
@@ -0,0 +1,198 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from blogs.models import Blog
+from codewithsathya.richtext import html_to_text
+from codewithsathya.testing import LOCAL_CACHES
+from search.autocomplete import index as autocomplete_index
+from search.engine import search
+from search.indexing import index_object
+from search.models import Posting, SearchDocument
+from tutorials.models import Course, Lesson, Section
+
+User = get_user_model()
+
+
+class SearchTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='author@example.com',
+            email='author@example.com',
+            password='password123'
+        )
+        self.course = Course.objects.create(
+            title='Django REST Framework',
+            description='Build web APIs with serializers and viewsets.',
+            course_time=120
+        )
+        self.section = Section.objects.create(course=self.course, title='Authentication', order=1)
+        self.lesson = Lesson.objects.create(
+            section=self.section,
+            title='Implementing JWT',
+            description='<p>Issue <strong>JSON Web Tokens</strong> with simplejwt.</p><script>tracking()</script>',
+            time=25,
+            author=self.user,
+            order=1
+        )
+        self.blog = Blog.objects.create(
+            title='Caching Django views',
+            description='When to cache.',
+            content='<h2>Why</h2><p>Serializers are slow when the page is hot.</p>',
+            author=self.user,
+            is_published=True
+        )
+
+    def test_html_to_text(self):
+        self.assertEqual(
+            html_to_text('<h2>Intro</h2><p>Tom&amp;Jerry<br>rock</p><style>p{}</style>'),
+            'Intro Tom&Jerry rock',
+        )
+
+    def test_search_ranks_title_matches_first(self):
+        url = reverse('search:search')
+        response = self.client.get(url, {'q': 'serializers'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([r['type'] for r in response.data['results']], ['course', 'blog'])
+
+        response = self.client.get(url, {'q': 'jwt tokens'})
+        result = response.data['results'][0]
+        self.assertEqual((result['type'], result['slug']), ('lesson', self.lesson.slug))
+        self.assertIn('JSON Web Tokens', result['snippet'])
+        self.assertNotIn('tracking', result['snippet'])
+
+        response = self.client.get(url, {'q': 'serializers', 'type': 'blog'})
+        self.assertEqual([r['slug'] for r in response.data['results']], [self.blog.slug])
+
+    def test_search_requires_a_query(self):
+        url = reverse('search:search')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'q': 'x', 'type': 'video'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.lesson.description = '<p>Refresh tokens rotate.</p>'
+        self.lesson.save()
+        self.assertEqual(search('simplejwt')[0], 0)
+        self.assertEqual(search('rotate')[1][0][0].object_id, self.lesson.pk)
+
+        # Unpublishing or deleting drops the document and its postings
+        self.blog.is_published = False
+        self.blog.save()
+        self.assertEqual(search('hot')[0], 0)
+        self.course.delete()
+        self.assertFalse(SearchDocument.objects.filter(kind__in=('course', 'lesson')).exists())
+        self.assertFalse(Posting.objects.filter(document__kind='course').exists())
+
+    def test_accented_terms_fold_together(self):
+        self.lesson.description = '<p>Café, cafe and CAFÉ caching at the Straße</p>'
+        self.lesson.save()
+        self.assertEqual(
+            dict(Posting.objects.filter(document__object_id=self.lesson.pk, term__in=('cafe', 'strasse')).values_list('term', 'frequency')),
+            {'cafe': 3, 'strasse': 1},
+        )
+        self.assertEqual(search('CAFÉ')[1][0][0].object_id, self.lesson.pk)
+
+    def test_index_failure_does_not_break_saves(self):
+        with mock.patch('search.signals.index_object', side_effect=IntegrityError("Duplicate entry")):
+            with self.assertLogs('search.signals', level='ERROR'):
+                self.lesson.title = 'Renamed'
+                self.lesson.save()
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.title, 'Renamed')
+
+    def test_unchanged_save_does_not_rewrite_postings(self):
+        # Only the document lookup; the checksum matches
+        with self.assertNumQueries(1):
+            index_object(self.lesson)
+        self.assertEqual(search('simplejwt')[0], 1)
+
+    def test_search_uses_fixed_number_of_queries(self):
+        for i in range(10):
+            Lesson.objects.create(section=self.section, title=f'Serializers part {i}', description='<p>serializers</p>', time=5)
+        with self.assertNumQueries(4):
+            total, results = search('serializers', limit=5)
+        self.assertEqual((total, len(results)), (12, 5))
+
+    def test_rebuild_command(self):
+        SearchDocument.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(SearchDocument.objects.count(), 3)
+        self.assertEqual(search('simplejwt')[0], 1)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class AutocompleteTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(title='Django REST Framework', description='d', course_time=10)
+        section = Section.objects.create(course=self.course, title='Basics')
+        self.quiet = Lesson.objects.create(section=section, title='Django settings', description='d', time=5)
+        self.popular = Lesson.objects.create(section=section, title='Django models', description='d', time=5, views=500)
+        self.blog = Blog.objects.create(title='Deploying Django', content='<p>x</p>', is_published=True)
+        self.url = reverse('search:autocomplete')
+
+    def titles(self, **params):
+        return [item['title'] for item in self.client.get(self.url, params).data['results']]
+
+    def test_prefix_matches_ranked_by_popularity(self):
+        self.assertEqual(self.titles(q='dja'), [
+            'Django models', 'Django REST Framework', 'Django settings', 'Deploying Django',
+        ])
+        self.assertEqual(self.titles(q='rest fr'), ['Django REST Framework'])
+        self.assertEqual(self.titles(q='django', type='blog'), ['Deploying Django'])
+        self.assertEqual(self.titles(q='  '), [])
+
+    def test_warm_lookups_do_not_query(self):
+        self.titles(q='d')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(autocomplete_index.lookup('django')), 4)
+
+    def test_saves_update_the_loaded_index_in_place(self):
+        self.titles(q='d')
+        with mock.patch.object(autocomplete_index, 'reload') as reload:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.quiet.title = 'Settings explained'
+                self.quiet.save()
+                self.blog.is_published = False
+                self.blog.save()
+                self.popular.delete()
+            self.assertEqual(self.titles(q='dja'), ['Django REST Framework'])
+            self.assertEqual(self.titles(q='expl'), ['Settings explained'])
+            reload.assert_not_called()
+
+    def test_saves_are_suggested_only_once_committed(self):
+        self.titles(q='d')
+        with mock.patch.object(autocomplete_index, 'reload') as reload:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.quiet.title = 'Phantom lesson'
+                self.quiet.save()
+            # Still uncommitted, and could yet be rolled back
+            self.assertEqual(self.titles(q='phan'), [])
+            for callback in callbacks:
+                callback()
+            self.assertEqual(self.titles(q='phan'), ['Phantom lesson'])
+            reload.assert_not_called()
+
+    def test_accents_are_folded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.create(title='Café Crème', description='d', course_time=10)
+        self.assertEqual(self.titles(q='cafe'), ['Café Crème'])
+        self.assertEqual(self.titles(q='CAFÉ CR'), ['Café Crème'])
+
+    def test_other_process_edits_trigger_a_reload(self):
+        self.titles(q='d')
+        Course.objects.filter(pk=self.course.pk).update(title='Flask')
+        cache.delete('autocomplete:version')  # as if another worker had moved the stamp
+        self.assertEqual(self.titles(q='fla'), ['Flask'])
@@ -0,0 +1,57 @@
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from codewithsathya.params import bounded_int
+from search.autocomplete import autocomplete
+from search.engine import search, snippet
+from search.models import SearchDocument
+from search.serializers import SearchResultSerializer, SuggestionSerializer
+
+
+class SearchView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"detail": "The 'q' query parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        kind = request.query_params.get('type') or None
+        if kind and kind not in dict(SearchDocument.KIND_CHOICES):
+            return Response({"detail": f"Unknown type '{kind}'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = bounded_int(request.query_params.get('limit'), default=20, minimum=1, maximum=50)
+        offset = bounded_int(request.query_params.get('offset'), default=0, minimum=0)
+        total, matches = search(query, kind=kind, limit=limit, offset=offset)
+
+        results = [
+            {
+                "type": document.kind,
+                "id": document.object_id,
+                "slug": document.slug,
+                "title": document.title,
+                "snippet": snippet(document.body, query),
+                "score": round(score, 4),
+            }
+            for document, score in matches
+        ]
+        return Response({
+            "query": query,
+            "count": total,
+            "results": SearchResultSerializer(results, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+
+class AutocompleteView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        kind = request.query_params.get('type') or None
+        if kind and kind not in dict(SearchDocument.KIND_CHOICES):
+            return Response({"detail": f"Unknown type '{kind}'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = bounded_int(request.query_params.get('limit'), default=10, minimum=1, maximum=25)
+        suggestions = autocomplete(request.query_params.get('q', ''), limit=limit, kind=kind)
+        return Response({"results": SuggestionSerializer(suggestions, many=True).data}, status=status.HTTP_200_OK)
@@ -10,8 +10,10 @@ from tutorials.models import (
     Question,
     Choice,
     QuizAttempt,
+    QuizLeaderboardEntry,
     Banner,
     LessonProgress,
+    CourseProgress,
     Badge,
     UserBadge,
 )
@@ -49,6 +51,7 @@ class QuestionInline(admin.StackedInline):
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     list_display = ('title', 'level', 'course_time', 'average_rating', 'created_at')
+    list_select_related = ('rating_summary',)
     list_filter = ('level', 'created_at')
     search_fields = ('title', 'description')
     prepopulated_fields = {'slug': ('title',)}
@@ -67,6 +70,7 @@ class SectionAdmin(admin.ModelAdmin):
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
     list_display = ('title', 'section', 'time', 'author', 'views', 'average_rating', 'order')
+    list_select_related = ('rating_summary', 'section__course', 'author')
     list_filter = ('section__course', 'section')
     search_fields = ('title', 'description', 'author__email')
     prepopulated_fields = {'slug': ('title',)}
@@ -104,6 +108,14 @@ class QuizAttemptAdmin(admin.ModelAdmin):
     readonly_fields = ('score', 'is_passed', 'completed_at')
 
 
+@admin.register(QuizLeaderboardEntry)
+class QuizLeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ('quiz', 'user', 'score', 'completed_at')
+    list_filter = ('quiz',)
+    search_fields = ('user__email', 'quiz__title')
+    readonly_fields = ('quiz', 'user', 'attempt', 'score', 'completed_at')
+
+
 @admin.register(CourseRating)
 class CourseRatingAdmin(admin.ModelAdmin):
     list_display = ('course', 'user', 'rating', 'created_at')
@@ -135,6 +147,13 @@ class LessonProgressAdmin(admin.ModelAdmin):
     search_fields = ('user__email', 'lesson__title')
 
 
+@admin.register(CourseProgress)
+class CourseProgressAdmin(admin.ModelAdmin):
+    list_display = ('user', 'course', 'completed_lessons', 'total_lessons', 'last_completed_at')
+    list_filter = ('course',)
+    search_fields = ('user__email', 'course__title')
+
+
 @admin.register(Badge)
 class BadgeAdmin(admin.ModelAdmin):
     list_display = ('name', 'course')
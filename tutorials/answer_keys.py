@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.db.models import F
+
+from tutorials.models import Choice, Question, Quiz
+
+CACHE_KEY = 'quiz-answer-key:{}:v{}'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class AnswerKey:
+    """
+    Valid and correct choice ids per question of a quiz, used to check and
+    grade a whole submission without further queries.
+    """
+
+    def __init__(self, questions):
+        # {question_id: (valid choice ids, correct choice ids)}
+        self.questions = {
+            question_id: (frozenset(valid), frozenset(correct))
+            for question_id, (valid, correct) in questions.items()
+        }
+
+    def __len__(self):
+        return len(self.questions)
+
+    def to_cache(self):
+        return {
+            question_id: (sorted(valid), sorted(correct))
+            for question_id, (valid, correct) in self.questions.items()
+        }
+
+    def validate(self, answers):
+        """Return an error message for the first invalid answer, if any."""
+        for answer in answers:
+            q_id = answer['question_id']
+            c_id = answer['choice_id']
+            if q_id not in self.questions:
+                return f"Question {q_id} does not belong to this quiz."
+            if c_id not in self.questions[q_id][0]:
+                return f"Choice {c_id} does not belong to Question {q_id}."
+        return None
+
+    def grade(self, answers):
+        correct_count = 0
+        feedback = []
+        for answer in answers:
+            q_id = answer['question_id']
+            c_id = answer['choice_id']
+            is_correct = c_id in self.questions[q_id][1]
+            if is_correct:
+                correct_count += 1
+            feedback.append({
+                "question_id": q_id,
+                "submitted_choice_id": c_id,
+                "is_correct": is_correct
+            })
+        return correct_count, feedback
+
+
+def compile_answer_key(quiz):
+    question_ids = Question.objects.filter(quiz=quiz).values_list('id', flat=True)
+    questions = {question_id: (set(), set()) for question_id in question_ids}
+    choices = Choice.objects.filter(question__quiz=quiz).values_list('question_id', 'id', 'is_correct')
+    for question_id, choice_id, is_correct in choices:
+        valid, correct = questions[question_id]
+        valid.add(choice_id)
+        if is_correct:
+            correct.add(choice_id)
+    return AnswerKey(questions)
+
+
+def get_answer_key(quiz):
+    """
+    Return the compiled answer key for `quiz`, cached under its current
+    `answer_key_version`.
+    """
+    key = CACHE_KEY.format(quiz.pk, quiz.answer_key_version)
+    cached = cache.get(key)
+    if cached is not None:
+        return AnswerKey(cached)
+
+    answer_key = compile_answer_key(quiz)
+    cache.set(key, answer_key.to_cache(), CACHE_TIMEOUT)
+    return answer_key
+
+
+def bump_answer_key_version(*quiz_ids):
+    quiz_ids = {quiz_id for quiz_id in quiz_ids if quiz_id is not None}
+    if quiz_ids:
+        Quiz.objects.filter(pk__in=quiz_ids).update(answer_key_version=F('answer_key_version') + 1)
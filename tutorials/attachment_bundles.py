@@ -0,0 +1,104 @@
+import glob
+import hashlib
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import content_disposition_header
+
+from codewithsathya.ranges import serve_file
+from codewithsathya.zipstream import stream_zip
+
+logger = logging.getLogger(__name__)
+
+
+def bundle_key(attachments):
+    """Identify a bundle by the ids, versions and stored names of its attachments."""
+    source = '|'.join(
+        f'{attachment.pk}:{attachment.updated_at.isoformat()}:{attachment.file.name}'
+        for attachment in sorted(attachments, key=lambda attachment: attachment.pk)
+    )
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def bundle_entries(attachments):
+    for attachment in attachments:
+        storage, name = attachment.file.storage, attachment.file.name
+        if not storage.exists(name):
+            logger.warning("Attachment %s is missing from storage (%s); left out of the bundle", attachment.pk, name)
+            continue
+        date_time = timezone.localtime(attachment.updated_at).timetuple()[:6]
+        yield (
+            attachment.name or os.path.basename(name),
+            date_time,
+            lambda storage=storage, name=name: storage.open(name, 'rb'),
+        )
+
+
+def get_bundle_storage():
+    location = getattr(settings, 'ATTACHMENT_BUNDLE_CACHE_DIR', None)
+    return FileSystemStorage(location=location) if location else None
+
+
+def cache_while_streaming(chunks, storage, lesson, name):
+    """
+    Pass `chunks` through while writing them to a temporary file that
+    replaces the lesson's previous bundle once the archive is complete.
+    An aborted download leaves nothing behind.
+    """
+    os.makedirs(storage.location, exist_ok=True)
+    path = storage.path(name)
+    partial = f'{path}.{uuid.uuid4().hex}.part'
+    complete = False
+    try:
+        with open(partial, 'wb') as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+                yield chunk
+        os.replace(partial, path)
+        complete = True
+        for stale in glob.glob(storage.path(f'lesson-{lesson.pk}-*.zip')):
+            if stale != path:
+                os.remove(stale)
+    finally:
+        if not complete and os.path.exists(partial):
+            os.remove(partial)
+
+
+def serve_attachment_bundle(request, lesson, attachments):
+    """
+    Answer GET/HEAD with a ZIP of `attachments`, built while it is sent.
+    With ATTACHMENT_BUNDLE_CACHE_DIR set, the finished archive is kept there
+    and later requests for the same attachment set are served from disk.
+    """
+    key = bundle_key(attachments)
+    etag = quote_etag(key)
+    filename = f'{lesson.slug}-attachments.zip'
+    storage = get_bundle_storage()
+    name = f'lesson-{lesson.pk}-{key}.zip'
+
+    if storage is not None and storage.exists(name):
+        return serve_file(request, storage, name, as_attachment=True, filename=filename, etag=etag, sendfile=False)
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        return not_modified
+
+    headers = {
+        'ETag': etag,
+        'Content-Disposition': content_disposition_header(True, filename),
+    }
+    if request.method == 'HEAD':
+        return HttpResponse(content_type='application/zip', headers=headers)
+
+    chunk_size = getattr(settings, 'MEDIA_STREAM_CHUNK_SIZE', 64 * 1024)
+    chunks = (chunk for chunk in stream_zip(bundle_entries(attachments), chunk_size) if chunk)
+    if storage is not None:
+        chunks = cache_while_streaming(chunks, storage, lesson, name)
+    return StreamingHttpResponse(chunks, content_type='application/zip', headers=headers)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from blogs.models import Blog
+from codewithsathya.images import build_image_variants
+from tutorials.models import Badge, Banner, Course
+
+
+class Command(BaseCommand):
+    help = "Generate responsive image variants for course, banner, badge and blog images that lack them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Regenerate variants that already exist too.")
+
+    def handle(self, *args, **options):
+        built = 0
+        for model in (Course, Banner, Badge, Blog):
+            for pk, name, variants in model.objects.exclude(image='').exclude(image__isnull=True).values_list(
+                'pk', 'image', 'image_variants'
+            ):
+                if options['all'] or (variants or {}).get('source') != name:
+                    build_image_variants(model, pk)
+                    built += 1
+        self.stdout.write(f"Built variants for {built} image(s).")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tutorials.view_counter import flush_lesson_views
+
+
+class Command(BaseCommand):
+    help = "Write buffered lesson view counts to the database."
+
+    def handle(self, *args, **options):
+        flushed = flush_lesson_views()
+        self.stdout.write(f"Flushed view counts for {flushed} lesson(s).")
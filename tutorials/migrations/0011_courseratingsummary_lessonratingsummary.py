@@ -0,0 +1,69 @@
+# Generated by Django 5.2.15 on 2026-10-17 22:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    for rating_name, summary_name, owner_field in (
+        ('CourseRating', 'CourseRatingSummary', 'course'),
+        ('LessonRating', 'LessonRatingSummary', 'lesson'),
+    ):
+        Rating = apps.get_model('tutorials', rating_name)
+        Summary = apps.get_model('tutorials', summary_name)
+        rows = (
+            Rating.objects.values(f'{owner_field}_id', 'rating')
+            .annotate(total=models.Count('id'))
+            .order_by()
+        )
+        summaries = {}
+        for row in rows:
+            owner_id = row[f'{owner_field}_id']
+            summary = summaries.setdefault(owner_id, Summary(**{f'{owner_field}_id': owner_id}))
+            summary.rating_sum += row['rating'] * row['total']
+            summary.rating_count += row['total']
+            setattr(summary, f"star_{row['rating']}", row['total'])
+        Summary.objects.bulk_create(summaries.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0010_badge_lessonprogress_userbadge'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseRatingSummary',
+            fields=[
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('star_1', models.PositiveIntegerField(default=0)),
+                ('star_2', models.PositiveIntegerField(default=0)),
+                ('star_3', models.PositiveIntegerField(default=0)),
+                ('star_4', models.PositiveIntegerField(default=0)),
+                ('star_5', models.PositiveIntegerField(default=0)),
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='tutorials.course')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='LessonRatingSummary',
+            fields=[
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('star_1', models.PositiveIntegerField(default=0)),
+                ('star_2', models.PositiveIntegerField(default=0)),
+                ('star_3', models.PositiveIntegerField(default=0)),
+                ('star_4', models.PositiveIntegerField(default=0)),
+                ('star_5', models.PositiveIntegerField(default=0)),
+                ('lesson', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='tutorials.lesson')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
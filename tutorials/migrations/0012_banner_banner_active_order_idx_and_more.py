@@ -0,0 +1,31 @@
+# Generated by Django 5.2.15 on 2026-10-17 22:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0011_courseratingsummary_lessonratingsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='banner',
+            index=models.Index(fields=['is_active', 'order', '-created_at', 'id'], name='banner_active_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-created_at', 'id'], name='course_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['order', 'id'], name='lesson_order_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['order', 'id'], name='section_order_id_idx'),
+        ),
+    ]
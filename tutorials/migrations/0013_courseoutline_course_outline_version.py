@@ -0,0 +1,28 @@
+# Generated by Django 5.2.15 on 2026-10-17 22:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0012_banner_banner_active_order_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseOutline',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='outline', serialize=False, to='tutorials.course')),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('sections', models.JSONField(default=list)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='outline_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text="Bumped whenever the course's sections or lessons change"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.15 on 2026-10-17 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0013_courseoutline_course_outline_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='answer_key_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text="Bumped whenever the quiz's questions or choices change"),
+        ),
+    ]
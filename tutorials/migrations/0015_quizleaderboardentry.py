@@ -0,0 +1,51 @@
+# Generated by Django 5.2.15 on 2026-10-17 22:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_leaderboard(apps, schema_editor):
+    QuizAttempt = apps.get_model('tutorials', 'QuizAttempt')
+    QuizLeaderboardEntry = apps.get_model('tutorials', 'QuizLeaderboardEntry')
+    attempts = QuizAttempt.objects.order_by('quiz_id', 'user_id', 'completed_at', 'id').values_list(
+        'id', 'quiz_id', 'user_id', 'score', 'completed_at'
+    )
+    entries = []
+    previous = None
+    for attempt_id, quiz_id, user_id, score, completed_at in attempts.iterator():
+        if (quiz_id, user_id) == previous:
+            continue
+        previous = (quiz_id, user_id)
+        entries.append(QuizLeaderboardEntry(
+            quiz_id=quiz_id, user_id=user_id, attempt_id=attempt_id, score=score, completed_at=completed_at
+        ))
+    QuizLeaderboardEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0014_quiz_answer_key_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizLeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField()),
+                ('completed_at', models.DateTimeField()),
+                ('attempt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entry', to='tutorials.quizattempt')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='tutorials.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Quiz Leaderboard Entries',
+                'indexes': [models.Index(fields=['quiz', '-score', 'completed_at', 'attempt'], name='leaderboard_rank_idx')],
+                'unique_together': {('quiz', 'user')},
+            },
+        ),
+        migrations.RunPython(backfill_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.15 on 2026-10-17 22:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_course_progress(apps, schema_editor):
+    Lesson = apps.get_model('tutorials', 'Lesson')
+    LessonProgress = apps.get_model('tutorials', 'LessonProgress')
+    CourseProgress = apps.get_model('tutorials', 'CourseProgress')
+
+    totals = dict(
+        Lesson.objects.values('section__course_id')
+        .annotate(total=models.Count('id'))
+        .order_by()
+        .values_list('section__course_id', 'total')
+    )
+    rows = (
+        LessonProgress.objects.filter(is_completed=True)
+        .values('user_id', 'lesson__section__course_id')
+        .annotate(completed=models.Count('id'), last=models.Max('completed_at'))
+        .order_by()
+    )
+    CourseProgress.objects.bulk_create([
+        CourseProgress(
+            user_id=row['user_id'],
+            course_id=row['lesson__section__course_id'],
+            completed_lessons=row['completed'],
+            total_lessons=totals.get(row['lesson__section__course_id'], 0),
+            last_completed_at=row['last'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0015_quizleaderboardentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_lessons', models.PositiveIntegerField(default=0)),
+                ('total_lessons', models.PositiveIntegerField(default=0)),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_records', to='tutorials.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Course Progresses',
+                'unique_together': {('user', 'course')},
+            },
+        ),
+        migrations.RunPython(backfill_course_progress, migrations.RunPython.noop),
+    ]
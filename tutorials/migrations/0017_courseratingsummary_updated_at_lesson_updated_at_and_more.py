@@ -0,0 +1,28 @@
+# Generated by Django 5.2.15 on 2026-10-17 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0016_courseprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseratingsummary',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='lessonratingsummary',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.15 on 2026-10-17 23:00
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def stamp_existing_attachments(apps, schema_editor):
+    LessonAttachment = apps.get_model('tutorials', 'LessonAttachment')
+    LessonAttachment.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0019_badge_image_variants_banner_image_variants_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessonattachment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(stamp_existing_attachments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.15 on 2026-10-17 23:07
+
+import uploads.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0020_lessonattachment_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lesson',
+            name='media_file',
+            field=models.FileField(blank=True, help_text='Upload image or video file', null=True, storage=uploads.storage.ContentAddressedStorage(), upload_to='lessons/media/'),
+        ),
+        migrations.AlterField(
+            model_name='lessonattachment',
+            name='file',
+            field=models.FileField(help_text='Upload attachment file', storage=uploads.storage.ContentAddressedStorage(), upload_to='lessons/attachments/'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.15 on 2026-10-18 10:00
+
+from django.db import migrations
+from django.db.models import F
+
+
+def bump_outline_versions(apps, schema_editor):
+    # Stored outlines still carry lesson view counts; rebuild them on next read
+    Course = apps.get_model('tutorials', 'Course')
+    Course.objects.update(outline_version=F('outline_version') + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0021_alter_lesson_media_file_alter_lessonattachment_file'),
+    ]
+
+    operations = [
+        migrations.RunPython(bump_outline_versions, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,16 @@
-from django.db import models
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.conf import settings
-from django.utils.text import slugify
+from django.utils import timezone
 from django_ckeditor_5.fields import CKEditor5Field
 
-class Course(models.Model):
+from codewithsathya.images import ImageVariantsMixin
+from codewithsathya.richtext import RenderedContentMixin
+from codewithsathya.slugs import UniqueSlugMixin
+from uploads.storage import blob_storage
+
+class Course(UniqueSlugMixin, ImageVariantsMixin, models.Model):
     LEVEL_CHOICES = [
         ('beginner', 'Beginner'),
         ('intermediate', 'Intermediate'),
@@ -19,27 +26,38 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     enrolled_users = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='enrolled_courses', blank=True)
+    outline_version = models.PositiveIntegerField(default=0, editable=False, help_text="Bumped whenever the course's sections or lessons change")
 
-    def average_rating(self):
-        avg = self.ratings.aggregate(models.Avg('rating'))['rating__avg']
-        return round(avg, 2) if avg is not None else 0.0
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='course_created_id_idx'),
+        ]
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            num = 1
-            while Course.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{num}"
-                num += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+    def average_rating(self):
+        try:
+            return self.rating_summary.average
+        except ObjectDoesNotExist:
+            return 0.0
 
     def __str__(self):
         return self.title
 
 
-class Section(models.Model):
+class CourseOutline(models.Model):
+    """
+    Pre-serialized section/lesson tree of a course. The snapshot is valid
+    while `version` matches `Course.outline_version`.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='outline')
+    version = models.PositiveIntegerField(default=0)
+    sections = models.JSONField(default=list)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Outline of course {self.course_id} (v{self.version})"
+
+
+class Section(UniqueSlugMixin, models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='sections')
     title = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
@@ -47,57 +65,149 @@ class Section(models.Model):
 
     class Meta:
         ordering = ['order']
-
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            num = 1
-            while Section.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{num}"
-                num += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+        indexes = [
+            models.Index(fields=['order', 'id'], name='section_order_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
 
 
-class Lesson(models.Model):
+class Lesson(UniqueSlugMixin, RenderedContentMixin, models.Model):
+    rich_text_field = 'description'
+
     section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='lessons')
     title = models.CharField(max_length=255)
     description = CKEditor5Field('Description', config_name='extends')
     slug = models.SlugField(max_length=255, unique=True, blank=True)
     time = models.PositiveIntegerField(help_text="Duration of the lesson in minutes")
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='lessons')
-    media_file = models.FileField(upload_to='lessons/media/', blank=True, null=True, help_text="Upload image or video file")
+    media_file = models.FileField(upload_to='lessons/media/', storage=blob_storage, blank=True, null=True, help_text="Upload image or video file")
     video_url = models.URLField(max_length=500, blank=True, null=True, help_text="URL of the video (e.g. YouTube, Vimeo, etc.)")
     views = models.PositiveIntegerField(default=0, help_text="Number of views this lesson has received")
     order = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order', 'id'], name='lesson_order_id_idx'),
+        ]
 
     def average_rating(self):
-        avg = self.ratings.aggregate(models.Avg('rating'))['rating__avg']
-        return round(avg, 2) if avg is not None else 0.0
-
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            num = 1
-            while Lesson.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{num}"
-                num += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+        try:
+            return self.rating_summary.average
+        except ObjectDoesNotExist:
+            return 0.0
 
     def __str__(self):
         return f"{self.section.title} - {self.title}"
 
 
-class CourseRating(models.Model):
+class RatingSummary(models.Model):
+    """
+    Running totals of the ratings given to a course or lesson, so that
+    averages can be read without aggregating over the rating rows.
+    """
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    star_1 = models.PositiveIntegerField(default=0)
+    star_2 = models.PositiveIntegerField(default=0)
+    star_3 = models.PositiveIntegerField(default=0)
+    star_4 = models.PositiveIntegerField(default=0)
+    star_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def average(self):
+        if not self.rating_count:
+            return 0.0
+        return round(self.rating_sum / self.rating_count, 2)
+
+    def star_counts(self):
+        return {star: getattr(self, f'star_{star}') for star in range(1, 6)}
+
+    @classmethod
+    def apply_change(cls, owner_id, old_rating=None, new_rating=None):
+        """
+        Move one rating from `old_rating` to `new_rating` (either may be None
+        for a create or a delete) using F() updates on the summary row.
+        """
+        deltas = {'rating_sum': 0, 'rating_count': 0}
+        if old_rating:
+            deltas['rating_sum'] -= old_rating
+            deltas['rating_count'] -= 1
+            deltas[f'star_{old_rating}'] = deltas.get(f'star_{old_rating}', 0) - 1
+        if new_rating:
+            deltas['rating_sum'] += new_rating
+            deltas['rating_count'] += 1
+            deltas[f'star_{new_rating}'] = deltas.get(f'star_{new_rating}', 0) + 1
+
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if not updates:
+            return
+
+        owner_field = cls.owner_field
+        if new_rating and not old_rating:
+            cls.objects.get_or_create(**{f'{owner_field}_id': owner_id})
+        cls.objects.filter(**{f'{owner_field}_id': owner_id}).update(updated_at=timezone.now(), **updates)
+
+
+class CourseRatingSummary(RatingSummary):
+    owner_field = 'course'
+
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary')
+
+    def __str__(self):
+        return f"{self.course_id}: {self.average} ({self.rating_count} ratings)"
+
+
+class LessonRatingSummary(RatingSummary):
+    owner_field = 'lesson'
+
+    lesson = models.OneToOneField(Lesson, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary')
+
+    def __str__(self):
+        return f"{self.lesson_id}: {self.average} ({self.rating_count} ratings)"
+
+
+class SummarizedRating(models.Model):
+    """
+    Base for rating rows that keep their owner's RatingSummary in step.
+    Deletes (including cascades) are handled in tutorials.signals.
+    """
+    owner_field = None
+    summary_model = None
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        owner_id = getattr(self, f'{self.owner_field}_id')
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = type(self).objects.filter(pk=self.pk).values_list('rating', flat=True).first()
+            super().save(*args, **kwargs)
+            if previous != self.rating:
+                self.summary_model.apply_change(owner_id, previous, self.rating)
+                self.forget_owner_summary()
+
+    def forget_owner_summary(self):
+        # Drop a summary cached on the owner instance so the next
+        # average_rating() call reads the updated row.
+        owner = self._state.fields_cache.get(self.owner_field)
+        if owner is not None:
+            owner._state.fields_cache.pop('rating_summary', None)
+
+
+class CourseRating(SummarizedRating):
+    owner_field = 'course'
+    summary_model = CourseRatingSummary
+
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='ratings')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='course_ratings')
     rating = models.PositiveIntegerField(choices=[(i, i) for i in range(1, 6)])
@@ -111,7 +221,10 @@ class CourseRating(models.Model):
         return f"{self.user.email} rated {self.course.title} as {self.rating}"
 
 
-class LessonRating(models.Model):
+class LessonRating(SummarizedRating):
+    owner_field = 'lesson'
+    summary_model = LessonRatingSummary
+
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='ratings')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='lesson_ratings')
     rating = models.PositiveIntegerField(choices=[(i, i) for i in range(1, 6)])
@@ -127,9 +240,10 @@ class LessonRating(models.Model):
 
 class LessonAttachment(models.Model):
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='lessons/attachments/', help_text="Upload attachment file")
+    file = models.FileField(upload_to='lessons/attachments/', storage=blob_storage, help_text="Upload attachment file")
     name = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         if not self.name and self.file:
@@ -145,6 +259,7 @@ class Quiz(models.Model):
     title = models.CharField(max_length=255)
     passing_score = models.PositiveIntegerField(default=70, help_text="Passing score percentage (0-100)")
     created_at = models.DateTimeField(auto_now_add=True)
+    answer_key_version = models.PositiveIntegerField(default=0, editable=False, help_text="Bumped whenever the quiz's questions or choices change")
 
     def __str__(self):
         return f"Quiz: {self.title} (Lesson: {self.lesson.title})"
@@ -179,15 +294,76 @@ class QuizAttempt(models.Model):
     completed_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         self.is_passed = self.score >= self.quiz.passing_score
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                QuizLeaderboardEntry.record_attempt(self)
 
     def __str__(self):
         status = "Passed" if self.is_passed else "Failed"
         return f"{self.user.email} - {self.quiz.title}: {self.score}% ({status})"
 
 
-class Banner(models.Model):
+class QuizLeaderboardEntry(models.Model):
+    """
+    A user's first attempt at a quiz, the only one that counts on the
+    leaderboard. Ranked by RANKING (-score, completed_at, attempt id).
+    """
+    RANKING = ('-score', 'completed_at', 'attempt_id')
+
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    attempt = models.OneToOneField(QuizAttempt, on_delete=models.CASCADE, related_name='leaderboard_entry')
+    score = models.PositiveIntegerField()
+    completed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('quiz', 'user')
+        verbose_name_plural = "Quiz Leaderboard Entries"
+        indexes = [
+            models.Index(fields=['quiz', '-score', 'completed_at', 'attempt'], name='leaderboard_rank_idx'),
+        ]
+
+    @classmethod
+    def record_attempt(cls, attempt):
+        # Later attempts by the same user hit the unique (quiz, user) pair
+        cls.objects.bulk_create([
+            cls(
+                quiz_id=attempt.quiz_id,
+                user_id=attempt.user_id,
+                attempt=attempt,
+                score=attempt.score,
+                completed_at=attempt.completed_at,
+            )
+        ], ignore_conflicts=True)
+
+    @classmethod
+    def ranked(cls, quiz):
+        return cls.objects.filter(quiz=quiz).order_by(*cls.RANKING)
+
+    def ahead(self):
+        """Entries of the same quiz ranked above this one."""
+        return QuizLeaderboardEntry.objects.filter(quiz_id=self.quiz_id).filter(
+            models.Q(score__gt=self.score)
+            | models.Q(score=self.score, completed_at__lt=self.completed_at)
+            | models.Q(score=self.score, completed_at=self.completed_at, attempt_id__lt=self.attempt_id)
+        )
+
+    def behind(self):
+        """Entries of the same quiz ranked below this one."""
+        return QuizLeaderboardEntry.objects.filter(quiz_id=self.quiz_id).filter(
+            models.Q(score__lt=self.score)
+            | models.Q(score=self.score, completed_at__gt=self.completed_at)
+            | models.Q(score=self.score, completed_at=self.completed_at, attempt_id__gt=self.attempt_id)
+        )
+
+    def __str__(self):
+        return f"{self.user_id} - quiz {self.quiz_id}: {self.score}%"
+
+
+class Banner(ImageVariantsMixin, models.Model):
     title = models.CharField(max_length=255)
     badge_text = models.CharField(max_length=50, blank=True, default='')
     description = models.TextField()
@@ -199,6 +375,9 @@ class Banner(models.Model):
 
     class Meta:
         ordering = ['order', '-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'order', '-created_at', 'id'], name='banner_active_order_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -218,7 +397,69 @@ class LessonProgress(models.Model):
         return f"{self.user.email} - {self.lesson.title} (Completed: {self.is_completed})"
 
 
-class Badge(models.Model):
+class CourseProgress(models.Model):
+    """
+    Completed and total lesson counts of a user in a course, kept up to
+    date by the lesson completion endpoint and by lesson changes.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='course_progress')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='progress_records')
+    completed_lessons = models.PositiveIntegerField(default=0)
+    total_lessons = models.PositiveIntegerField(default=0)
+    last_completed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('user', 'course')
+        verbose_name_plural = "Course Progresses"
+
+    @property
+    def is_completed(self):
+        return self.total_lessons > 0 and self.completed_lessons >= self.total_lessons
+
+    @property
+    def percent_complete(self):
+        if not self.total_lessons:
+            return 0
+        return min(100, int(self.completed_lessons * 100 / self.total_lessons))
+
+    @classmethod
+    def record_completion(cls, user, course, newly_completed, completed_at=None):
+        """
+        Lock and return the user's progress row for `course`, counting one
+        more completed lesson if `newly_completed`. Must run inside a
+        transaction. The row is created from a one-off count the first time.
+        """
+        progress = cls.objects.select_for_update().filter(user=user, course=course).first()
+        if progress is None:
+            progress = cls(
+                user=user,
+                course=course,
+                total_lessons=Lesson.objects.filter(section__course=course).count(),
+                completed_lessons=LessonProgress.objects.filter(
+                    user=user, lesson__section__course=course, is_completed=True
+                ).count(),
+                last_completed_at=completed_at,
+            )
+            try:
+                with transaction.atomic():
+                    progress.save()
+                return progress
+            except IntegrityError:
+                # Created concurrently by another request; it could not see
+                # this (uncommitted) completion, so fall through and count it.
+                progress = cls.objects.select_for_update().get(user=user, course=course)
+
+        if newly_completed:
+            progress.completed_lessons += 1
+            progress.last_completed_at = completed_at
+            progress.save(update_fields=['completed_lessons', 'last_completed_at'])
+        return progress
+
+    def __str__(self):
+        return f"{self.user.email} - {self.course.title}: {self.completed_lessons}/{self.total_lessons}"
+
+
+class Badge(ImageVariantsMixin, models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
     image = models.ImageField(upload_to='badges/images/', blank=True, null=True)
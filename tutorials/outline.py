@@ -0,0 +1,68 @@
+from django.db.models import F, Prefetch
+from django.utils import timezone
+
+from codewithsathya.response_cache import invalidate_tags
+from tutorials.models import Course, CourseOutline, Lesson, Section
+
+
+def bump_outline_version(*course_ids):
+    course_ids = {course_id for course_id in course_ids if course_id is not None}
+    if course_ids:
+        Course.objects.filter(pk__in=course_ids).update(
+            outline_version=F('outline_version') + 1, updated_at=timezone.now()
+        )
+        # Course detail responses embed the outline
+        invalidate_tags(*(f'course:{course_id}' for course_id in course_ids))
+
+
+def build_course_outline(course):
+    """
+    Serialize the section -> lesson tree of `course` with two queries and
+    store it as the course's outline snapshot.
+    """
+    from tutorials.serializers import OutlineSectionSerializer
+
+    lessons = Lesson.objects.only(
+        'id', 'section_id', 'title', 'slug', 'time', 'order', 'word_count', 'reading_time'
+    )
+    sections = Section.objects.filter(course=course).prefetch_related(Prefetch('lessons', queryset=lessons))
+    data = OutlineSectionSerializer(sections, many=True).data
+
+    outline = CourseOutline(course=course, version=course.outline_version, sections=data)
+    updated = CourseOutline.objects.filter(course=course).update(
+        version=outline.version, sections=data, built_at=timezone.now()
+    )
+    if not updated:
+        CourseOutline.objects.bulk_create([outline], ignore_conflicts=True)
+    course.outline = outline
+    return data
+
+
+def with_view_counts(course, sections):
+    """
+    Add each lesson's current view count to outline `sections`. Snapshots
+    leave the counts out: flushes update them without bumping the outline
+    version, so stored counts would freeze.
+    """
+    views = dict(Lesson.objects.filter(section__course=course).values_list('id', 'views'))
+    return [
+        {**section, 'lessons': [{**lesson, 'views': views.get(lesson['id'], 0)} for lesson in section['lessons']]}
+        for section in sections
+    ]
+
+
+def get_course_outline(course):
+    """
+    Return the serialized sections of `course` with current view counts,
+    rebuilding the snapshot only when its version is behind the course.
+    """
+    try:
+        outline = course.outline
+    except CourseOutline.DoesNotExist:
+        outline = None
+
+    if outline is not None and outline.version == course.outline_version:
+        sections = outline.sections
+    else:
+        sections = build_course_outline(course)
+    return with_view_counts(course, sections)
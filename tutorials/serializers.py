@@ -1,3 +1,4 @@
+from django.urls import reverse
 from rest_framework import serializers
 from tutorials.models import (
     Course,
@@ -13,7 +14,9 @@ from tutorials.models import (
     Banner,
     Badge,
 )
+from codewithsathya.images import SrcsetField
 from users.serializers import UserSerializer
+from tutorials.outline import get_course_outline
 
 class LessonAttachmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -23,21 +26,29 @@ class LessonAttachmentSerializer(serializers.ModelSerializer):
 class LessonListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lesson
-        fields = ('id', 'title', 'slug', 'time', 'order', 'views')
+        fields = ('id', 'title', 'slug', 'time', 'order', 'views', 'word_count', 'reading_time')
 
 class LessonDetailSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     attachments = LessonAttachmentSerializer(many=True, read_only=True)
     average_rating = serializers.ReadOnlyField()
+    media_stream_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Lesson
         fields = (
-            'id', 'title', 'slug', 'description', 'time', 
-            'author', 'media_file', 'video_url', 'views', 'order', 
+            'id', 'title', 'slug', 'description', 'rendered_html', 'plain_text', 'toc',
+            'word_count', 'reading_time', 'time', 'author', 'media_file', 'media_stream_url', 'video_url', 'views', 'order',
             'attachments', 'average_rating'
         )
 
+    def get_media_stream_url(self, obj):
+        if not obj.media_file:
+            return None
+        url = reverse('tutorials:lesson-media', kwargs={'slug': obj.slug})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
 class SectionSerializer(serializers.ModelSerializer):
     lessons = LessonListSerializer(many=True, read_only=True)
 
@@ -45,20 +56,38 @@ class SectionSerializer(serializers.ModelSerializer):
         model = Section
         fields = ('id', 'title', 'slug', 'order', 'lessons')
 
+class OutlineLessonSerializer(serializers.ModelSerializer):
+    # No view count: it would freeze in the snapshot; get_course_outline() adds the current one
+    class Meta:
+        model = Lesson
+        fields = ('id', 'title', 'slug', 'time', 'order', 'word_count', 'reading_time')
+
+class OutlineSectionSerializer(serializers.ModelSerializer):
+    lessons = OutlineLessonSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Section
+        fields = ('id', 'title', 'slug', 'order', 'lessons')
+
 class CourseListSerializer(serializers.ModelSerializer):
     average_rating = serializers.ReadOnlyField()
+    image_srcset = SrcsetField()
 
     class Meta:
         model = Course
-        fields = ('id', 'title', 'slug', 'description', 'level', 'course_time', 'average_rating', 'image')
+        fields = ('id', 'title', 'slug', 'description', 'level', 'course_time', 'average_rating', 'image', 'image_srcset')
 
 class CourseDetailSerializer(serializers.ModelSerializer):
-    sections = SectionSerializer(many=True, read_only=True)
+    sections = serializers.SerializerMethodField()
     average_rating = serializers.ReadOnlyField()
+    image_srcset = SrcsetField()
 
     class Meta:
         model = Course
-        fields = ('id', 'title', 'slug', 'description', 'level', 'course_time', 'average_rating', 'image', 'sections')
+        fields = ('id', 'title', 'slug', 'description', 'level', 'course_time', 'average_rating', 'image', 'image_srcset', 'sections')
+
+    def get_sections(self, obj):
+        return get_course_outline(obj)
 
 
 # Quiz and MCQ Question Serializers
@@ -122,12 +151,16 @@ class LessonRatingResponseSerializer(serializers.ModelSerializer):
 
 
 class BannerSerializer(serializers.ModelSerializer):
+    image_srcset = SrcsetField()
+
     class Meta:
         model = Banner
-        fields = ('id', 'title', 'badge_text', 'description', 'image', 'order', 'is_active', 'created_at')
+        fields = ('id', 'title', 'badge_text', 'description', 'image', 'image_srcset', 'order', 'is_active', 'created_at')
 
 
 class BadgeSerializer(serializers.ModelSerializer):
+    image_srcset = SrcsetField()
+
     class Meta:
         model = Badge
-        fields = ('id', 'name', 'description', 'image', 'course')
+        fields = ('id', 'name', 'description', 'image', 'image_srcset', 'course')
@@ -0,0 +1,217 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from codewithsathya.images import image_variants_built
+from codewithsathya.response_cache import invalidate_tags
+from tutorials.answer_keys import bump_answer_key_version
+from tutorials.models import (
+    Banner,
+    Choice,
+    Course,
+    CourseProgress,
+    CourseRating,
+    Lesson,
+    LessonAttachment,
+    LessonProgress,
+    LessonRating,
+    Question,
+    QuizAttempt,
+    QuizLeaderboardEntry,
+    Section,
+)
+from tutorials.outline import bump_outline_version
+
+
+@receiver(post_delete, sender=CourseRating)
+@receiver(post_delete, sender=LessonRating)
+def remove_rating_from_summary(sender, instance, **kwargs):
+    # Also fires for cascaded deletes (e.g. a user being removed), which
+    # never go through Model.delete().
+    owner_id = getattr(instance, f'{instance.owner_field}_id')
+    instance.summary_model.apply_change(owner_id, old_rating=instance.rating)
+    instance.forget_owner_summary()
+
+
+def section_course_id(section_id):
+    return Section.objects.filter(pk=section_id).values_list('course_id', flat=True).first()
+
+
+# --- Course outline snapshots ---
+
+@receiver(pre_save, sender=Section)
+def remember_previous_course(sender, instance, **kwargs):
+    instance._previous_course_id = None
+    if instance.pk:
+        instance._previous_course_id = Section.objects.filter(pk=instance.pk).values_list('course_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_previous_section(sender, instance, **kwargs):
+    instance._previous_section_id = None
+    if instance.pk:
+        instance._previous_section_id = Lesson.objects.filter(pk=instance.pk).values_list('section_id', flat=True).first()
+
+
+@receiver(post_save, sender=Course)
+def course_outline_changed(sender, instance, created, **kwargs):
+    if not created:
+        bump_outline_version(instance.pk)
+
+
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def section_outline_changed(sender, instance, **kwargs):
+    bump_outline_version(instance.course_id, getattr(instance, '_previous_course_id', None))
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def lesson_outline_changed(sender, instance, **kwargs):
+    course_ids = [section_course_id(instance.section_id)]
+    previous_section_id = getattr(instance, '_previous_section_id', None)
+    if previous_section_id and previous_section_id != instance.section_id:
+        course_ids.append(section_course_id(previous_section_id))
+    bump_outline_version(*course_ids)
+
+
+# --- Content version stamps ---
+
+@receiver(post_save, sender=LessonAttachment)
+@receiver(post_delete, sender=LessonAttachment)
+def lesson_attachments_changed(sender, instance, **kwargs):
+    # Attachments are part of the lesson detail response, so they move its Last-Modified
+    Lesson.objects.filter(pk=instance.lesson_id).update(updated_at=timezone.now())
+
+
+# --- Response cache ---
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_responses_changed(sender, instance, **kwargs):
+    invalidate_tags('courses', f'course:{instance.pk}')
+
+
+@receiver(post_save, sender=CourseRating)
+@receiver(post_delete, sender=CourseRating)
+def course_rating_responses_changed(sender, instance, **kwargs):
+    # Both the list and the detail show the average rating
+    invalidate_tags('courses', f'course:{instance.course_id}')
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def banner_responses_changed(sender, instance, **kwargs):
+    invalidate_tags('banners', f'banner:{instance.pk}')
+
+
+@receiver(image_variants_built, sender=Course)
+def course_image_variants_built(sender, pk, **kwargs):
+    invalidate_tags('courses', f'course:{pk}')
+
+
+@receiver(image_variants_built, sender=Banner)
+def banner_image_variants_built(sender, pk, **kwargs):
+    invalidate_tags('banners', f'banner:{pk}')
+
+
+# --- Quiz answer keys ---
+
+def question_quiz_id(question_id):
+    return Question.objects.filter(pk=question_id).values_list('quiz_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Question)
+def remember_previous_quiz(sender, instance, **kwargs):
+    instance._previous_quiz_id = None
+    if instance.pk:
+        instance._previous_quiz_id = Question.objects.filter(pk=instance.pk).values_list('quiz_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Choice)
+def remember_previous_question(sender, instance, **kwargs):
+    instance._previous_question_id = None
+    if instance.pk:
+        instance._previous_question_id = Choice.objects.filter(pk=instance.pk).values_list('question_id', flat=True).first()
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_answer_key_changed(sender, instance, **kwargs):
+    bump_answer_key_version(instance.quiz_id, getattr(instance, '_previous_quiz_id', None))
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def choice_answer_key_changed(sender, instance, **kwargs):
+    quiz_ids = [question_quiz_id(instance.question_id)]
+    previous_question_id = getattr(instance, '_previous_question_id', None)
+    if previous_question_id and previous_question_id != instance.question_id:
+        quiz_ids.append(question_quiz_id(previous_question_id))
+    bump_answer_key_version(*quiz_ids)
+
+
+# --- Quiz leaderboard ---
+
+@receiver(post_delete, sender=QuizAttempt)
+def promote_next_first_attempt(sender, instance, **kwargs):
+    # If the deleted attempt was the user's leaderboard entry, their next
+    # earliest attempt becomes the first one.
+    if QuizLeaderboardEntry.objects.filter(quiz_id=instance.quiz_id, user_id=instance.user_id).exists():
+        return
+    attempt = (
+        QuizAttempt.objects.filter(quiz_id=instance.quiz_id, user_id=instance.user_id)
+        .order_by('completed_at', 'id')
+        .first()
+    )
+    if attempt:
+        QuizLeaderboardEntry.record_attempt(attempt)
+
+
+# --- Course progress counters ---
+
+def adjust_course_progress(course_id, total_delta, completed_by=(), completed_delta=0):
+    if course_id is None:
+        return
+    if total_delta:
+        CourseProgress.objects.filter(course_id=course_id).update(total_lessons=F('total_lessons') + total_delta)
+    if completed_by:
+        CourseProgress.objects.filter(course_id=course_id, user_id__in=completed_by).update(
+            completed_lessons=F('completed_lessons') + completed_delta
+        )
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_progress_totals_changed(sender, instance, created, **kwargs):
+    course_id = section_course_id(instance.section_id)
+    if created:
+        adjust_course_progress(course_id, 1)
+        return
+
+    previous_section_id = getattr(instance, '_previous_section_id', None)
+    if not previous_section_id or previous_section_id == instance.section_id:
+        return
+    previous_course_id = section_course_id(previous_section_id)
+    if previous_course_id == course_id:
+        return
+
+    # Lesson moved to another course: move its completions along with it
+    completed_by = list(
+        LessonProgress.objects.filter(lesson=instance, is_completed=True).values_list('user_id', flat=True)
+    )
+    adjust_course_progress(previous_course_id, -1, completed_by, -1)
+    adjust_course_progress(course_id, 1, completed_by, 1)
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_progress_total_removed(sender, instance, **kwargs):
+    adjust_course_progress(section_course_id(instance.section_id), -1)
+
+
+@receiver(post_delete, sender=LessonProgress)
+def lesson_completion_removed(sender, instance, **kwargs):
+    # Runs before the lesson row itself is removed in a cascade
+    if instance.is_completed:
+        course_id = Lesson.objects.filter(pk=instance.lesson_id).values_list('section__course_id', flat=True).first()
+        adjust_course_progress(course_id, 0, [instance.user_id], -1)
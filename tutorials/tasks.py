@@ -0,0 +1,7 @@
+from jobs.registry import task
+from tutorials.view_counter import counter_cache_is_shared, flush_lesson_views
+
+
+@task('tutorials.flush_lesson_views', enabled=counter_cache_is_shared)
+def flush_lesson_views_task():
+    return flush_lesson_views()
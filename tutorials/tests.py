@@ -1,11 +1,31 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import zipfile
+from io import BytesIO
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
-from django.db import IntegrityError
+from django.core.cache import cache
+from django.db import IntegrityError, connection
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from PIL import Image
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from codewithsathya.compression import available_encodings, compress as compress_body
+from codewithsathya.images import build_image_variants
+from jobs.models import Job
+from jobs.queue import run_pending, schedule_periodic_jobs
+from codewithsathya.response_cache import (
+    LOCK_KEY, METRIC_KEY, MetricTally, get_response_cache, response_cache_key, response_cache_metrics,
+)
+from codewithsathya.testing import LOCAL_CACHES
+
 from tutorials.models import (
     Course,
     Section,
@@ -19,12 +39,22 @@ from tutorials.models import (
     QuizAttempt,
     Banner,
     LessonProgress,
+    CourseProgress,
     Badge,
     UserBadge,
+    CourseRatingSummary,
+    CourseOutline,
 )
+from tutorials.view_counter import LOCK_KEY as COUNTER_LOCK_KEY, flush_lesson_views, get_counter_cache, pending_views
 
 User = get_user_model()
 
+
+def shared_counter_cache():
+    # The in-memory test cache stands in for one that all processes share
+    return mock.patch('tutorials.view_counter.is_process_local', new=lambda alias: False)
+
+
 class TutorialModelTests(TestCase):
 
     def setUp(self):
@@ -72,6 +102,40 @@ class TutorialModelTests(TestCase):
         self.assertEqual(section.slug, 'vuejs-directives')
         self.assertEqual(lesson.slug, 'v-bind-directive')
 
+    def test_duplicate_titles_get_sequential_slugs(self):
+        course = Course.objects.create(title='Intro', description='d', course_time=10)
+        section = Section.objects.create(course=course, title='Intro')
+        lessons = [Lesson.objects.create(section=section, title='Introduction', description='d', time=1) for _ in range(3)]
+        self.assertEqual([l.slug for l in lessons], ['introduction', 'introduction-1', 'introduction-2'])
+
+        # A single prefix query per save, however many collisions exist
+        with self.assertNumQueries(1):
+            slug = Lesson.assign_slugs([Lesson(title='Introduction')])[0].slug
+        self.assertEqual(slug, 'introduction-3')
+
+    def test_bulk_create_allocates_unique_slugs(self):
+        course = Course.objects.create(title='Bulk', description='d', course_time=10)
+        section = Section.objects.create(course=course, title='Bulk section')
+        Lesson.objects.create(section=section, title='Introduction', description='d', time=1)
+
+        lessons = [Lesson(section=section, title='Introduction', description='d', time=1) for _ in range(50)]
+        with self.assertNumQueries(2):
+            Lesson.objects.bulk_create(lessons)
+
+        slugs = set(Lesson.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), 51)
+        self.assertIn('introduction-50', slugs)
+
+    def test_save_retries_when_slug_is_taken_concurrently(self):
+        course = Course.objects.create(title='Race', description='d', course_time=10)
+        Course.objects.filter(pk=course.pk).update(slug='race-1')
+        Course.objects.create(title='Race', description='d', course_time=10, slug='race')
+
+        # Simulate competing inserts that the prefix query did not see
+        with mock.patch('codewithsathya.slugs.next_free_suffix', return_value=0):
+            course = Course.objects.create(title='Race', description='d', course_time=10)
+        self.assertEqual(course.slug, 'race-2')
+
     def test_lesson_video_url_field(self):
         course = Course.objects.create(
             title='Vue.js Basics',
@@ -298,6 +362,8 @@ class TutorialModelTests(TestCase):
 class TutorialAPITests(APITestCase):
 
     def setUp(self):
+        cache.clear()
+        get_response_cache().clear()
         self.user = User.objects.create_user(
             username='author@example.com',
             email='author@example.com',
@@ -334,8 +400,24 @@ class TutorialAPITests(APITestCase):
         url = reverse('tutorials:lesson-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['slug'], self.lesson.slug)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['slug'], self.lesson.slug)
+
+    def test_list_lessons_cursor_pagination_with_duplicate_order(self):
+        for i in range(4):
+            Lesson.objects.create(section=self.section, title=f'Paged lesson {i}', description='d', time=5, order=1)
+
+        url = reverse('tutorials:lesson-list') + '?page_size=2'
+        slugs = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            slugs.extend(item['slug'] for item in response.data['results'])
+            url = response.data['next']
+
+        expected = list(Lesson.objects.order_by('order', 'id').values_list('slug', flat=True))
+        self.assertEqual(slugs, expected)
+        self.assertEqual(len(slugs), 5)
 
     def test_get_course_details_by_slug(self):
         url = reverse('tutorials:course-detail', kwargs={'slug': self.course.slug})
@@ -345,6 +427,247 @@ class TutorialAPITests(APITestCase):
         self.assertEqual(len(response.data['sections']), 1)
         self.assertEqual(response.data['sections'][0]['slug'], self.section.slug)
 
+    def test_course_details_served_from_outline_snapshot(self):
+        # Authenticated reads bypass the response cache
+        self.client.force_authenticate(user=self.user2)
+        url = reverse('tutorials:course-detail', kwargs={'slug': self.course.slug})
+        self.client.get(url)
+
+        # Warm snapshot: the course row, then the lessons' view counts
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.data['sections'][0]['lessons'][0]['slug'], self.lesson.slug)
+        # The stored snapshot itself carries no counts, which would freeze there
+        self.assertNotIn('views', CourseOutline.objects.get(course=self.course).sections[0]['lessons'][0])
+
+        # Flushed views show up without a rebuild
+        Lesson.objects.filter(pk=self.lesson.pk).update(views=7)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.data['sections'][0]['lessons'][0]['views'], 7)
+
+        # Adding a lesson rebuilds the snapshot on the next read
+        second_section = Section.objects.create(course=self.course, title='Throttling', order=2)
+        Lesson.objects.create(section=second_section, title='Rate limits', description='d', time=5, order=1)
+        response = self.client.get(url)
+        self.assertEqual([s['title'] for s in response.data['sections']], ['Authentication & Permissions', 'Throttling'])
+        self.assertEqual(response.data['sections'][1]['lessons'][0]['title'], 'Rate limits')
+
+        # Moving a lesson to another course refreshes both outlines
+        other_course = Course.objects.create(title='Other', description='d', course_time=5)
+        other_section = Section.objects.create(course=other_course, title='Other section')
+        self.lesson.section = other_section
+        self.lesson.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data['sections'][0]['lessons'], [])
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_course_outline_build_uses_fixed_queries(self):
+        cache.clear()
+        get_response_cache().clear()
+        for i in range(5):
+            section = Section.objects.create(course=self.course, title=f'Extra section {i}', order=i + 2)
+            Lesson.objects.create(section=section, title=f'Extra lesson {i}', description='d', time=5)
+
+        url = reverse('tutorials:course-detail', kwargs={'slug': self.course.slug})
+        # course, sections, lessons, the snapshot update and insert, then view counts
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['sections']), 6)
+
+    def test_course_detail_conditional_get(self):
+        self.client.force_authenticate(user=self.user2)
+        url = reverse('tutorials:course-detail', kwargs={'slug': self.course.slug})
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        # Only the course row is read; nothing is serialized
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        # Editing the outline or rating the course changes the validator
+        Lesson.objects.create(section=self.section, title='Sessions', description='d', time=5, order=2)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        CourseRating.objects.create(course=self.course, user=self.user2, rating=4)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_anonymous_course_reads_are_cached_until_invalidated(self):
+        cache.clear()
+        get_response_cache().clear()
+        list_url = reverse('tutorials:course-list')
+        detail_url = reverse('tutorials:course-detail', kwargs={'slug': self.course.slug})
+        other = Course.objects.create(title='Celery', description='d', course_time=5)
+        other_url = reverse('tutorials:course-detail', kwargs={'slug': other.slug})
+        for url in (list_url, detail_url, other_url):
+            self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(detail_url)
+            etag = response['ETag']
+            self.assertEqual(response.data['sections'][0]['slug'], self.section.slug)
+            self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(len(self.client.get(list_url).data['results']), 2)
+
+        # A lesson edit purges this course's detail only
+        Lesson.objects.create(section=self.section, title='Sessions', description='d', time=5, order=2)
+        with self.assertNumQueries(0):
+            self.client.get(list_url)
+            self.client.get(other_url)
+        response = self.client.get(detail_url)
+        self.assertEqual(len(response.data['sections'][0]['lessons']), 2)
+
+        # A rating changes both the list and the detail
+        CourseRating.objects.create(course=self.course, user=self.user2, rating=5)
+        response = self.client.get(list_url)
+        ratings = {item['slug']: item['average_rating'] for item in response.data['results']}
+        self.assertEqual(ratings[self.course.slug], 5.0)
+        self.assertEqual(self.client.get(detail_url).data['average_rating'], 5.0)
+
+    def test_response_cache_is_kept_per_host_and_scheme(self):
+        url = reverse('tutorials:course-list')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        # Bodies carry absolute links, so another origin gets its own entry
+        response = self.client.get(url, HTTP_HOST='backend.codewithsathya.in')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url, secure=True)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url, secure=True)['X-Cache'], 'HIT')
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    @mock.patch('codewithsathya.response_cache.metric_tally', new=MetricTally())
+    def test_purged_entry_is_served_stale_while_another_worker_rebuilds(self):
+        cache.clear()
+        get_response_cache().clear()
+        url = reverse('tutorials:course-detail', kwargs={'slug': self.course.slug})
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.course.title = 'DRF in depth'
+        self.course.save()
+
+        key = response_cache_key('CourseViewSet', 'retrieve', 'application/json', f'http://testserver{url}')
+        get_response_cache().add(LOCK_KEY.format(key), True)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertEqual(response.data['title'], 'Django REST Framework')
+
+        get_response_cache().delete(LOCK_KEY.format(key))
+        response = self.client.get(url)
+        self.assertEqual((response['X-Cache'], response.data['title']), ('MISS', 'DRF in depth'))
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        self.assertEqual(response_cache_metrics(), {'hit': 1, 'miss': 2, 'stale': 1, 'coalesced': 0})
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    @mock.patch('codewithsathya.response_cache.metric_tally', new=MetricTally())
+    def test_missing_entry_waits_for_the_worker_rebuilding_it(self):
+        cache.clear()
+        get_response_cache().clear()
+        url = reverse('tutorials:course-list')
+        self.client.get(url)
+        responses = get_response_cache()
+        key = response_cache_key('CourseViewSet', 'list', 'application/json', f'http://testserver{url}')
+        entry = responses.get(key)
+        responses.delete(key)
+        responses.add(LOCK_KEY.format(key), True)
+
+        # The other worker finishes while this request is polling
+        def finish_rebuild(seconds):
+            responses.set(key, entry)
+            responses.delete(LOCK_KEY.format(key))
+
+        with mock.patch('codewithsathya.response_cache.time.sleep', side_effect=finish_rebuild):
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'COALESCED')
+        self.assertEqual(response.data['results'][0]['slug'], self.course.slug)
+        self.assertEqual(response_cache_metrics()['coalesced'], 1)
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    @mock.patch('codewithsathya.response_cache.metric_tally', new=MetricTally())
+    def test_cache_hits_are_tallied_in_process(self):
+        get_response_cache().clear()
+        url = reverse('tutorials:course-list')
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        # Nothing shared is written per response
+        self.assertIsNone(get_response_cache().get(METRIC_KEY.format('hit')))
+        self.assertEqual(response_cache_metrics(), {'hit': 1, 'miss': 1, 'stale': 0, 'coalesced': 0})
+
+        # Once the interval is up, the tally is added to the shared counters
+        with self.settings(RESPONSE_CACHE_METRICS_INTERVAL=0):
+            self.client.get(url)
+        self.assertEqual(get_response_cache().get(METRIC_KEY.format('hit')), 2)
+        self.assertEqual(response_cache_metrics(), {'hit': 2, 'miss': 1, 'stale': 0, 'coalesced': 0})
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'responses': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(tempfile.gettempdir(), 'codewithsathya-test-responses'),
+        },
+    })
+    def test_response_cache_on_file_based_backend(self):
+        get_response_cache().clear()
+        url = reverse('tutorials:banner-list')
+        Banner.objects.create(title='Sale', description='d', order=1)
+        self.assertEqual(len(self.client.get(url).data['results']), 1)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        Banner.objects.create(title='Launch', description='d', order=2)
+        self.assertEqual(len(self.client.get(url).data['results']), 2)
+        get_response_cache().clear()
+
+    def test_list_conditional_get_tracks_membership(self):
+        url = reverse('tutorials:course-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Another page of the same list has its own validator
+        self.assertEqual(self.client.get(url + '?page_size=1', HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+        Course.objects.create(title='Celery', description='d', course_time=5).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        Course.objects.create(title='Celery', description='d', course_time=5)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_list_page_is_validated_from_its_own_rows(self):
+        url = reverse('tutorials:lesson-list') + '?page_size=1'
+        etag = self.client.get(url)['ETag']
+        # No aggregate over the whole list: the page's query is the only one
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # A row past the page gives it a next link, and so a new validator
+        Lesson.objects.create(section=self.section, title='Sessions', description='d', time=5, order=99)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_lesson_detail_conditional_get_still_counts_views(self):
+        url = reverse('tutorials:lesson-detail', kwargs={'slug': self.lesson.slug})
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        flush_lesson_views()
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.views, 2)
+
+        LessonAttachment.objects.create(lesson=self.lesson, file='lessons/attachments/notes.pdf')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['attachments']), 1)
+
     def test_get_sections_under_course(self):
         url = reverse('tutorials:course-sections', kwargs={'slug': self.course.slug})
         response = self.client.get(url)
@@ -387,9 +710,141 @@ class TutorialAPITests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.data['views'], 2)
 
-        # Verify database is updated
+        # Verify database is updated once the buffered views are flushed
+        flush_lesson_views()
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.views, 2)
+
+    @shared_counter_cache()
+    def test_lesson_views_are_buffered_between_flushes(self):
+        other = Lesson.objects.create(section=self.section, title='Refresh tokens', description='d', time=5)
+        url = reverse('tutorials:lesson-detail', kwargs={'slug': self.lesson.slug})
+        other_url = reverse('tutorials:lesson-detail', kwargs={'slug': other.slug})
+
+        for _ in range(4):
+            self.client.get(url)
+        self.client.get(other_url)
+
+        # Reads do not write to the lesson rows; the periodic job does
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.views, 0)
+        self.assertEqual(pending_views(self.lesson.pk), 4)
+        response = self.client.get(url)
+        self.assertEqual(response.data['views'], 5)
+
+        # One UPDATE for both lessons
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(flush_lesson_views(), 2)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE')]), 1)
+        self.lesson.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.lesson.views, other.views), (5, 1))
+        self.assertEqual(pending_views(self.lesson.pk), 0)
+        self.assertEqual(flush_lesson_views(), 0)
+
+    @shared_counter_cache()
+    def test_flush_skips_its_round_while_another_holds_the_lock(self):
+        self.client.get(reverse('tutorials:lesson-detail', kwargs={'slug': self.lesson.slug}))
+        get_counter_cache().add(COUNTER_LOCK_KEY, True)
+        self.assertEqual(flush_lesson_views(), 0)
+        self.assertEqual(pending_views(self.lesson.pk), 1)
+
+        get_counter_cache().delete(COUNTER_LOCK_KEY)
+        self.assertEqual(flush_lesson_views(), 1)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.views, 1)
+
+    @shared_counter_cache()
+    def test_views_counted_during_a_flush_stay_buffered(self):
+        url = reverse('tutorials:lesson-detail', kwargs={'slug': self.lesson.slug})
+        self.client.get(url)
+        self.client.get(url)
+        counter_cache = get_counter_cache()
+        read_counters = counter_cache.get_many
+
+        def read_then_count_a_view(keys):
+            counts = read_counters(keys)
+            # Another worker counts a view between the flush's read and its decrement
+            self.client.get(url)
+            return counts
+
+        with mock.patch.object(counter_cache, 'get_many', side_effect=read_then_count_a_view):
+            self.assertEqual(flush_lesson_views(), 1)
         self.lesson.refresh_from_db()
         self.assertEqual(self.lesson.views, 2)
+        self.assertEqual(pending_views(self.lesson.pk), 1)
+
+        flush_lesson_views()
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.views, 3)
+
+    def test_views_skip_a_cache_without_atomic_increments(self):
+        url = reverse('tutorials:lesson-detail', kwargs={'slug': self.lesson.slug})
+        with tempfile.TemporaryDirectory() as location:
+            file_cache = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+            with override_settings(CACHES={**LOCAL_CACHES, 'default': file_cache}):
+                self.assertEqual(self.client.get(url).data['views'], 1)
+                self.assertEqual(self.client.get(url).data['views'], 2)
+                self.assertEqual(pending_views(self.lesson.pk), 0)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.views, 2)
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_process_local_view_counters_are_flushed_from_requests(self):
+        cache.clear()
+        url = reverse('tutorials:lesson-detail', kwargs={'slug': self.lesson.slug})
+
+        # The job worker could not see this process's counters, so it is not scheduled
+        schedule_periodic_jobs()
+        self.assertFalse(Job.objects.filter(name='tutorials.flush_lesson_views').exists())
+
+        # The first hit of each interval flushes instead
+        self.client.get(url)
+        self.client.get(url)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.views, 1)
+        self.assertEqual(pending_views(self.lesson.pk), 1)
+
+    @shared_counter_cache()
+    def test_shared_view_counters_are_flushed_by_the_job(self):
+        schedule_periodic_jobs()
+        self.assertTrue(Job.objects.filter(name='tutorials.flush_lesson_views').exists())
+
+    def test_lesson_detail_is_precompressed_once_per_version(self):
+        self.lesson.description = '<p>' + 'Signing keys and claims. ' * 200 + '</p>'
+        self.lesson.save()
+        url = reverse('tutorials:lesson-detail', kwargs={'slug': self.lesson.slug})
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/'))
+        body = json.loads(gzip.decompress(response.content))
+        self.assertEqual(body['title'], self.lesson.title)
+
+        with mock.patch('codewithsathya.compression.compress') as compress:
+            again = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            compress.assert_not_called()
+        self.assertEqual(again.content, response.content)
+        # Another origin gets bodies with its own absolute links
+        with mock.patch('codewithsathya.compression.compress', wraps=compress_body) as recompress:
+            self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_HOST='backend.codewithsathya.in')
+            self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', secure=True)
+            self.assertEqual(recompress.call_count, 2 * len(available_encodings()))
+        self.assertEqual(
+            self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        # Clients without gzip, and small bodies, are served plain JSON
+        self.assertNotIn('Content-Encoding', self.client.get(url))
+        self.assertNotIn('Content-Encoding', self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity'))
+
+        # An edit produces a new compressed version
+        self.lesson.description = '<p>' + 'Rotating refresh tokens. ' * 200 + '</p>'
+        self.lesson.save()
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIn('Rotating', json.loads(gzip.decompress(response.content))['plain_text'])
 
     def test_get_quiz_by_lesson_slug(self):
         quiz = Quiz.objects.create(lesson=self.lesson, title="DRF JWT Quiz", passing_score=80)
@@ -447,6 +902,40 @@ class TutorialAPITests(APITestCase):
         self.assertEqual(response.data['score'], 100)
         self.assertTrue(response.data['is_passed'])
 
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_quiz_attempt_grades_from_cached_answer_key(self):
+        cache.clear()
+        get_response_cache().clear()
+        quiz = Quiz.objects.create(lesson=self.lesson, title="Cached Quiz", passing_score=50)
+        questions = [Question.objects.create(quiz=quiz, text=f"Q{i}", order=i) for i in range(10)]
+        correct = [Choice.objects.create(question=q, text="right", is_correct=True) for q in questions]
+        for q in questions:
+            Choice.objects.create(question=q, text="wrong", is_correct=False)
+
+        url = reverse('tutorials:quiz-attempt', kwargs={'pk': quiz.id})
+        self.client.force_authenticate(user=self.user)
+        payload = {"answers": [{"question_id": q.id, "choice_id": c.id} for q, c in zip(questions, correct)]}
+        self.client.post(url, payload, format='json')
+
+        # Warm key: load the quiz and record the attempt, nothing per answer
+        # (savepoint, attempt insert, leaderboard insert, release)
+        with self.assertNumQueries(5):
+            response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.data['score'], 100)
+
+        # Invalid submissions are still rejected with the same messages
+        response = self.client.post(url, {"answers": [{"question_id": questions[0].id, "choice_id": correct[1].id}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], f"Choice {correct[1].id} does not belong to Question {questions[0].id}.")
+        response = self.client.post(url, {"answers": [{"question_id": 0, "choice_id": correct[0].id}]}, format='json')
+        self.assertEqual(response.data['detail'], "Question 0 does not belong to this quiz.")
+
+        # Editing a choice invalidates the compiled key
+        correct[0].is_correct = False
+        correct[0].save()
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.data['score'], 90)
+
     def test_quiz_leaderboard_first_attempt_only(self):
         quiz = Quiz.objects.create(lesson=self.lesson, title="Leaderboard Quiz", passing_score=50)
         q = Question.objects.create(quiz=quiz, text="Q", order=1)
@@ -479,6 +968,49 @@ class TutorialAPITests(APITestCase):
         self.assertEqual(response.data[1]['user_id'], self.user.id)
         self.assertEqual(response.data[1]['score'], 50)
 
+    def test_quiz_leaderboard_pages_and_my_rank(self):
+        quiz = Quiz.objects.create(lesson=self.lesson, title="Ranked Quiz", passing_score=50)
+        users = [
+            User.objects.create_user(username=f'r{i}@example.com', email=f'r{i}@example.com', password='pw')
+            for i in range(6)
+        ]
+        for user, score in zip(users, [90, 70, 70, 50, 30, 10]):
+            QuizAttempt.objects.create(user=user, quiz=quiz, score=score)
+        QuizAttempt.objects.create(user=users[5], quiz=quiz, score=100)  # not a first attempt
+
+        url = reverse('tutorials:quiz-leaderboard', kwargs={'pk': quiz.id})
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'limit': 2, 'offset': 1})
+        self.assertEqual([row['rank'] for row in response.data], [2, 3])
+        # Equal scores keep the earlier attempt first
+        self.assertEqual([row['user_id'] for row in response.data], [users[1].id, users[2].id])
+
+        me_url = reverse('tutorials:quiz-my-rank', kwargs={'pk': quiz.id})
+        self.client.force_authenticate(user=users[2])
+        # quiz, own entry, rank count, entries above, entries below
+        with self.assertNumQueries(5):
+            response = self.client.get(me_url, {'neighbours': 1})
+        self.assertEqual(response.data['rank'], 3)
+        self.assertEqual(
+            [(row['rank'], row['user_id']) for row in response.data['neighbours']],
+            [(2, users[1].id), (3, users[2].id), (4, users[3].id)]
+        )
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(me_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deleting_first_attempt_promotes_the_next_one(self):
+        quiz = Quiz.objects.create(lesson=self.lesson, title="Retry Quiz", passing_score=50)
+        first = QuizAttempt.objects.create(user=self.user, quiz=quiz, score=20)
+        QuizAttempt.objects.create(user=self.user, quiz=quiz, score=60)
+        first.delete()
+
+        url = reverse('tutorials:quiz-leaderboard', kwargs={'pk': quiz.id})
+        response = self.client.get(url)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['score'], 60)
+
     def test_quiz_attempt_unauthorized(self):
         quiz = Quiz.objects.create(lesson=self.lesson, title="Unauthorized Test Quiz", passing_score=75)
         url = reverse('tutorials:quiz-attempt', kwargs={'pk': quiz.id})
@@ -713,6 +1245,54 @@ class TutorialRatingAPITests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_rating_summary_follows_rate_actions(self):
+        url = reverse('tutorials:course-rate', kwargs={'slug': self.course.slug})
+        other = User.objects.create_user(
+            username='other@example.com',
+            email='other@example.com',
+            password='password123'
+        )
+        CourseRating.objects.create(course=self.course, user=other, rating=2)
+
+        self.client.force_authenticate(user=self.user)
+        self.client.post(url, {'rating': 5}, format='json')
+        summary = CourseRatingSummary.objects.get(course=self.course)
+        self.assertEqual((summary.rating_count, summary.rating_sum), (2, 7))
+        self.assertEqual(summary.star_counts(), {1: 0, 2: 1, 3: 0, 4: 0, 5: 1})
+
+        self.client.patch(url, {'rating': 3}, format='json')
+        summary.refresh_from_db()
+        self.assertEqual((summary.rating_count, summary.rating_sum), (2, 5))
+        self.assertEqual(summary.star_3, 1)
+        self.assertEqual(summary.star_5, 0)
+
+        self.client.delete(url)
+        summary.refresh_from_db()
+        self.assertEqual((summary.rating_count, summary.rating_sum), (1, 2))
+
+        # Cascaded deletes keep the summary in step as well
+        other.delete()
+        summary.refresh_from_db()
+        self.assertEqual((summary.rating_count, summary.rating_sum), (0, 0))
+        self.assertEqual(self.course.average_rating(), 0.0)
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_course_list_does_not_aggregate_per_course(self):
+        cache.clear()
+        get_response_cache().clear()
+        for i in range(3):
+            course = Course.objects.create(title=f'Course {i}', description='d', course_time=10)
+            CourseRating.objects.create(course=course, user=self.user, rating=4)
+
+        url = reverse('tutorials:course-list')
+        # Only the page itself; its conditional-GET validator comes from the same rows
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ratings = {item['title']: item['average_rating'] for item in response.data['results']}
+        self.assertEqual(ratings['Course 0'], 4.0)
+        self.assertEqual(ratings[self.course.title], 0.0)
+
 
 class BannerAPITests(APITestCase):
 
@@ -749,15 +1329,227 @@ class BannerAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
         # Should return only active banners
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
         
         # Verify ordering (order=1 should come first: Banner 2, then order=2: Banner 1)
-        self.assertEqual(response.data[0]['title'], "Banner 2")
-        self.assertEqual(response.data[1]['title'], "Banner 1")
+        self.assertEqual(response.data['results'][0]['title'], "Banner 2")
+        self.assertEqual(response.data['results'][1]['title'], "Banner 1")
         
         # Check payload fields
-        self.assertEqual(response.data[0]['badge_text'], "Trending")
-        self.assertIn('image', response.data[0])
+        self.assertEqual(response.data['results'][0]['badge_text'], "Trending")
+        self.assertIn('image', response.data['results'][0])
+
+
+def png_upload(name, size=(800, 400), mode='RGB'):
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMAGE_VARIANT_WIDTHS=(320, 640, 1024))
+class ImageVariantTests(APITestCase):
+
+    def setUp(self):
+        get_response_cache().clear()
+        self.course = Course.objects.create(title="Images", description="d", course_time=10, image=png_upload("cover.png"))
+
+    def test_build_writes_narrower_variants(self):
+        variants = build_image_variants(Course, self.course.pk)
+        self.course.refresh_from_db()
+
+        self.assertEqual(self.course.image_variants, variants)
+        self.assertEqual(variants['source'], self.course.image.name)
+        # 1024 is wider than the 800px original
+        self.assertEqual(set(variants['formats']), {'webp', 'jpeg'})
+        self.assertEqual(set(variants['formats']['webp']), {'320', '640'})
+
+        storage = self.course.image.storage
+        with storage.open(variants['formats']['jpeg']['320']) as handle:
+            self.assertEqual(Image.open(handle).size, (320, 160))
+
+    def test_unreadable_image_records_no_variants(self):
+        banner = Banner.objects.create(
+            title="Broken", image=SimpleUploadedFile("broken.png", b"not an image", content_type="image/png")
+        )
+        with self.assertLogs('codewithsathya.images', level='WARNING'):
+            variants = build_image_variants(Banner, banner.pk)
+        self.assertEqual(variants['formats'], {})
+        banner.refresh_from_db()
+        self.assertEqual(banner.image_variants['source'], banner.image.name)
+
+    def test_save_queues_build_only_when_image_changes(self):
+        jobs = Job.objects.filter(name='images.build_variants')
+        self.assertEqual(list(jobs.values_list('kwargs', flat=True)), [{'model': 'tutorials.Course', 'pk': self.course.pk}])
+        self.assertEqual(run_pending(), 1)
+        self.course.refresh_from_db()
+        old_names = list(self.course.image_variants['formats']['webp'].values())
+
+        self.course.title = "Renamed"
+        self.course.save()
+        self.assertFalse(jobs.filter(status='queued').exists())
+
+        self.course.image = png_upload("new-cover.png")
+        self.course.save()
+        self.assertEqual(jobs.filter(status='queued').count(), 1)
+
+        run_pending()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.image_variants['source'], self.course.image.name)
+        storage = self.course.image.storage
+        self.assertFalse(any(storage.exists(name) for name in old_names))
+
+    def test_srcset_in_course_detail(self):
+        build_image_variants(Course, self.course.pk)
+        response = self.client.get(reverse('tutorials:course-detail', kwargs={'slug': self.course.slug}))
+
+        srcset = response.data['image_srcset']
+        self.assertEqual(set(srcset), {'webp', 'jpeg'})
+        entries = srcset['webp'].split(', ')
+        self.assertEqual(len(entries), 2)
+        self.assertTrue(entries[0].startswith('http://testserver/'))
+        self.assertTrue(entries[0].endswith(' 320w'))
+        self.assertTrue(entries[1].endswith(' 640w'))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), MEDIA_STREAM_CHUNK_SIZE=64)
+class LessonMediaTests(APITestCase):
+
+    def setUp(self):
+        get_response_cache().clear()
+        self.body = bytes(range(256)) * 4
+        course = Course.objects.create(title="Media", description="d", course_time=10)
+        section = Section.objects.create(course=course, title="Video", order=1)
+        self.lesson = Lesson.objects.create(
+            section=section, title="Streaming", description="d", time=5,
+            media_file=SimpleUploadedFile("clip.mp4", self.body, content_type="video/mp4"),
+        )
+        self.url = reverse('tutorials:lesson-media', kwargs={'slug': self.lesson.slug})
+
+    def test_full_file_is_streamed(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='video/*')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Length'], str(len(self.body)))
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-299')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-299/{len(self.body)}')
+        self.assertEqual(b''.join(response.streaming_content), self.body[100:300])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.body[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=1000-')
+        self.assertEqual(response['Content-Range'], f'bytes 1000-1023/{len(self.body)}')
+        self.assertEqual(b''.join(response.streaming_content), self.body[1000:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.body)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.body)}')
+
+    def test_stale_if_range_gets_whole_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_sendfile_handoff(self):
+        with self.settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect', MEDIA_SENDFILE_PREFIX='/protected/'):
+            response = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/' + self.lesson.media_file.name)
+        self.assertEqual(response.content, b'')
+
+        with self.settings(MEDIA_SENDFILE_HEADER='X-Sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.lesson.media_file.path)
+
+    def test_missing_media(self):
+        self.lesson.media_file = None
+        self.lesson.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['detail'], "Media file not found for this lesson.")
+
+    def test_detail_links_stream_url(self):
+        response = self.client.get(reverse('tutorials:lesson-detail', kwargs={'slug': self.lesson.slug}))
+        self.assertEqual(response.data['media_stream_url'], 'http://testserver' + self.url)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), ATTACHMENT_BUNDLE_CACHE_DIR=None)
+class LessonAttachmentBundleTests(APITestCase):
+
+    def setUp(self):
+        course = Course.objects.create(title="Bundles", description="d", course_time=10)
+        section = Section.objects.create(course=course, title="Files", order=1)
+        self.lesson = Lesson.objects.create(section=section, title="Downloads", description="d", time=5)
+        self.first = LessonAttachment.objects.create(
+            lesson=self.lesson, name="notes.txt", file=SimpleUploadedFile("notes.txt", b"lesson notes" * 1000)
+        )
+        self.second = LessonAttachment.objects.create(
+            lesson=self.lesson, name="notes.txt", file=SimpleUploadedFile("code.py", b"print('hi')\n")
+        )
+        self.url = reverse('tutorials:lesson-attachments-zip', kwargs={'slug': self.lesson.slug})
+
+    def read_zip(self, response):
+        return zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+
+    def test_streams_zip_of_attachments(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('attachment', response['Content-Disposition'])
+
+        archive = self.read_zip(response)
+        self.assertIsNone(archive.testzip())
+        # Clashing names are numbered
+        self.assertEqual(archive.namelist(), ['notes.txt', 'notes (2).txt'])
+        self.assertEqual(archive.read('notes.txt'), b"lesson notes" * 1000)
+        self.assertEqual(archive.read('notes (2).txt'), b"print('hi')\n")
+
+    def test_etag_follows_attachment_set(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.second.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.read_zip(response).namelist(), ['notes.txt'])
+
+    def test_bundle_cached_on_disk(self):
+        cache_dir = tempfile.mkdtemp()
+        with self.settings(ATTACHMENT_BUNDLE_CACHE_DIR=cache_dir):
+            streamed = b''.join(self.client.get(self.url).streaming_content)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            with mock.patch('tutorials.attachment_bundles.stream_zip') as stream_zip:
+                response = self.client.get(self.url)
+                self.assertEqual(b''.join(response.streaming_content), streamed)
+                stream_zip.assert_not_called()
+            self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+            self.first.name = "renamed.txt"
+            self.first.save()
+            b''.join(self.client.get(self.url).streaming_content)
+            # The superseded bundle is removed
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+    def test_lesson_without_attachments(self):
+        LessonAttachment.objects.all().delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['detail'], "No attachments for this lesson.")
 
 
 class GamificationAPITests(APITestCase):
@@ -875,3 +1667,33 @@ class GamificationAPITests(APITestCase):
         anon_all_response = self.client.get(all_badges_url)
         self.assertEqual(anon_all_response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_course_progress_counters_follow_lesson_changes(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.post(reverse('tutorials:lesson-complete', kwargs={'slug': self.lesson1.slug}))
+        progress = CourseProgress.objects.get(user=self.user, course=self.course)
+        self.assertEqual((progress.completed_lessons, progress.total_lessons), (1, 2))
+
+        # New lessons raise the total for everyone in the course
+        lesson3 = Lesson.objects.create(section=self.section, title='Extra', description='d', time=5, order=3)
+        progress.refresh_from_db()
+        self.assertEqual(progress.total_lessons, 3)
+
+        # Completion check and badge lookup no longer scale with the course
+        url = reverse('tutorials:lesson-complete', kwargs={'slug': self.lesson2.slug})
+        with self.assertNumQueries(10):
+            response = self.client.post(url)
+        self.assertFalse(response.data['course_completed'])
+
+        # Removing the only unfinished lesson completes the course
+        lesson3.delete()
+        progress.refresh_from_db()
+        self.assertEqual((progress.completed_lessons, progress.total_lessons), (2, 2))
+        response = self.client.post(reverse('tutorials:lesson-complete', kwargs={'slug': self.lesson1.slug}))
+        self.assertTrue(response.data['course_completed'])
+        self.assertIsNotNone(response.data['badge_earned'])
+
+        # Deleting a completed lesson removes it from both counters
+        self.lesson1.delete()
+        progress.refresh_from_db()
+        self.assertEqual((progress.completed_lessons, progress.total_lessons), (1, 1))
+
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from tutorials.views import CourseViewSet, SectionViewSet, LessonViewSet, QuizViewSet, BannerViewSet, BadgeViewSet
+from tutorials.views import CourseViewSet, SectionViewSet, LessonViewSet, QuizViewSet, BannerViewSet, BadgeViewSet, lesson_media, lesson_attachments_zip
 
 app_name = 'tutorials'
 
@@ -13,5 +13,7 @@ router.register('banners', BannerViewSet, basename='banner')
 router.register('badges', BadgeViewSet, basename='badge')
 
 urlpatterns = [
+    path('lessons/<slug:slug>/media/', lesson_media, name='lesson-media'),
+    path('lessons/<slug:slug>/attachments.zip', lesson_attachments_zip, name='lesson-attachments-zip'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Case, F, Value, When
+
+from codewithsathya.caching import has_atomic_counters, is_process_local
+
+from tutorials.models import Lesson
+
+COUNTER_KEY = 'lesson-views:{}'
+LOCK_KEY = 'lesson-views:lock'
+FLUSHED_KEY = 'lesson-views:flushed'
+# Counters read with one get_many() and written with one UPDATE per batch
+FLUSH_BATCH_SIZE = 500
+LOCK_TIMEOUT = 60
+
+
+def counter_cache_alias():
+    return getattr(settings, 'LESSON_VIEW_COUNTER_CACHE', 'default')
+
+
+def get_counter_cache():
+    return caches[counter_cache_alias()]
+
+
+def views_are_buffered():
+    """
+    Views are buffered only in a cache whose incr()/decr() are atomic; on
+    any other backend concurrent hits would overwrite each other's counts.
+    """
+    return has_atomic_counters(counter_cache_alias())
+
+
+def counter_cache_is_shared():
+    """A job worker can only flush counters it can see, i.e. in a shared cache."""
+    return views_are_buffered() and not is_process_local(counter_cache_alias())
+
+
+def record_view(lesson_id):
+    """
+    Count one view of a lesson and return the number of views not yet
+    written to `Lesson.views`. Never waits on a lock: the count is one
+    atomic increment, and the flush finds it by the lesson's key.
+    """
+    if not views_are_buffered():
+        Lesson.objects.filter(pk=lesson_id).update(views=F('views') + 1)
+        return 1
+
+    cache = get_counter_cache()
+    key = COUNTER_KEY.format(lesson_id)
+    try:
+        pending = cache.incr(key)
+    except ValueError:
+        pending = 1 if cache.add(key, 1, timeout=None) else cache.incr(key)
+
+    if not counter_cache_is_shared():
+        # Each process has its own counters, which the periodic job cannot
+        # reach; flush them from here at most once per interval instead
+        interval = getattr(settings, 'LESSON_VIEW_FLUSH_INTERVAL', 60)
+        if cache.add(FLUSHED_KEY, True, timeout=interval):
+            flush_lesson_views()
+    # Otherwise written to the database by the periodic `tutorials.flush_lesson_views` job
+    return pending
+
+
+def pending_views(lesson_id):
+    return get_counter_cache().get(COUNTER_KEY.format(lesson_id), 0)
+
+
+def flush_lesson_views():
+    """
+    Write buffered view counts to the database and return the number of
+    lessons touched. The counters of all lessons are read in batches of
+    FLUSH_BATCH_SIZE, each batch written with a single UPDATE and its
+    counters then decremented by what was written, so hits counted in the
+    meantime stay buffered for the next round. A round is skipped while
+    another flush holds the lock.
+    """
+    cache = get_counter_cache()
+    if not cache.add(LOCK_KEY, True, timeout=LOCK_TIMEOUT):
+        return 0
+    try:
+        lesson_ids = list(Lesson.objects.order_by('pk').values_list('pk', flat=True))
+        flushed = 0
+        for start in range(0, len(lesson_ids), FLUSH_BATCH_SIZE):
+            keys = {lesson_id: COUNTER_KEY.format(lesson_id) for lesson_id in lesson_ids[start:start + FLUSH_BATCH_SIZE]}
+            counts = cache.get_many(keys.values())
+            deltas = {lesson_id: counts[key] for lesson_id, key in keys.items() if counts.get(key, 0) > 0}
+            if not deltas:
+                continue
+
+            Lesson.objects.filter(pk__in=deltas).update(views=F('views') + Case(
+                *[When(pk=lesson_id, then=Value(count)) for lesson_id, count in deltas.items()],
+                default=Value(0),
+            ))
+            for lesson_id, count in deltas.items():
+                try:
+                    cache.decr(keys[lesson_id], count)
+                except ValueError:
+                    pass
+            flushed += len(deltas)
+        return flushed
+    finally:
+        cache.delete(LOCK_KEY)
@@ -1,10 +1,13 @@
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 
-from tutorials.models import Course, Section, Lesson, Quiz, QuizAttempt, CourseRating, LessonRating, Banner, LessonProgress, UserBadge, Badge
+from tutorials.models import Course, Section, Lesson, Quiz, QuizAttempt, QuizLeaderboardEntry, CourseRating, LessonRating, Banner, LessonProgress, CourseProgress, UserBadge, Badge
 from tutorials.serializers import (
     CourseListSerializer,
     CourseDetailSerializer,
@@ -21,23 +24,66 @@ from tutorials.serializers import (
     BannerSerializer,
     BadgeSerializer,
 )
-
-class CourseViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Course.objects.all()
+from codewithsathya.compression import PrecompressedMixin
+from codewithsathya.conditional import ConditionalGetMixin, latest
+from codewithsathya.params import bounded_int
+from codewithsathya.ranges import serve_file
+from codewithsathya.response_cache import ResponseCacheMixin
+from tutorials.attachment_bundles import serve_attachment_bundle
+from tutorials.answer_keys import get_answer_key
+from tutorials.outline import get_course_outline
+from tutorials.view_counter import record_view
+
+def rating_summary_updated_at(obj):
+    summary = getattr(obj, 'rating_summary', None)
+    return summary.updated_at if summary else None
+
+
+def leaderboard_row(entry, rank):
+    return {
+        "rank": rank,
+        "score": entry.score,
+        "completed_at": entry.completed_at,
+        "user": {
+            "id": entry.user.id,
+            "email": entry.user.email,
+            "full_name": entry.user.full_name
+        }
+    }
+
+
+class CourseViewSet(ResponseCacheMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Course.objects.select_related('rating_summary')
     lookup_field = 'slug'
+    ordering = ('-created_at', 'id')
     permission_classes = [AllowAny]
+    list_version_fields = ('updated_at', 'rating_summary__updated_at')
+    list_cache_tags = ('courses',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('retrieve', 'sections'):
+            queryset = queryset.select_related('outline')
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return CourseDetailSerializer
         return CourseListSerializer
 
+    def get_object_validators(self, course):
+        # updated_at also moves whenever the outline version is bumped
+        rated_at = rating_summary_updated_at(course)
+        etag = self.etag_for(course.pk, course.updated_at, course.outline_version, rated_at)
+        return etag, latest(course.updated_at, rated_at)
+
+    def get_object_cache_tags(self, course):
+        return (f'course:{course.pk}',)
+
     @action(detail=True, methods=['get'])
     def sections(self, request, slug=None):
         course = self.get_object()
-        sections = course.sections.all()
-        serializer = SectionSerializer(sections, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(get_course_outline(course), status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['get', 'post', 'put', 'patch', 'delete'], permission_classes=[IsAuthenticated])
     def rate(self, request, slug=None):
@@ -106,8 +152,9 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 class SectionViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Section.objects.all()
+    queryset = Section.objects.prefetch_related('lessons')
     lookup_field = 'slug'
+    ordering = ('order', 'id')
     serializer_class = SectionSerializer
     permission_classes = [AllowAny]
 
@@ -119,23 +166,44 @@ class SectionViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class LessonViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Lesson.objects.all()
+class LessonViewSet(PrecompressedMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Lesson.objects.select_related('rating_summary', 'author')
     lookup_field = 'slug'
+    ordering = ('order', 'id')
     permission_classes = [AllowAny]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'complete':
+            queryset = queryset.select_related('section__course__badge')
+        elif self.action == 'list':
+            # List entries carry no lesson body
+            queryset = queryset.defer('description', 'rendered_html', 'plain_text', 'toc')
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return LessonDetailSerializer
         return LessonListSerializer
 
+    def get_object_validators(self, lesson):
+        # The view count is deliberately left out: it changes on every request,
+        # and the client already shows an approximate figure.
+        rated_at = rating_summary_updated_at(lesson)
+        etag = self.etag_for(lesson.pk, lesson.updated_at, rated_at)
+        return etag, latest(lesson.updated_at, rated_at)
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.views += 1
-        instance.save(update_fields=['views'])
-        
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        # Views are buffered and flushed in batches; show the approximate total
+        instance.views += record_view(instance.pk)
+
+        validators = self.get_object_validators(instance)
+        not_modified = self.not_modified(request, *validators)
+        if not_modified is not None:
+            return not_modified
+
+        return self.with_validators(self.render_detail(request, instance, validators[0]), *validators)
 
     @action(detail=True, methods=['get'])
     def quiz(self, request, slug=None):
@@ -216,35 +284,32 @@ class LessonViewSet(viewsets.ReadOnlyModelViewSet):
     def complete(self, request, slug=None):
         lesson = self.get_object()
         user = request.user
-        
-        progress, created = LessonProgress.objects.get_or_create(
-            user=user,
-            lesson=lesson,
-            defaults={'is_completed': True, 'completed_at': timezone.now()}
-        )
-        
-        xp_gained = 0
-        if not created and not progress.is_completed:
-            progress.is_completed = True
-            progress.completed_at = timezone.now()
-            progress.save()
-            created = True
-
-        if created:
-            xp_gained = 100
-            user.xp += xp_gained
-            user.save(update_fields=['xp'])
-
-        # Check course completion
-        course = lesson.section.course
-        total_lessons_count = Lesson.objects.filter(section__course=course).count()
-        completed_lessons_count = LessonProgress.objects.filter(
-            user=user,
-            lesson__section__course=course,
-            is_completed=True
-        ).count()
-
-        course_completed = (completed_lessons_count == total_lessons_count)
+        now = timezone.now()
+
+        with transaction.atomic():
+            progress, created = LessonProgress.objects.get_or_create(
+                user=user,
+                lesson=lesson,
+                defaults={'is_completed': True, 'completed_at': now}
+            )
+
+            xp_gained = 0
+            if not created and not progress.is_completed:
+                progress.is_completed = True
+                progress.completed_at = now
+                progress.save()
+                created = True
+
+            if created:
+                xp_gained = 100
+                user.xp += xp_gained
+                user.save(update_fields=['xp'])
+
+            # Check course completion against the per-course counters
+            course = lesson.section.course
+            course_progress = CourseProgress.record_completion(user, course, newly_completed=created, completed_at=now)
+
+        course_completed = course_progress.is_completed
         badge_earned_data = None
 
         if course_completed:
@@ -270,9 +335,33 @@ class LessonViewSet(viewsets.ReadOnlyModelViewSet):
         }, status=status.HTTP_200_OK)
 
 
+@require_safe
+def lesson_media(request, slug):
+    # A plain view: players send Accept headers DRF's negotiation would refuse
+    lesson = Lesson.objects.filter(slug=slug).only('id', 'media_file').first()
+    if lesson is None or not lesson.media_file:
+        return JsonResponse({"detail": "Media file not found for this lesson."}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        return serve_file(request, lesson.media_file.storage, lesson.media_file.name)
+    except FileNotFoundError:
+        return JsonResponse({"detail": "Media file not found for this lesson."}, status=status.HTTP_404_NOT_FOUND)
+
+
+@require_safe
+def lesson_attachments_zip(request, slug):
+    lesson = Lesson.objects.filter(slug=slug).only('id', 'slug').first()
+    if lesson is None:
+        return JsonResponse({"detail": "Lesson not found."}, status=status.HTTP_404_NOT_FOUND)
+    attachments = list(lesson.attachments.order_by('id'))
+    if not attachments:
+        return JsonResponse({"detail": "No attachments for this lesson."}, status=status.HTTP_404_NOT_FOUND)
+    return serve_attachment_bundle(request, lesson, attachments)
+
+
 class QuizViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
+    ordering = ('id',)
     permission_classes = [AllowAny]
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
@@ -283,37 +372,17 @@ class QuizViewSet(viewsets.ReadOnlyModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         submitted_answers = serializer.validated_data['answers']
-        total_questions = quiz.questions.count()
+        answer_key = get_answer_key(quiz)
+        total_questions = len(answer_key)
 
         if total_questions == 0:
             return Response({"detail": "This quiz does not contain questions."}, status=status.HTTP_400_BAD_REQUEST)
 
-        questions = quiz.questions.all()
-        correct_choices = {q.id: q.choices.filter(is_correct=True).values_list('id', flat=True) for q in questions}
-
-        correct_answers_count = 0
-        graded_feedback = []
+        error = answer_key.validate(submitted_answers)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
 
-        for ans in submitted_answers:
-            q_id = ans['question_id']
-            c_id = ans['choice_id']
-
-            if not questions.filter(id=q_id).exists():
-                return Response({"detail": f"Question {q_id} does not belong to this quiz."}, status=status.HTTP_400_BAD_REQUEST)
-
-            q_obj = questions.get(id=q_id)
-            if not q_obj.choices.filter(id=c_id).exists():
-                return Response({"detail": f"Choice {c_id} does not belong to Question {q_id}."}, status=status.HTTP_400_BAD_REQUEST)
-
-            is_correct = c_id in correct_choices.get(q_id, [])
-            if is_correct:
-                correct_answers_count += 1
-
-            graded_feedback.append({
-                "question_id": q_id,
-                "submitted_choice_id": c_id,
-                "is_correct": is_correct
-            })
+        correct_answers_count, graded_feedback = answer_key.grade(submitted_answers)
 
         score = int((correct_answers_count / total_questions) * 100)
 
@@ -330,42 +399,53 @@ class QuizViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=True, methods=['get'], permission_classes=[AllowAny])
     def leaderboard(self, request, pk=None):
         quiz = self.get_object()
+        limit = bounded_int(request.query_params.get('limit'), default=50, minimum=1, maximum=500)
+        offset = bounded_int(request.query_params.get('offset'), default=0, minimum=0)
 
-        # Query all unique users who attempted this quiz
-        user_ids = QuizAttempt.objects.filter(quiz=quiz).values_list('user_id', flat=True).distinct()
-
-        # Find the earliest attempt ID for each user
-        first_attempt_ids = []
-        for u_id in user_ids:
-            first_attempt = QuizAttempt.objects.filter(quiz=quiz, user_id=u_id).order_by('completed_at', 'id').first()
-            if first_attempt:
-                first_attempt_ids.append(first_attempt.id)
-
-        # Retrieve first attempts ranked by score descending and completed_at ascending
-        attempts = QuizAttempt.objects.filter(id__in=first_attempt_ids).select_related('user').order_by('-score', 'completed_at', 'id')
-
-        leaderboard_data = []
-        for index, attempt in enumerate(attempts):
-            data = {
-                "rank": index + 1,
-                "score": attempt.score,
-                "completed_at": attempt.completed_at,
-                "user": {
-                    "id": attempt.user.id,
-                    "email": attempt.user.email,
-                    "full_name": attempt.user.full_name
-                }
-            }
-            leaderboard_data.append(data)
+        # First attempts are materialized in QuizLeaderboardEntry
+        entries = QuizLeaderboardEntry.ranked(quiz).select_related('user')[offset:offset + limit]
+        leaderboard_data = [leaderboard_row(entry, offset + index + 1) for index, entry in enumerate(entries)]
 
         serializer = LeaderboardSerializer(leaderboard_data, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['get'], url_path='leaderboard/me', permission_classes=[IsAuthenticated])
+    def my_rank(self, request, pk=None):
+        quiz = self.get_object()
+        try:
+            entry = QuizLeaderboardEntry.objects.select_related('user').get(quiz=quiz, user=request.user)
+        except QuizLeaderboardEntry.DoesNotExist:
+            return Response({"detail": "You have not attempted this quiz yet."}, status=status.HTTP_404_NOT_FOUND)
+
+        count = bounded_int(request.query_params.get('neighbours'), default=2, minimum=0, maximum=20)
+        rank = entry.ahead().count() + 1
+
+        # Closest entries first in both directions
+        above = list(entry.ahead().select_related('user').order_by('score', '-completed_at', '-attempt_id')[:count])
+        below = list(entry.behind().select_related('user').order_by(*QuizLeaderboardEntry.RANKING)[:count])
+
+        rows = (
+            [leaderboard_row(e, rank - index - 1) for index, e in enumerate(above)][::-1]
+            + [leaderboard_row(entry, rank)]
+            + [leaderboard_row(e, rank + index + 1) for index, e in enumerate(below)]
+        )
+        return Response({
+            "rank": rank,
+            "score": entry.score,
+            "completed_at": entry.completed_at,
+            "neighbours": LeaderboardSerializer(rows, many=True).data,
+        }, status=status.HTTP_200_OK)
 
-class BannerViewSet(viewsets.ReadOnlyModelViewSet):
+
+class BannerViewSet(ResponseCacheMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Banner.objects.filter(is_active=True)
     serializer_class = BannerSerializer
+    ordering = ('order', '-created_at', 'id')
     permission_classes = [AllowAny]
+    list_cache_tags = ('banners',)
+
+    def get_object_cache_tags(self, banner):
+        return (f'banner:{banner.pk}',)
 
 
 class BadgeViewSet(viewsets.ReadOnlyModelViewSet):
@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from uploads.models import UploadSession
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'target', 'lesson', 'user', 'size', 'status', 'updated_at')
+    list_filter = ('target', 'status')
+    search_fields = ('filename', 'lesson__title', 'user__email')
+    readonly_fields = ('id', 'user', 'target', 'lesson', 'attachment', 'filename', 'size', 'chunk_size', 'sha256', 'status', 'error', 'created_at', 'updated_at')
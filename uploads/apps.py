@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class UploadsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'uploads'
+
+    def ready(self):
+        from uploads.signals import connect_blob_fields
+
+        connect_blob_fields()
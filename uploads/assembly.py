@@ -0,0 +1,143 @@
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from tutorials.models import LessonAttachment
+from uploads.models import UploadChunk, UploadSession
+
+BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+def upload_dir():
+    return getattr(settings, 'UPLOAD_TEMP_DIR', None) or os.path.join(tempfile.gettempdir(), 'codewithsathya-uploads')
+
+
+def part_path(session):
+    return os.path.join(upload_dir(), f'{session.pk}.part')
+
+
+def remove_part(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def write_chunk(session, index, stream, sha256):
+    """
+    Copy chunk `index` from `stream` into its place in the session's part
+    file, `BLOCK_SIZE` bytes at a time, and record it once its length and
+    SHA-256 check out. A rejected chunk is simply sent again.
+    """
+    if index >= session.total_chunks:
+        raise UploadError(f"Chunk index must be below {session.total_chunks}.")
+    expected = session.chunk_length(index)
+
+    os.makedirs(upload_dir(), exist_ok=True)
+    digest = hashlib.sha256()
+    received = 0
+    descriptor = os.open(part_path(session), os.O_WRONLY | os.O_CREAT, 0o600)
+    with os.fdopen(descriptor, 'wb') as handle:
+        handle.seek(session.chunk_offset(index))
+        while True:
+            # Read one byte past the chunk so oversized bodies are noticed
+            block = stream.read(min(BLOCK_SIZE, expected - received + 1))
+            if not block:
+                break
+            received += len(block)
+            if received > expected:
+                break
+            digest.update(block)
+            handle.write(block)
+
+    if received != expected:
+        raise UploadError(f"Chunk {index} must be exactly {expected} bytes.")
+    if digest.hexdigest() != sha256.lower():
+        raise UploadError(f"Checksum mismatch for chunk {index}.")
+
+    UploadChunk.objects.update_or_create(
+        session=session, index=index, defaults={'size': received, 'sha256': digest.hexdigest()}
+    )
+    UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fail(session, message):
+    session.status = 'failed'
+    session.error = message
+    session.save(update_fields=['status', 'error', 'updated_at'])
+    remove_part(session)
+    raise UploadError(message)
+
+
+def attach(session, handle):
+    content = File(handle, name=session.filename)
+    if session.target == 'lesson_media':
+        lesson = session.lesson
+        lesson.media_file.save(session.filename, content, save=False)
+        lesson.save(update_fields=['media_file', 'updated_at'])
+        return lesson
+
+    attachment = session.attachment or LessonAttachment(lesson=session.lesson)
+    attachment.file.save(session.filename, content, save=False)
+    if not attachment.name:
+        attachment.name = session.filename
+    attachment.save()
+    session.attachment = attachment
+    return attachment
+
+
+def complete_upload(session):
+    """
+    Check that every chunk arrived and that the assembled file has the
+    announced size and checksum, then store it on the lesson or attachment.
+    Returns the updated object.
+    """
+    received = session.chunks.count()
+    if received != session.total_chunks:
+        raise UploadError(f"{session.total_chunks - received} chunk(s) are still missing.")
+
+    path = part_path(session)
+    if not os.path.exists(path) or os.path.getsize(path) != session.size:
+        fail(session, "The assembled file does not have the announced size.")
+    if session.sha256 and file_sha256(path) != session.sha256.lower():
+        fail(session, "The assembled file does not match the announced checksum.")
+
+    with open(path, 'rb') as handle, transaction.atomic():
+        target = attach(session, handle)
+        session.status = 'complete'
+        session.save(update_fields=['status', 'attachment', 'updated_at'])
+        session.chunks.all().delete()
+    remove_part(session)
+    return target
+
+
+def discard_upload(session):
+    remove_part(session)
+    session.delete()
+
+
+def purge_stale_uploads():
+    """Drop sessions untouched for UPLOAD_SESSION_TTL, with their part files."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'UPLOAD_SESSION_TTL', 24 * 60 * 60))
+    stale = list(UploadSession.objects.exclude(status='complete').filter(updated_at__lt=cutoff))
+    for session in stale:
+        discard_upload(session)
+    return len(stale)
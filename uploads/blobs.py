@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from uploads.models import StoredBlob
+from uploads.storage import BLOB_PREFIX, blob_storage, is_blob
+
+# (model label, field name) of every file field kept in the blob store
+BLOB_FIELDS = (
+    ('tutorials.Lesson', 'media_file'),
+    ('tutorials.LessonAttachment', 'file'),
+)
+
+
+def blob_fields():
+    for label, field_name in BLOB_FIELDS:
+        yield apps.get_model(label), field_name
+
+
+def acquire(name):
+    if is_blob(name):
+        StoredBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+
+def release(name):
+    """Drop one reference to `name`, reclaiming the blob after commit if it was the last."""
+    if not is_blob(name):
+        return
+    StoredBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+    transaction.on_commit(lambda: reclaim(name))
+
+
+def reclaim(name):
+    """
+    Delete the blob `name` if nothing references it. Blobs produced within
+    the last BLOB_RECLAIM_GRACE seconds are kept: their upload may be about
+    to be attached to a row.
+    """
+    grace = timedelta(seconds=getattr(settings, 'BLOB_RECLAIM_GRACE', 300))
+    with transaction.atomic():
+        blob = StoredBlob.objects.select_for_update().filter(
+            name=name, ref_count=0, last_saved_at__lte=timezone.now() - grace
+        ).first()
+        if blob is None:
+            return False
+        blob_storage.delete(blob.name)
+        blob.delete()
+    return True
+
+
+def reconcile_blobs():
+    """
+    Recount every blob's references from the tables -- which also covers
+    changes made with update() or raw SQL -- and reclaim unreferenced ones.
+    Returns `(recounted, reclaimed)`.
+    """
+    counts = {}
+    for model, field_name in blob_fields():
+        rows = (
+            model._default_manager.filter(**{f'{field_name}__startswith': BLOB_PREFIX})
+            .values_list(field_name).annotate(references=Count('pk')).order_by()
+        )
+        for name, references in rows:
+            counts[name] = counts.get(name, 0) + references
+
+    recounted = 0
+    for blob in StoredBlob.objects.only('id', 'name', 'ref_count').iterator():
+        references = counts.get(blob.name, 0)
+        if blob.ref_count != references:
+            StoredBlob.objects.filter(pk=blob.pk).update(ref_count=references)
+            recounted += 1
+
+    reclaimed = sum(reclaim(name) for name in StoredBlob.objects.filter(ref_count=0).values_list('name', flat=True))
+    return recounted, reclaimed
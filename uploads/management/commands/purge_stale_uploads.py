@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from uploads.assembly import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete unfinished uploads that have been idle longer than UPLOAD_SESSION_TTL, with their part files."
+
+    def handle(self, *args, **options):
+        purged = purge_stale_uploads()
+        self.stdout.write(f"Purged {purged} upload(s).")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from uploads.blobs import reconcile_blobs
+
+
+class Command(BaseCommand):
+    help = "Recount references to stored blobs and delete the unreferenced ones."
+
+    def handle(self, *args, **options):
+        recounted, reclaimed = reconcile_blobs()
+        self.stdout.write(f"Corrected {recounted} reference count(s), reclaimed {reclaimed} blob(s).")
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.15 on 2026-10-17 23:04
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('tutorials', '0020_lessonattachment_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('lesson_media', 'Lesson media file'), ('lesson_attachment', 'Lesson attachment')], max_length=20)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Total size of the file in bytes')),
+                ('chunk_size', models.PositiveIntegerField()),
+                ('sha256', models.CharField(blank=True, default='', help_text='Expected checksum of the whole file, if the client sent one', max_length=64)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('complete', 'Complete'), ('failed', 'Failed')], default='open', max_length=10)),
+                ('error', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('attachment', models.ForeignKey(blank=True, help_text='Attachment whose file is replaced; a new attachment is created when empty', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tutorials.lessonattachment')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='tutorials.lesson')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('size', models.PositiveIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('received_at', models.DateTimeField(auto_now=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='uploads.uploadsession')),
+            ],
+            options={
+                'ordering': ['index'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['status', 'updated_at'], name='upload_status_updated_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='uploadchunk',
+            unique_together={('session', 'index')},
+        ),
+    ]
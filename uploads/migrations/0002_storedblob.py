@@ -0,0 +1,26 @@
+# Generated by Django 5.2.15 on 2026-10-17 23:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Storage name, derived from the digest', max_length=255, unique=True)),
+                ('digest', models.CharField(db_index=True, help_text='SHA-256 of the content', max_length=64)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Number of file fields that point at this blob')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_saved_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Last time an upload produced this blob')),
+            ],
+        ),
+    ]
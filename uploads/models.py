@@ -0,0 +1,88 @@
+import math
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload of one large file for a lesson, sent as fixed-size
+    chunks that are written in place into a part file on local disk.
+    """
+    TARGET_CHOICES = [
+        ('lesson_media', 'Lesson media file'),
+        ('lesson_attachment', 'Lesson attachment'),
+    ]
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('complete', 'Complete'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    lesson = models.ForeignKey('tutorials.Lesson', on_delete=models.CASCADE, related_name='upload_sessions')
+    attachment = models.ForeignKey(
+        'tutorials.LessonAttachment', on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+        help_text="Attachment whose file is replaced; a new attachment is created when empty"
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Total size of the file in bytes")
+    chunk_size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True, default='', help_text="Expected checksum of the whole file, if the client sent one")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    error = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='upload_status_updated_idx'),
+        ]
+
+    @property
+    def total_chunks(self):
+        return math.ceil(self.size / self.chunk_size)
+
+    def chunk_offset(self, index):
+        return index * self.chunk_size
+
+    def chunk_length(self, index):
+        return min(self.chunk_size, self.size - self.chunk_offset(index))
+
+    def __str__(self):
+        return f"{self.filename} ({self.get_target_display()}, {self.status})"
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('session', 'index')
+        ordering = ['index']
+
+    def __str__(self):
+        return f"{self.session_id} #{self.index}"
+
+
+class StoredBlob(models.Model):
+    """
+    One file in the content-addressed store, shared by every lesson media
+    file or attachment with the same content.
+    """
+    name = models.CharField(max_length=255, unique=True, help_text="Storage name, derived from the digest")
+    digest = models.CharField(max_length=64, db_index=True, help_text="SHA-256 of the content")
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0, help_text="Number of file fields that point at this blob")
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_saved_at = models.DateTimeField(default=timezone.now, help_text="Last time an upload produced this blob")
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} reference(s))"
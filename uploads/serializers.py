@@ -0,0 +1,54 @@
+import os
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils.text import get_valid_filename
+from rest_framework import serializers
+
+from tutorials.models import Lesson, LessonAttachment
+from uploads.models import UploadSession
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    target = serializers.ChoiceField(choices=UploadSession.TARGET_CHOICES)
+    lesson = serializers.PrimaryKeyRelatedField(queryset=Lesson.objects.all())
+    attachment = serializers.PrimaryKeyRelatedField(queryset=LessonAttachment.objects.all(), required=False, allow_null=True)
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True)
+
+    def validate_filename(self, value):
+        try:
+            return get_valid_filename(os.path.basename(value))
+        except SuspiciousFileOperation:
+            raise serializers.ValidationError("Enter a valid file name.")
+
+    def validate_size(self, value):
+        maximum = getattr(settings, 'UPLOAD_MAX_SIZE', 10 * 1024 ** 3)
+        if value > maximum:
+            raise serializers.ValidationError(f"Files may be at most {maximum} bytes.")
+        return value
+
+    def validate(self, attrs):
+        attachment = attrs.get('attachment')
+        if attachment is not None:
+            if attrs['target'] != 'lesson_attachment':
+                raise serializers.ValidationError("An attachment can only be given for 'lesson_attachment' uploads.")
+            if attachment.lesson_id != attrs['lesson'].pk:
+                raise serializers.ValidationError("The attachment does not belong to this lesson.")
+        return attrs
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    total_chunks = serializers.ReadOnlyField()
+    received_chunks = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = (
+            'id', 'target', 'lesson', 'attachment', 'filename', 'size', 'sha256', 'chunk_size',
+            'total_chunks', 'received_chunks', 'status', 'error', 'created_at', 'updated_at'
+        )
+
+    def get_received_chunks(self, obj):
+        return list(obj.chunks.values_list('index', flat=True))
@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from uploads.blobs import acquire, blob_fields, release
+
+UNKNOWN = object()
+# Blob-backed file fields per model
+field_names = {}
+
+
+def loaded_name(instance, field_name):
+    """The field's stored name, without loading it if it was deferred."""
+    value = instance.__dict__.get(field_name, UNKNOWN)
+    if value is UNKNOWN:
+        return UNKNOWN
+    return getattr(value, 'name', value) or ''
+
+
+def remember_names(sender, instance, **kwargs):
+    instance._blob_names = {field_name: loaded_name(instance, field_name) for field_name in field_names[sender]}
+
+
+def fetch_unknown_names(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    unknown = [name for name, value in instance._blob_names.items() if value is UNKNOWN]
+    if unknown:
+        stored = sender._default_manager.filter(pk=instance.pk).values(*unknown).first() or {}
+        instance._blob_names.update({name: stored.get(name) or '' for name in unknown})
+
+
+def update_references(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    for field_name in field_names[sender]:
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        new = loaded_name(instance, field_name)
+        old = '' if created else instance._blob_names.get(field_name, UNKNOWN)
+        if new is UNKNOWN or old is UNKNOWN or new == old:
+            continue
+        acquire(new)
+        release(old)
+        instance._blob_names[field_name] = new
+
+
+def drop_references(sender, instance, **kwargs):
+    for field_name in field_names[sender]:
+        name = loaded_name(instance, field_name)
+        if name is UNKNOWN:
+            name = instance._blob_names.get(field_name, UNKNOWN)
+        if name is not UNKNOWN:
+            release(name)
+
+
+def connect_blob_fields():
+    for model, field_name in blob_fields():
+        field_names.setdefault(model, []).append(field_name)
+    for model in field_names:
+        post_init.connect(remember_names, sender=model, dispatch_uid=f'blob-init-{model._meta.label}')
+        pre_save.connect(fetch_unknown_names, sender=model, dispatch_uid=f'blob-pre-save-{model._meta.label}')
+        post_save.connect(update_references, sender=model, dispatch_uid=f'blob-post-save-{model._meta.label}')
+        post_delete.connect(drop_references, sender=model, dispatch_uid=f'blob-delete-{model._meta.label}')
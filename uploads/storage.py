@@ -0,0 +1,76 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs/'
+
+
+def blob_name(digest, extension):
+    return f'{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct upload once, under `blobs/` and named by the
+    SHA-256 of its content (plus the original extension, which keeps
+    content types guessable). The digest is computed while the upload is
+    streamed to a temporary file; if that blob already exists the copy is
+    dropped instead of being written again. Every saved blob has a
+    `StoredBlob` row whose reference count `uploads.signals` maintains.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The stored name is derived from the content in _save
+        return name
+
+    def _save(self, name, content):
+        from uploads.models import StoredBlob
+
+        extension = os.path.splitext(name)[1].lower()
+        temp_dir = self.path(f'{BLOB_PREFIX}tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        temp_path = os.path.join(temp_dir, uuid.uuid4().hex)
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, 'wb') as handle:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    size += len(chunk)
+                    handle.write(chunk)
+
+            stored_name = blob_name(digest.hexdigest(), extension)
+            with transaction.atomic():
+                # The row lock keeps a concurrent reclaim from deleting the file under us
+                blob, _ = StoredBlob.objects.select_for_update().get_or_create(
+                    name=stored_name, defaults={'digest': digest.hexdigest(), 'size': size}
+                )
+                path = self.path(stored_name)
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(temp_path, path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(path, self.file_permissions_mode)
+                StoredBlob.objects.filter(pk=blob.pk).update(last_saved_at=timezone.now())
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return stored_name
+
+
+blob_storage = ContentAddressedStorage()
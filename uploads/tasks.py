@@ -0,0 +1,13 @@
+from jobs.registry import task
+from uploads.assembly import purge_stale_uploads
+from uploads.blobs import reconcile_blobs
+
+
+@task('uploads.purge_stale_uploads')
+def purge_stale_uploads_task():
+    return purge_stale_uploads()
+
+
+@task('uploads.reconcile_blobs')
+def reconcile_blobs_task():
+    return reconcile_blobs()
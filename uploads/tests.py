@@ -0,0 +1,232 @@
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from tutorials.models import Course, Lesson, LessonAttachment, Section
+from uploads.assembly import part_path
+from uploads.blobs import reconcile_blobs
+from uploads.models import StoredBlob, UploadSession
+from uploads.storage import blob_name, blob_storage
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), UPLOAD_TEMP_DIR=tempfile.mkdtemp(), UPLOAD_CHUNK_SIZE=100)
+class ChunkedUploadTests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin@example.com', email='admin@example.com', password='password123', is_staff=True
+        )
+        course = Course.objects.create(title="Uploads", description="d", course_time=10)
+        section = Section.objects.create(course=course, title="Video", order=1)
+        self.lesson = Lesson.objects.create(section=section, title="Long video", description="d", time=90)
+        self.data = os.urandom(250)
+        self.client.force_authenticate(self.admin)
+
+    def start(self, **overrides):
+        payload = {
+            'target': 'lesson_media',
+            'lesson': self.lesson.pk,
+            'filename': 'lecture.mp4',
+            'size': len(self.data),
+            'sha256': hashlib.sha256(self.data).hexdigest(),
+            **overrides,
+        }
+        response = self.client.post(reverse('uploads:create'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data
+
+    def put_chunk(self, session_id, index, body, checksum=None):
+        return self.client.put(
+            reverse('uploads:chunk', kwargs={'pk': session_id, 'index': index}),
+            data=body,
+            content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(body).hexdigest(),
+        )
+
+    def test_resumable_upload_to_lesson_media(self):
+        session = self.start()
+        self.assertEqual(session['chunk_size'], 100)
+        self.assertEqual(session['total_chunks'], 3)
+
+        # Chunks may arrive in any order; a client resumes from received_chunks
+        self.assertEqual(self.put_chunk(session['id'], 2, self.data[200:]).status_code, 200)
+        response = self.put_chunk(session['id'], 0, self.data[:100])
+        self.assertEqual(response.data['received_chunks'], [0, 2])
+
+        response = self.client.post(reverse('uploads:complete', kwargs={'pk': session['id']}))
+        self.assertEqual(response.data['detail'], "1 chunk(s) are still missing.")
+
+        self.put_chunk(session['id'], 1, self.data[100:200])
+        response = self.client.post(reverse('uploads:complete', kwargs={'pk': session['id']}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'complete')
+
+        self.lesson.refresh_from_db()
+        with self.lesson.media_file.open('rb') as handle:
+            self.assertEqual(handle.read(), self.data)
+        upload = UploadSession.objects.get(pk=session['id'])
+        self.assertFalse(os.path.exists(part_path(upload)))
+        self.assertFalse(upload.chunks.exists())
+
+    def test_bad_chunks_are_rejected(self):
+        session = self.start()
+        response = self.put_chunk(session['id'], 0, self.data[:100], checksum='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], "Checksum mismatch for chunk 0.")
+
+        response = self.put_chunk(session['id'], 0, self.data[:99])
+        self.assertEqual(response.data['detail'], "Chunk 0 must be exactly 100 bytes.")
+        response = self.put_chunk(session['id'], 2, self.data[150:])
+        self.assertEqual(response.data['detail'], "Chunk 2 must be exactly 50 bytes.")
+        response = self.put_chunk(session['id'], 3, b'x')
+        self.assertEqual(response.data['detail'], "Chunk index must be below 3.")
+
+        response = self.client.get(reverse('uploads:detail', kwargs={'pk': session['id']}))
+        self.assertEqual(response.data['received_chunks'], [])
+
+    def test_whole_file_checksum_is_verified(self):
+        session = self.start(sha256=hashlib.sha256(b'something else').hexdigest())
+        for index in range(3):
+            self.put_chunk(session['id'], index, self.data[index * 100:(index + 1) * 100])
+
+        response = self.client.post(reverse('uploads:complete', kwargs={'pk': session['id']}))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], "The assembled file does not match the announced checksum.")
+        self.assertEqual(UploadSession.objects.get(pk=session['id']).status, 'failed')
+        self.lesson.refresh_from_db()
+        self.assertFalse(self.lesson.media_file)
+
+        response = self.put_chunk(session['id'], 0, self.data[:100])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_upload_replaces_attachment_file(self):
+        attachment = LessonAttachment.objects.create(
+            lesson=self.lesson, name="Slides", file=SimpleUploadedFile("old.pdf", b"old slides")
+        )
+        session = self.start(target='lesson_attachment', attachment=attachment.pk, filename='../slides v2.pdf', sha256='')
+        self.assertEqual(session['filename'], 'slides_v2.pdf')
+        for index in range(3):
+            self.put_chunk(session['id'], index, self.data[index * 100:(index + 1) * 100])
+        self.client.post(reverse('uploads:complete', kwargs={'pk': session['id']}))
+
+        attachment.refresh_from_db()
+        self.assertEqual(attachment.name, "Slides")
+        self.assertEqual(attachment.file.name, blob_name(hashlib.sha256(self.data).hexdigest(), '.pdf'))
+        self.assertEqual(LessonAttachment.objects.count(), 1)
+
+        session = self.start(target='lesson_attachment', filename='extra.zip')
+        for index in range(3):
+            self.put_chunk(session['id'], index, self.data[index * 100:(index + 1) * 100])
+        response = self.client.post(reverse('uploads:complete', kwargs={'pk': session['id']}))
+        created = LessonAttachment.objects.get(pk=response.data['attachment'])
+        self.assertEqual(created.name, 'extra.zip')
+        self.assertEqual(created.lesson, self.lesson)
+
+    def test_only_staff_can_upload(self):
+        student = User.objects.create_user(username='s@example.com', email='s@example.com', password='password123')
+        self.client.force_authenticate(student)
+        response = self.client.post(reverse('uploads:create'), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_purge_stale_uploads(self):
+        session = self.start()
+        self.put_chunk(session['id'], 0, self.data[:100])
+        upload = UploadSession.objects.get(pk=session['id'])
+        UploadSession.objects.filter(pk=upload.pk).update(updated_at=timezone.now() - timedelta(days=2))
+
+        out = StringIO()
+        call_command('purge_stale_uploads', stdout=out)
+        self.assertIn("Purged 1 upload(s).", out.getvalue())
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(part_path(upload)))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), BLOB_RECLAIM_GRACE=0)
+class BlobStorageTests(APITestCase):
+
+    def setUp(self):
+        course = Course.objects.create(title="Blobs", description="d", course_time=10)
+        section = Section.objects.create(course=course, title="Shared", order=1)
+        self.first = Lesson.objects.create(section=section, title="First", description="d", time=5)
+        self.second = Lesson.objects.create(section=section, title="Second", description="d", time=5)
+        self.content = b"%PDF- starter kit" * 100
+
+    def attach(self, lesson, filename="starter.pdf", content=None):
+        return LessonAttachment.objects.create(lesson=lesson, file=SimpleUploadedFile(filename, content or self.content))
+
+    def test_identical_uploads_share_one_blob(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            one = self.attach(self.first)
+            two = self.attach(self.second, filename="kit.PDF")
+
+        digest = hashlib.sha256(self.content).hexdigest()
+        self.assertEqual(one.file.name, blob_name(digest, '.pdf'))
+        self.assertEqual(two.file.name, one.file.name)
+        self.assertEqual(one.name, "starter.pdf")
+        self.assertEqual(two.name, "kit.PDF")
+
+        blob = StoredBlob.objects.get()
+        self.assertEqual((blob.digest, blob.size, blob.ref_count), (digest, len(self.content), 2))
+        self.assertEqual(len(os.listdir(os.path.dirname(blob_storage.path(blob.name)))), 1)
+
+    def test_last_reference_reclaims_blob(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            one = self.attach(self.first)
+            two = self.attach(self.second)
+        path = blob_storage.path(one.file.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            one.delete()
+        self.assertEqual(StoredBlob.objects.get().ref_count, 1)
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            # Replacing the file releases the old blob too
+            two.file = SimpleUploadedFile("other.pdf", b"different content")
+            two.save()
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(list(StoredBlob.objects.values_list('name', 'ref_count')), [(two.file.name, 1)])
+
+    def test_media_file_references_survive_deferred_loads(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.media_file = SimpleUploadedFile("intro.mp4", self.content)
+            self.first.save()
+            self.attach(self.second)
+        # Same content under another extension is a separate blob
+        self.assertEqual(StoredBlob.objects.count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson = Lesson.objects.only('id', 'title').get(pk=self.first.pk)
+            lesson.media_file = None
+            lesson.save()
+        self.assertEqual(list(StoredBlob.objects.values_list('name', flat=True)), [blob_name(hashlib.sha256(self.content).hexdigest(), '.pdf')])
+
+    def test_reconcile_recounts_and_reclaims(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            attachment = self.attach(self.first)
+        # update() bypasses the reference counting
+        LessonAttachment.objects.filter(pk=attachment.pk).update(file='lessons/attachments/legacy.pdf')
+        Lesson.objects.filter(pk=self.second.pk).update(media_file=attachment.file.name)
+        StoredBlob.objects.update(ref_count=5)
+
+        self.assertEqual(reconcile_blobs(), (1, 0))
+        self.assertEqual(StoredBlob.objects.get().ref_count, 1)
+
+        Lesson.objects.update(media_file='')
+        out = StringIO()
+        call_command('reconcile_blobs', stdout=out)
+        self.assertIn("Corrected 1 reference count(s), reclaimed 1 blob(s).", out.getvalue())
+        self.assertFalse(StoredBlob.objects.exists())
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from uploads.views import UploadChunkView, UploadCompleteView, UploadSessionCreateView, UploadSessionDetailView
+
+app_name = 'uploads'
+
+urlpatterns = [
+    path('', UploadSessionCreateView.as_view(), name='create'),
+    path('<uuid:pk>/', UploadSessionDetailView.as_view(), name='detail'),
+    path('<uuid:pk>/chunks/<int:index>/', UploadChunkView.as_view(), name='chunk'),
+    path('<uuid:pk>/complete/', UploadCompleteView.as_view(), name='complete'),
+]
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from uploads.assembly import UploadError, complete_upload, discard_upload, write_chunk
+from uploads.models import UploadSession
+from uploads.serializers import UploadSessionCreateSerializer, UploadSessionSerializer
+
+
+class UploadSessionMixin:
+    permission_classes = [IsAdminUser]
+
+    def get_session(self, request, pk):
+        return get_object_or_404(UploadSession, pk=pk, user=request.user)
+
+
+class UploadSessionCreateView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = UploadSessionCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = UploadSession.objects.create(
+            user=request.user,
+            chunk_size=getattr(settings, 'UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024),
+            **serializer.validated_data
+        )
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(UploadSessionMixin, APIView):
+
+    def get(self, request, pk):
+        session = self.get_session(request, pk)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_200_OK)
+
+    def delete(self, request, pk):
+        discard_upload(self.get_session(request, pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadChunkView(UploadSessionMixin, APIView):
+    """
+    PUT the raw bytes of one chunk, with its SHA-256 in `X-Chunk-SHA256`.
+    The body is read straight from the request stream, never parsed.
+    """
+
+    def put(self, request, pk, index):
+        session = self.get_session(request, pk)
+        if session.status != 'open':
+            return Response({"detail": f"This upload is {session.status}."}, status=status.HTTP_409_CONFLICT)
+
+        checksum = request.headers.get('X-Chunk-SHA256', '').strip()
+        if not checksum:
+            return Response({"detail": "The X-Chunk-SHA256 header is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            write_chunk(session, index, request.stream, checksum)
+        except UploadError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_200_OK)
+
+
+class UploadCompleteView(UploadSessionMixin, APIView):
+
+    def post(self, request, pk):
+        session = self.get_session(request, pk)
+        if session.status != 'open':
+            return Response({"detail": f"This upload is {session.status}."}, status=status.HTTP_409_CONFLICT)
+
+        try:
+            complete_upload(session)
+        except UploadError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_200_OK)
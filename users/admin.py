@@ -18,9 +18,9 @@ class CustomUserAdmin(UserAdmin):
 
 @admin.register(OTPVerification)
 class OTPVerificationAdmin(admin.ModelAdmin):
-    list_display = ('user', 'otp', 'created_at', 'is_verified')
+    list_display = ('user', 'created_at', 'expires_at', 'is_verified')
     list_filter = ('is_verified', 'created_at')
-    search_fields = ('user__email', 'otp')
-    readonly_fields = ('created_at',)
+    search_fields = ('user__email',)
+    readonly_fields = ('otp_hash', 'created_at')
 
 admin.site.register(User, CustomUserAdmin)
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.15 on 2026-10-17 09:00
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils.crypto import salted_hmac
+
+
+def hash_existing_codes(apps, schema_editor):
+    # Same keyed hash as users.otp.hash_otp, inlined so later changes there
+    # don't alter this migration
+    OTPVerification = apps.get_model('users', 'OTPVerification')
+    for otp in OTPVerification.objects.all().iterator():
+        otp.otp_hash = salted_hmac('users.otp', f'{otp.user_id}:{otp.otp}').hexdigest()
+        otp.expires_at = otp.created_at if otp.is_verified else otp.created_at + timedelta(minutes=10)
+        otp.save(update_fields=['otp_hash', 'expires_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_xp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='otpverification',
+            name='otp_hash',
+            field=models.CharField(default='', help_text='Keyed hash of the code; see users.otp.hash_otp', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='otpverification',
+            name='expires_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(hash_existing_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='otpverification',
+            name='expires_at',
+            field=models.DateTimeField(help_text='Set to the time of use once the code is verified or replaced'),
+        ),
+        migrations.RemoveField(
+            model_name='otpverification',
+            name='otp',
+        ),
+        migrations.AddIndex(
+            model_name='otpverification',
+            index=models.Index(fields=['user', 'otp_hash', 'is_verified'], name='otp_lookup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otpverification',
+            index=models.Index(fields=['expires_at'], name='otp_expires_idx'),
+        ),
+    ]
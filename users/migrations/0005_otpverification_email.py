@@ -0,0 +1,20 @@
+# Generated by Django 5.2.15 on 2026-10-17 23:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0002_outgoingemail_expires_at_and_more'),
+        ('users', '0004_otp_hash_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='otpverification',
+            name='email',
+            field=models.ForeignKey(blank=True, help_text='The queued email carrying the code, deleted with it', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='outbox.outgoingemail'),
+        ),
+    ]
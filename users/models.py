@@ -1,4 +1,3 @@
-import datetime
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.conf import settings
@@ -17,13 +16,23 @@ class User(AbstractUser):
 
 class OTPVerification(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='otps')
-    otp = models.CharField(max_length=6)
+    otp_hash = models.CharField(max_length=64, help_text="Keyed hash of the code; see users.otp.hash_otp")
     created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(help_text="Set to the time of use once the code is verified or replaced")
     is_verified = models.BooleanField(default=False)
+    email = models.ForeignKey(
+        'outbox.OutgoingEmail', null=True, blank=True, on_delete=models.SET_NULL, related_name='+',
+        help_text="The queued email carrying the code, deleted with it",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'otp_hash', 'is_verified'], name='otp_lookup_idx'),
+            models.Index(fields=['expires_at'], name='otp_expires_idx'),
+        ]
 
     def is_expired(self):
-        # Expire in 10 minutes
-        return timezone.now() > self.created_at + datetime.timedelta(minutes=10)
+        return timezone.now() > self.expires_at
 
     def __str__(self):
-        return f"{self.user.email} - {self.otp} (Verified: {self.is_verified})"
+        return f"{self.user.email} (Verified: {self.is_verified})"
@@ -0,0 +1,87 @@
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from outbox.mail import enqueue_email
+from outbox.models import OutgoingEmail
+from users.models import OTPVerification
+
+KEY_SALT = 'users.otp'
+
+
+def hash_otp(user_id, code):
+    """Keyed hash of a code; the user id keeps equal codes of different users apart."""
+    return salted_hmac(KEY_SALT, f'{user_id}:{code}').hexdigest()
+
+
+def retire_otps(otps, now=None):
+    """
+    Expire the OTP rows in `otps` and delete the emails that carried them,
+    sent or not, so no copy of the code outlives it.
+    """
+    email_ids = list(otps.exclude(email=None).values_list('email_id', flat=True))
+    otps.update(is_verified=True, expires_at=now or timezone.now())
+    if email_ids:
+        OutgoingEmail.objects.filter(pk__in=email_ids).delete()
+
+
+def issue_otp(user):
+    """
+    Retire the user's outstanding codes and store a new one. Only its hash
+    is kept, so the returned code must be sent now or never. Returns the
+    row and the code.
+    """
+    now = timezone.now()
+    code = f'{secrets.randbelow(900000) + 100000}'
+    # Retired and used codes expire at once, which is all the sweeper looks at
+    retire_otps(OTPVerification.objects.filter(user=user, is_verified=False), now)
+    otp = OTPVerification.objects.create(
+        user=user,
+        otp_hash=hash_otp(user.pk, code),
+        expires_at=now + timedelta(seconds=getattr(settings, 'OTP_TTL', 10 * 60)),
+    )
+    return otp, code
+
+
+def send_otp(user):
+    """Issue a password-reset code and queue the email carrying it."""
+    otp, code = issue_otp(user)
+    minutes = getattr(settings, 'OTP_TTL', 10 * 60) // 60
+    subject = 'Password Reset OTP Code'
+    message = f'Hi {user.username},\n\nYour OTP code to reset your password is {code}. This code is valid for {minutes} minutes.\n\nBest regards,\nCodeWithSathya Team'
+    # The body is the only plaintext copy of the code: it is dropped if it
+    # expires unsent, blanked once sent and deleted when the code is retired
+    otp.email = enqueue_email(subject, message, [user.email], expires_at=otp.expires_at, redact=True)
+    otp.save(update_fields=['email'])
+    return otp
+
+
+def find_otp(user, code):
+    """The user's newest unused OTP row matching `code`, or None."""
+    return (
+        OTPVerification.objects.filter(user=user, otp_hash=hash_otp(user.pk, code), is_verified=False)
+        .order_by('-created_at')
+        .first()
+    )
+
+
+def sweep_otps(batch_size=None):
+    """
+    Delete expired (which includes used) OTP rows and their emails,
+    `batch_size` at a time so no single statement holds many locks.
+    Returns the number of OTP rows deleted.
+    """
+    batch_size = batch_size or getattr(settings, 'OTP_SWEEP_BATCH_SIZE', 500)
+    now = timezone.now()
+    deleted = 0
+    while True:
+        rows = list(OTPVerification.objects.filter(expires_at__lt=now).values_list('pk', 'email_id')[:batch_size])
+        if not rows:
+            return deleted
+        deleted += OTPVerification.objects.filter(pk__in=[pk for pk, _ in rows]).delete()[0]
+        email_ids = [email_id for _, email_id in rows if email_id is not None]
+        if email_ids:
+            OutgoingEmail.objects.filter(pk__in=email_ids).delete()
@@ -3,6 +3,8 @@ from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from tutorials.models import UserBadge
+from users.models import OTPVerification
+from users.otp import find_otp, retire_otps
 
 User = get_user_model()
 
@@ -73,7 +75,7 @@ class ResetPasswordSerializer(serializers.Serializer):
         except User.DoesNotExist:
             raise serializers.ValidationError({"email": "User with this email does not exist."})
 
-        otp_obj = user.otps.filter(otp=otp, is_verified=False).order_by('-created_at').first()
+        otp_obj = find_otp(user, otp)
         if not otp_obj:
             raise serializers.ValidationError({"otp": "Invalid OTP code."})
 
@@ -92,8 +94,8 @@ class ResetPasswordSerializer(serializers.Serializer):
         user.set_password(new_password)
         user.save()
 
-        otp_obj.is_verified = True
-        otp_obj.save()
+        # A used code expires at once so the sweeper can drop it
+        retire_otps(OTPVerification.objects.filter(pk=otp_obj.pk))
         return user
 
 
@@ -146,3 +148,20 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
     def get_level(self, obj):
         return (obj.xp // 1000) + 1
+
+
+class NextLessonSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    slug = serializers.SlugField()
+    title = serializers.CharField()
+
+
+class LearningCourseSerializer(serializers.Serializer):
+    course = serializers.DictField()
+    is_enrolled = serializers.BooleanField()
+    completed_lessons = serializers.IntegerField()
+    total_lessons = serializers.IntegerField()
+    percent_complete = serializers.IntegerField()
+    last_activity_at = serializers.DateTimeField(allow_null=True)
+    next_lesson = NextLessonSerializer(allow_null=True)
+
@@ -0,0 +1,7 @@
+from jobs.registry import task
+from users.otp import sweep_otps
+
+
+@task('users.sweep_otps')
+def sweep_otps_task():
+    return sweep_otps()
@@ -1,18 +1,34 @@
 import datetime
+import re
+import threading
+import time
+import warnings
+from types import SimpleNamespace
+from unittest import mock
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from codewithsathya.throttling import TokenBucketThrottle
+from outbox.mail import drain_all, drain_outbox
+from outbox.models import OutgoingEmail
+from tutorials.models import Course, Section, Lesson
 from users.models import OTPVerification
+from users.otp import hash_otp, issue_otp, send_otp, sweep_otps
 
 User = get_user_model()
 
 class AuthAPITests(APITestCase):
 
     def setUp(self):
+        cache.clear()
         self.register_url = reverse('users:register')
         self.login_url = reverse('users:login')
         self.logout_url = reverse('users:logout')
@@ -140,6 +156,12 @@ class AuthAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('access', response.data)
 
+    def request_otp(self):
+        """Ask for a reset code and read it back from the sent email."""
+        self.client.post(self.forgot_password_url, {'email': self.user_data['email']})
+        drain_outbox()
+        return re.search(r'\b(\d{6})\b', mail.outbox[-1].body).group(1)
+
     def test_forgot_password_success(self):
         data = {'email': self.user_data['email']}
         response = self.client.post(self.forgot_password_url, data)
@@ -147,12 +169,28 @@ class AuthAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Check that OTPVerification object is created
         self.assertEqual(OTPVerification.objects.filter(user=self.user).count(), 1)
-        # Check that the email was sent
+        # The email is queued, then sent by the outbox worker
+        self.assertEqual(len(mail.outbox), 0)
+        drain_outbox()
         self.assertEqual(len(mail.outbox), 1)
         self.assertIn('Password Reset OTP Code', mail.outbox[0].subject)
-        # Verify the OTP is in the email body
-        otp = OTPVerification.objects.get(user=self.user).otp
-        self.assertIn(otp, mail.outbox[0].body)
+        # Only a hash of the emailed code is stored
+        otp = re.search(r'\b(\d{6})\b', mail.outbox[0].body).group(1)
+        otp_verification = OTPVerification.objects.get(user=self.user)
+        self.assertEqual(otp_verification.otp_hash, hash_otp(self.user.pk, otp))
+        self.assertNotIn(otp, otp_verification.otp_hash)
+        self.assertGreater(otp_verification.expires_at, timezone.now())
+        # ...and the sent email keeps no copy of it
+        self.assertEqual(otp_verification.email.status, 'sent')
+        self.assertEqual(otp_verification.email.body, '')
+
+    def test_expired_otp_email_is_never_sent(self):
+        self.client.post(self.forgot_password_url, {'email': self.user_data['email']})
+        otp_verification = OTPVerification.objects.get(user=self.user)
+        OutgoingEmail.objects.filter(pk=otp_verification.email_id).update(expires_at=timezone.now())
+        self.assertEqual(drain_all(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(OutgoingEmail.objects.exists())
 
     def test_forgot_password_nonexistent_email(self):
         data = {'email': 'nonexistent@example.com'}
@@ -161,9 +199,9 @@ class AuthAPITests(APITestCase):
 
     def test_reset_password_success(self):
         # Trigger forgot password to generate OTP
-        self.client.post(self.forgot_password_url, {'email': self.user_data['email']})
+        otp = self.request_otp()
         otp_verification = OTPVerification.objects.get(user=self.user)
-        otp = otp_verification.otp
+        self.assertTrue(OutgoingEmail.objects.filter(pk=otp_verification.email_id).exists())
 
         # Reset password
         reset_data = {
@@ -180,25 +218,60 @@ class AuthAPITests(APITestCase):
         # Check OTP is marked verified
         otp_verification.refresh_from_db()
         self.assertTrue(otp_verification.is_verified)
+        self.assertTrue(otp_verification.is_expired())
+        # The email that carried the code goes with it
+        self.assertIsNone(otp_verification.email_id)
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+        # The code cannot be used twice
+        reset_data['new_password'] = 'anotherpassword'
+        response = self.client.post(self.reset_password_url, reset_data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_reset_password_expired_otp(self):
         # Trigger forgot password to generate OTP
-        self.client.post(self.forgot_password_url, {'email': self.user_data['email']})
-        otp_verification = OTPVerification.objects.get(user=self.user)
-        
+        otp = self.request_otp()
+
         # Manually force OTP expiration back in time
-        otp_verification.created_at = timezone.now() - datetime.timedelta(minutes=15)
-        otp_verification.save()
+        OTPVerification.objects.filter(user=self.user).update(expires_at=timezone.now() - datetime.timedelta(minutes=5))
 
         reset_data = {
             'email': self.user_data['email'],
-            'otp': otp_verification.otp,
+            'otp': otp,
             'new_password': 'newsecretpassword'
         }
         response = self.client.post(self.reset_password_url, reset_data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('otp', response.data)
 
+    def test_new_otp_replaces_earlier_one(self):
+        first = self.request_otp()
+        second = self.request_otp()
+        self.assertEqual(OTPVerification.objects.filter(user=self.user, is_verified=False).count(), 1)
+        # Only the live code's email is kept
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
+        reset_data = {'email': self.user_data['email'], 'new_password': 'newsecretpassword'}
+        if first != second:
+            response = self.client.post(self.reset_password_url, {**reset_data, 'otp': first})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.reset_password_url, {**reset_data, 'otp': second})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_sweep_otps_deletes_expired_and_used_codes(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='secret')
+        for _ in range(3):
+            issue_otp(self.user)
+        send_otp(other)
+        OTPVerification.objects.filter(user=other).update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        live = OTPVerification.objects.get(user=self.user, is_verified=False)
+
+        # Two replaced codes and the lapsed one (with its email), deleted two at a time
+        self.assertEqual(sweep_otps(batch_size=2), 3)
+        self.assertEqual(list(OTPVerification.objects.all()), [live])
+        self.assertFalse(OutgoingEmail.objects.exists())
+        self.assertEqual(sweep_otps(), 0)
+
     def test_change_password_success(self):
         # Login to get access token
         login_data = {
@@ -252,3 +325,195 @@ class AuthAPITests(APITestCase):
         self.assertIn('detail', response.data)
         self.assertEqual(response.data['detail'], 'A user with this email already exists.')
 
+
+class AuthThrottleTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.login_url = reverse('users:login')
+        self.register_url = reverse('users:register')
+        self.forgot_password_url = reverse('users:forgot_password')
+        self.user = User.objects.create_user(
+            username='throttled@example.com', email='throttled@example.com', password='password123'
+        )
+
+    def login(self, email, password='wrong'):
+        return self.client.post(self.login_url, {'email': email, 'password': password})
+
+    @override_settings(THROTTLE_BUCKETS={'login': {'ip': '100/min', 'email': '2/min'}})
+    def test_email_bucket_rejects_before_any_work(self):
+        # The clock stands still so the advertised wait does not depend on test speed
+        clock = mock.patch('codewithsathya.throttling.time.time', return_value=time.time())
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.assertEqual(self.login('throttled@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login('throttled@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Refused before any query or password check, even with the right password
+        with self.assertNumQueries(0), mock.patch.object(User, 'check_password') as check_password:
+            response = self.login('throttled@example.com', 'password123')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('detail', response.data)
+        self.assertEqual(response['Retry-After'], '30')
+        check_password.assert_not_called()
+
+        # The same address in another spelling, or sent as 'username', shares the bucket
+        response = self.client.post(self.login_url, {'username': ' Throttled@Example.com', 'password': 'password123'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Other addresses have their own
+        self.assertEqual(self.login('someone@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(THROTTLE_BUCKETS={'login': {'ip': '3/min', 'email': '100/min'}})
+    def test_ip_bucket_spans_emails(self):
+        for i in range(3):
+            self.assertEqual(self.login(f'user{i}@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login('user3@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # A forged X-Forwarded-For does not buy a fresh bucket
+        response = self.client.post(
+            self.login_url, {'email': 'user3@example.com', 'password': 'wrong'}, HTTP_X_FORWARDED_FOR='203.0.113.9'
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Another client address is unaffected
+        response = self.client.post(
+            self.login_url, {'email': 'user3@example.com', 'password': 'wrong'}, REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(THROTTLE_BUCKETS={'login': {'ip': '100/min', 'email': '1/min'}})
+    def test_odd_emails_make_valid_cache_keys(self):
+        # Memcached rejects keys with spaces or over 250 characters
+        email = 'a b@' + 'x' * 300 + '.com'
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            self.assertEqual(self.login(email).status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(self.login(email).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(THROTTLE_BUCKETS={'login': {'ip': '2/min'}})
+    def test_bucket_refills_over_time(self):
+        start = time.time()
+        with mock.patch('codewithsathya.throttling.time.time', return_value=start) as clock:
+            self.login('throttled@example.com')
+            self.login('throttled@example.com')
+            self.assertEqual(self.login('throttled@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            # One token comes back every 30 seconds
+            clock.return_value = start + 30
+            self.assertEqual(self.login('throttled@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(self.login('throttled@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(THROTTLE_BUCKETS={'login': {'email': '3/min'}})
+    def test_concurrent_requests_cannot_spend_the_same_token(self):
+        read_buckets = LocMemCache.get_many
+
+        def slow_read(cache, keys, version=None):
+            buckets = read_buckets(cache, keys, version=version)
+            # Let every other request read the buckets before this one writes them
+            time.sleep(0.01)
+            return buckets
+
+        request = SimpleNamespace(data={'email': 'racer@example.com'}, META={'REMOTE_ADDR': '10.0.0.1'})
+        view = SimpleNamespace(throttle_scope='login')
+        start = threading.Barrier(10)
+        allowed = []
+
+        def attempt():
+            start.wait()
+            allowed.append(TokenBucketThrottle().allow_request(request, view))
+
+        with mock.patch.object(LocMemCache, 'get_many', autospec=True, side_effect=slow_read):
+            threads = [threading.Thread(target=attempt) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(allowed.count(True), 3)
+
+    @override_settings(THROTTLE_BUCKETS={'register': {'ip': '1/hour'}})
+    def test_register_is_throttled_per_ip(self):
+        data = {'email': 'new@example.com', 'password': 'password123'}
+        self.assertEqual(self.client.post(self.register_url, data).status_code, status.HTTP_201_CREATED)
+        data = {'email': 'other@example.com', 'password': 'password123'}
+        self.assertEqual(self.client.post(self.register_url, data).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(User.objects.filter(email='other@example.com').exists())
+
+    def test_forgot_password_limits_emails_per_address(self):
+        for _ in range(3):
+            response = self.client.post(self.forgot_password_url, {'email': 'throttled@example.com'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(self.forgot_password_url, {'email': 'throttled@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Three codes issued (each replacing the last), no fourth
+        self.assertEqual(OTPVerification.objects.filter(user=self.user).count(), 3)
+
+    @override_settings(THROTTLE_BUCKETS={})
+    def test_unconfigured_scope_is_not_throttled(self):
+        for _ in range(5):
+            self.assertEqual(self.login('throttled@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class LearningDashboardAPITests(APITestCase):
+
+    def setUp(self):
+        self.url = reverse('users:me_learning')
+        self.user = User.objects.create_user(
+            username='learner@example.com',
+            email='learner@example.com',
+            password='password123'
+        )
+        self.courses = []
+        for c in range(3):
+            course = Course.objects.create(title=f'Course {c}', description='d', course_time=30)
+            for s in range(2):
+                section = Section.objects.create(course=course, title=f'Section {c}.{s}', order=s)
+                for l in range(2):
+                    Lesson.objects.create(section=section, title=f'Lesson {c}.{s}.{l}', description='d', time=5, order=l)
+            self.courses.append(course)
+
+    def complete(self, lesson):
+        return self.client.post(reverse('tutorials:lesson-complete', kwargs={'slug': lesson.slug}))
+
+    def test_learning_dashboard(self):
+        self.client.force_authenticate(user=self.user)
+        self.courses[0].enrolled_users.add(self.user)
+        course1_lessons = list(Lesson.objects.filter(section__course=self.courses[1]).order_by('section__order', 'order'))
+        self.complete(course1_lessons[0])
+        self.complete(course1_lessons[1])
+
+        # Courses with their next lesson, progress counters, next lessons' titles
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+        started, enrolled = response.data
+        self.assertEqual(started['course']['slug'], self.courses[1].slug)
+        self.assertFalse(started['is_enrolled'])
+        self.assertEqual((started['completed_lessons'], started['total_lessons']), (2, 4))
+        self.assertEqual(started['percent_complete'], 50)
+        self.assertIsNotNone(started['last_activity_at'])
+        self.assertEqual(started['next_lesson']['slug'], course1_lessons[2].slug)
+
+        self.assertEqual(enrolled['course']['slug'], self.courses[0].slug)
+        self.assertTrue(enrolled['is_enrolled'])
+        self.assertEqual((enrolled['completed_lessons'], enrolled['total_lessons']), (0, 4))
+        self.assertEqual(enrolled['percent_complete'], 0)
+        self.assertIsNone(enrolled['last_activity_at'])
+        first = Lesson.objects.filter(section__course=self.courses[0]).order_by('section__order', 'order').first()
+        self.assertEqual(enrolled['next_lesson'], {'id': first.id, 'slug': first.slug, 'title': first.title})
+
+    def test_finished_course_has_no_next_lesson(self):
+        self.client.force_authenticate(user=self.user)
+        for lesson in Lesson.objects.filter(section__course=self.courses[2]):
+            self.complete(lesson)
+
+        [finished] = self.client.get(self.url).data
+        self.assertEqual((finished['completed_lessons'], finished['total_lessons']), (4, 4))
+        self.assertEqual(finished['percent_complete'], 100)
+        self.assertIsNone(finished['next_lesson'])
+
+    def test_learning_dashboard_requires_authentication(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
@@ -12,6 +12,7 @@ from users.views import (
     LogoutView,
     UserProfileView,
     UserBadgesView,
+    UserLearningView,
 )
 
 app_name = 'users'
@@ -22,6 +23,7 @@ urlpatterns = [
     path('logout/', LogoutView.as_view(), name='logout'),
     path('me/', UserProfileView.as_view(), name='me'),
     path('me/badges/', UserBadgesView.as_view(), name='me_badges'),
+    path('me/learning/', UserLearningView.as_view(), name='me_learning'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('forgot-password/', ForgotPasswordView.as_view(), name='forgot_password'),
     path('reset-password/', ResetPasswordView.as_view(), name='reset_password'),
@@ -1,13 +1,14 @@
-import random
-from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from users.models import OTPVerification
+from codewithsathya.throttling import TokenBucketThrottle
+from tutorials.models import Course, CourseProgress, Lesson, LessonProgress
+from tutorials.serializers import CourseListSerializer
+from users.otp import send_otp
 from users.serializers import (
     ChangePasswordSerializer,
     ForgotPasswordSerializer,
@@ -17,6 +18,7 @@ from users.serializers import (
     CustomTokenObtainPairSerializer,
     UserProfileSerializer,
     UserBadgeSerializer,
+    LearningCourseSerializer,
 )
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -24,6 +26,9 @@ from rest_framework_simplejwt.tokens import RefreshToken
 User = get_user_model()
 
 class RegisterView(APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'register'
+
     def post(self, request):
         serializer = UserRegisterSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -34,39 +39,26 @@ class RegisterView(APIView):
         }, status=status.HTTP_201_CREATED)
 
 class ForgotPasswordView(APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'forgot_password'
+
     def post(self, request):
         serializer = ForgotPasswordSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         email = serializer.validated_data['email']
         user = User.objects.get(email=email)
 
-        # Generate random 6-digit OTP
-        otp = f"{random.randint(100000, 999999)}"
-
-        # Mark all previous OTPs for this user as verified/expired to prevent reuse
-        OTPVerification.objects.filter(user=user, is_verified=False).update(is_verified=True)
-
-        # Save the new OTP
-        OTPVerification.objects.create(user=user, otp=otp)
-
-        # Send OTP email
-        subject = 'Password Reset OTP Code'
-        message = f'Hi {user.username},\n\nYour OTP code to reset your password is {otp}. This code is valid for 10 minutes.\n\nBest regards,\nCodeWithSathya Team'
-        from_email = settings.DEFAULT_FROM_EMAIL
-        recipient_list = [email]
-
-        try:
-            send_mail(subject, message, from_email, recipient_list)
-        except Exception as e:
-            return Response({
-                "detail": f"Failed to send email: {str(e)}"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # Replaces any earlier OTP and queues the email; the outbox worker sends it
+        send_otp(user)
 
         return Response({
             "message": "OTP code has been sent to your email."
         }, status=status.HTTP_200_OK)
 
 class ResetPasswordView(APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'reset_password'
+
     def post(self, request):
         serializer = ResetPasswordSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -91,6 +83,8 @@ class ChangePasswordView(APIView):
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'login'
 
     def get_serializer(self, *args, **kwargs):
         if 'data' in kwargs:
@@ -132,3 +126,65 @@ class UserBadgesView(APIView):
         badges = request.user.earned_badges.all()
         serializer = UserBadgeSerializer(badges, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class UserLearningView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        enrolled = Course.enrolled_users.through.objects.filter(course_id=OuterRef('pk'), user_id=user.pk)
+        has_progress = CourseProgress.objects.filter(course_id=OuterRef('pk'), user_id=user.pk)
+        completed = LessonProgress.objects.filter(user_id=user.pk, lesson_id=OuterRef('pk'), is_completed=True)
+        # First lesson of the course, in course order, that the user has not completed
+        next_lesson = (
+            Lesson.objects.filter(section__course_id=OuterRef('pk'))
+            .exclude(Exists(completed))
+            .order_by('section__order', 'section_id', 'order', 'id')
+            .values('id')[:1]
+        )
+        # Only needed for enrolments without a progress row yet
+        lesson_count = (
+            Lesson.objects.filter(section__course_id=OuterRef('pk'))
+            .order_by().values('section__course_id').annotate(count=Count('id')).values('count')
+        )
+        courses = list(
+            Course.objects.annotate(is_enrolled=Exists(enrolled))
+            .filter(Q(is_enrolled=True) | Exists(has_progress))
+            .annotate(next_lesson_id=Subquery(next_lesson), lesson_count=Subquery(lesson_count))
+            .select_related('rating_summary')
+        )
+        course_ids = [course.id for course in courses]
+
+        # Counts come from the progress rows kept by the completion endpoint
+        progress = {
+            record.course_id: record
+            for record in CourseProgress.objects.filter(user=user, course_id__in=course_ids)
+        }
+        next_lessons = {
+            lesson['id']: lesson
+            for lesson in Lesson.objects.filter(
+                id__in=[course.next_lesson_id for course in courses if course.next_lesson_id]
+            ).values('id', 'slug', 'title')
+        }
+
+        course_data = CourseListSerializer(courses, many=True, context={'request': request}).data
+        entries = []
+        for course, data in zip(courses, course_data):
+            record = progress.get(course.id) or CourseProgress(total_lessons=course.lesson_count or 0)
+            entries.append({
+                "course": data,
+                "is_enrolled": course.is_enrolled,
+                "completed_lessons": record.completed_lessons,
+                "total_lessons": record.total_lessons,
+                "percent_complete": record.percent_complete,
+                "last_activity_at": record.last_completed_at,
+                "next_lesson": next_lessons.get(course.next_lesson_id),
+            })
+
+        # Most recently active first, untouched enrolments last
+        active = sorted((e for e in entries if e['last_activity_at']), key=lambda e: e['last_activity_at'], reverse=True)
+        entries = active + [e for e in entries if not e['last_activity_at']]
+        serializer = LearningCourseSerializer(entries, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+